@@ -8,6 +8,7 @@ import LatencyStats, { LatencyData } from "@/components/LatencyStats";
 
 export type TranscriptItem = {
   id: string;
+  segmentId?: number;
   text: string;
   translation?: string;
   isFinal: boolean;
@@ -30,7 +31,7 @@ const initialLatencyStats: LatencyData = {
 
 export default function Home() {
   const [transcripts, setTranscripts] = useState<TranscriptItem[]>([]);
-  const [currentInterim, setCurrentInterim] = useState<{ text: string; translation?: string; timestamp: number } | null>(null);
+  const [currentInterim, setCurrentInterim] = useState<{ segmentId?: number; text: string; translation?: string; timestamp: number } | null>(null);
   const [status, setStatus] = useState<ConnectionStatus>("disconnected");
   const [error, setError] = useState<string | null>(null);
   const [latencyStats, setLatencyStats] = useState<LatencyData>(initialLatencyStats);
@@ -79,6 +80,7 @@ export default function Home() {
           // Save previous interim as final
           const savedTranscript: TranscriptItem = {
             id: `interim-saved-${prevInterim.timestamp}-${Math.random()}`,
+            segmentId: prevInterim.segmentId,
             text: prevInterim.text,
             translation: prevInterim.translation,
             isFinal: true,
@@ -87,11 +89,19 @@ export default function Home() {
           setTranscripts((prev) => [...prev, savedTranscript]);
         }
         // Update current interim with new data
-        return { text: transcript.text, translation: transcript.translation, timestamp: transcript.timestamp };
+        return { segmentId: transcript.segmentId, text: transcript.text, translation: transcript.translation, timestamp: transcript.timestamp };
       });
     }
   }, []);
 
+  const handleTranslationUpdate = useCallback((segmentId: number, translation: string) => {
+    // Attach the translation to the transcript of the same segment, wherever it is shown
+    setTranscripts((prev) =>
+      prev.map((item) => (item.segmentId === segmentId ? { ...item, translation } : item))
+    );
+    setCurrentInterim((prev) => (prev && prev.segmentId === segmentId ? { ...prev, translation } : prev));
+  }, []);
+
   const handleStatusChange = useCallback((newStatus: ConnectionStatus) => {
     setStatus(newStatus);
     if (newStatus !== "error") {
@@ -150,6 +160,7 @@ export default function Home() {
               </h2>
               <AudioRecorder
                 onTranscriptUpdate={handleTranscriptUpdate}
+                onTranslationUpdate={handleTranslationUpdate}
                 onStatusChange={handleStatusChange}
                 onError={handleError}
               />
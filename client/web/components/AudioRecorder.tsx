@@ -6,6 +6,7 @@ import type { TranscriptItem, ConnectionStatus } from "@/app/page";
 
 interface AudioRecorderProps {
   onTranscriptUpdate: (transcript: TranscriptItem) => void;
+  onTranslationUpdate?: (segmentId: number, translation: string) => void;
   onStatusChange: (status: ConnectionStatus) => void;
   onError: (error: string) => void;
 }
@@ -15,6 +16,7 @@ const SAMPLE_RATE = 16000;
 
 export default function AudioRecorder({
   onTranscriptUpdate,
+  onTranslationUpdate,
   onStatusChange,
   onError,
 }: AudioRecorderProps) {
@@ -29,6 +31,8 @@ export default function AudioRecorder({
   const lastResponseTimeRef = useRef<number>(0);
   const speechStartTimeRef = useRef<number>(0);  // When user started speaking (first non-silent audio)
   const hasSpeechRef = useRef<boolean>(false);
+  // Translation text per segment (/ws/stt-translate); a final's translation replaces interim ones
+  const translationsRef = useRef<Map<number, { text: string; isFinal: boolean }>>(new Map());
 
   // Clean up function
   const cleanup = () => {
@@ -102,6 +106,7 @@ export default function AudioRecorder({
       // Connect WebSocket
       const ws = new WebSocket(WS_URL);
       wsRef.current = ws;
+      translationsRef.current.clear();
 
       ws.onopen = () => {
         console.log("✅ WebSocket connected");
@@ -150,8 +155,9 @@ export default function AudioRecorder({
             
             const transcript: TranscriptItem & { latencyMs: number } = {
               id: `${data.timestamp}-${Math.random()}`,
+              segmentId: data.segment_id,
               text: data.transcript,
-              translation: data.translation,
+              translation: data.segment_id !== undefined ? translationsRef.current.get(data.segment_id)?.text : undefined,
               isFinal: data.is_final,
               timestamp: data.timestamp,
               confidence: data.confidence,
@@ -160,6 +166,26 @@ export default function AudioRecorder({
             
             // Update UI immediately
             onTranscriptUpdate(transcript);
+          } else if (data.type === "translation_delta" || data.type === "translation_final") {
+            // Translations stream in after their transcript, tied to it by segment_id
+            const current = translationsRef.current.get(data.segment_id);
+            if (current?.isFinal && !data.is_final) {
+              return;  // Late translation of an interim; the final's is already shown
+            }
+            let text: string;
+            if (data.type === "translation_final") {
+              text = data.translation;
+            } else if (data.sequence === 0 || !current || current.isFinal !== data.is_final) {
+              text = data.delta;  // First chunk of a new translation
+            } else {
+              text = current.text + data.delta;
+            }
+            translationsRef.current.set(data.segment_id, { text, isFinal: data.is_final });
+
+            if (data.type === "translation_final") {
+              console.log(`🌐 Translation [${data.segment_id}]: "${text}" (⏱️ ${data.latency_ms}ms)`);
+            }
+            onTranslationUpdate?.(data.segment_id, text);
           } else if (data.type === "error") {
             console.error("❌ STT Error:", data.message);
             onError(data.message);
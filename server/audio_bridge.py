@@ -0,0 +1,391 @@
+"""
+Audio Bridge
+Event-driven handoff of audio chunks from the event loop to the gRPC request thread
+"""
+
+import asyncio
+import collections
+import threading
+from typing import AsyncIterator, Iterator, Optional, Tuple
+from latency_trace import LatencyTrace
+from metrics import AUDIO_QUEUE_DROPPED
+from ring_buffer import AudioRingBuffer
+
+# What a bridge does with audio beyond its byte budget (see AudioBridge)
+OVERFLOW_POLICIES = ("pause", "drop_oldest", "merge")
+
+# Largest audio payload of one StreamingRecognizeRequest: Speech v2 rejects more
+# than 15 KB (480 ms of 16 kHz LINEAR16)
+MAX_REQUEST_BYTES = 15360
+
+# Longest a paused receiver waits before reading the next client message
+PAUSE_RECHECK_S = 1.0
+
+
+def replay_span(position: int, replay_from: int, available: int) -> int:
+    """
+    Bytes a replacement stream replays to pick up at ``replay_from``.
+
+    Args:
+        position: Bytes handed to readers so far
+        replay_from: Bridge position the replacement should start at
+            (usually the end of the last final result)
+        available: Bytes of history held for replay
+
+    Returns:
+        ``position - replay_from``, capped at ``available``; 0 when nothing
+        after ``replay_from`` has been sent yet
+    """
+    return max(0, min(position - replay_from, available))
+
+
+class AudioBridge:
+    """
+    Thread-safe audio channel between a WebSocket receiver and a gRPC request iterator.
+
+    The producer side (``put``/``close``/``interrupt``/``wait_for_audio``) runs on
+    the event loop. The consumer side is either ``reader``, run by the thread that
+    drives a blocking ``streaming_recognize`` and parked on a condition variable,
+    or ``areader``, which awaits on the loop for the asyncio engine. Either way
+    the consumer only wakes up when audio, end of stream or an interrupt arrives.
+
+    Above the high watermark of a ``max_bytes`` budget the bridge is
+    ``throttled`` until the queue drains to the low watermark, and the
+    policy decides what happens meanwhile:
+
+    - ``pause``: the receiver stops reading the socket (``pace``), so TCP
+      pushes back on the client. Nothing is dropped: a full queue holds the
+      receiver until there is room, so the queue only passes the budget by
+      the audio already read before the pause took effect
+    - ``drop_oldest``: audio keeps flowing in; the oldest chunks are dropped
+      to keep the queue within the budget
+    - ``merge``: the backlog is sent upstream in requests of up to
+      MAX_REQUEST_BYTES (480 ms of 16 kHz LINEAR16) so the stream catches up faster; audio that
+      still does not fit is dropped oldest first
+
+    Audio dropped from the queue never reaches the stream, so latency traces
+    are approximate for a session after a drop.
+    """
+
+    def __init__(
+        self,
+        history_bytes: int = 0,
+        trace: Optional[LatencyTrace] = None,
+        max_bytes: int = 0,
+        policy: str = "pause",
+        high_water: float = 0.75,
+        low_water: float = 0.25,
+    ):
+        """
+        Initialize an empty, open bridge.
+
+        Args:
+            history_bytes: Size of the history of consumed audio kept for replay
+            trace: Optional latency trace recording when audio is queued and consumed
+            max_bytes: Budget for queued audio (0 = unbounded)
+            policy: Overflow policy, one of OVERFLOW_POLICIES
+            high_water: Share of the budget at which the bridge becomes throttled
+            low_water: Share of the budget at which it stops being throttled
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown audio queue policy {policy!r}")
+        self._chunks = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        # Bumped by interrupt() to detach every reader that is currently attached
+        self._epoch = 0
+        # Total chunks ever queued, lets waiters notice audio a reader already took
+        self._put_count = 0
+        # Bytes ever queued (less any dropped), and bytes handed to readers so far
+        self._queued = 0
+        self._position = 0
+        self.trace = trace
+        self._history = AudioRingBuffer(history_bytes)
+        # Chunks merged into a previous request instead of being sent alone
+        self.coalesced = 0
+        # Set on the event loop whenever audio is queued or the bridge is closed
+        self._audio_ready = asyncio.Event()
+
+        # Byte budget and flow control
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._high_water = int(max_bytes * high_water)
+        self._low_water = int(max_bytes * low_water)
+        self._buffered = 0
+        self.peak_bytes = 0
+        self.throttled = False
+        self.throttle_events = 0
+        self.dropped_bytes = 0
+        self.dropped_chunks = 0
+        # Replaced (after being set) on every change of ``throttled``
+        self._flow_event = asyncio.Event()
+        try:
+            self._loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def put(self, chunk: bytes, received_at: Optional[float] = None) -> None:
+        """
+        Queue an audio chunk and wake the reader.
+
+        Args:
+            chunk: Raw audio bytes
+            received_at: time.monotonic() when the audio reached the server (for tracing)
+        """
+        dropped = 0
+        with self._cond:
+            if self._closed:
+                return
+            if self.max_bytes and self.policy != "pause":
+                # Oldest audio goes first; a single oversized chunk is still kept
+                while self._chunks and self._buffered + len(chunk) > self.max_bytes:
+                    oldest = self._chunks.popleft()
+                    self._buffered -= len(oldest)
+                    self._queued -= len(oldest)
+                    dropped += len(oldest)
+                    self.dropped_chunks += 1
+            self._chunks.append(chunk)
+            self._put_count += 1
+            self._queued += len(chunk)
+            self._buffered += len(chunk)
+            self.peak_bytes = max(self.peak_bytes, self._buffered)
+            throttle = self.max_bytes and not self.throttled and self._buffered >= self._high_water
+            if throttle:
+                self.throttled = True
+                self.throttle_events += 1
+            if self.trace is not None:
+                self.trace.mark_received(self._queued, received_at)
+            self._cond.notify()
+        self._audio_ready.set()
+        if dropped:
+            self.dropped_bytes += dropped
+            AUDIO_QUEUE_DROPPED.inc(dropped, policy=self.policy)
+        if throttle:
+            self._flow_changed()
+
+    def close(self) -> None:
+        """Signal end of audio. Readers drain what is queued, then stop."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._audio_ready.set()
+        self._flow_changed()
+
+    def interrupt(self) -> None:
+        """Detach every attached reader without closing the bridge (used on stream restart)."""
+        with self._cond:
+            self._epoch += 1
+            self._cond.notify_all()
+        self._audio_ready.set()
+
+    def empty(self) -> bool:
+        """Return True if no audio is queued."""
+        return not self._chunks
+
+    def handover(self, replay_from: Optional[int] = None) -> Tuple[int, int, bytes]:
+        """
+        Detach current readers and return what a replacement stream should start with.
+
+        Args:
+            replay_from: Bridge position to replay consumed audio from, as far
+                back as the history reaches (None replays nothing)
+
+        Returns:
+            Tuple of (epoch for the new reader, audio position of the first
+            byte the new stream will receive, replay audio)
+        """
+        with self._cond:
+            self._epoch += 1
+            self._cond.notify_all()
+            replay = b""
+            if replay_from is not None:
+                replay = self._history.tail(replay_span(self._position, replay_from, len(self._history)))
+            epoch, origin = self._epoch, self._position - len(replay)
+        self._audio_ready.set()
+        return epoch, origin, replay
+
+    @property
+    def position(self) -> int:
+        """Total bytes handed to readers so far."""
+        return self._position
+
+    @property
+    def epoch(self) -> int:
+        """Current reader epoch; capture it before starting a stream."""
+        return self._epoch
+
+    @property
+    def closed(self) -> bool:
+        """Check if the producer has signalled end of audio."""
+        return self._closed
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Audio queued and not yet handed to a reader."""
+        return self._buffered
+
+    def queue_stats(self) -> dict:
+        """Return the queue's depth, budget and overflow counters."""
+        return {
+            "policy": self.policy,
+            "buffered_bytes": self._buffered,
+            "peak_bytes": self.peak_bytes,
+            "max_bytes": self.max_bytes,
+            "throttled": self.throttled,
+            "throttle_events": self.throttle_events,
+            "dropped_bytes": self.dropped_bytes,
+            "dropped_chunks": self.dropped_chunks,
+        }
+
+    async def wait_flow_change(self, throttled: bool) -> bool:
+        """
+        Wait until ``throttled`` differs from the given state or the bridge closes.
+
+        Args:
+            throttled: State the caller last saw
+
+        Returns:
+            bool: Current ``throttled`` state
+        """
+        while self.throttled == throttled and not self._closed:
+            await self._flow_event.wait()
+        return self.throttled
+
+    async def pace(self) -> None:
+        """
+        Hold the receiver back under the ``pause`` policy while throttled.
+
+        Waits at most PAUSE_RECHECK_S while the queue has room, so a client
+        that went away is still noticed by the next receive. While the queue
+        is at its budget it keeps waiting, since ``pause`` never drops audio.
+        """
+        if self.policy != "pause":
+            return
+        while self.throttled and not self._closed:
+            try:
+                await asyncio.wait_for(self.wait_flow_change(True), PAUSE_RECHECK_S)
+            except asyncio.TimeoutError:
+                pass
+            if self._buffered < self.max_bytes:
+                return
+
+    def _flow_changed(self) -> None:
+        """Wake flow waiters; safe to call from the reader thread."""
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake_flow_waiters)
+        except RuntimeError:
+            # Event loop already closed
+            pass
+
+    def _wake_flow_waiters(self) -> None:
+        event, self._flow_event = self._flow_event, asyncio.Event()
+        event.set()
+
+    async def wait_for_audio(self) -> bool:
+        """
+        Wait until audio is queued or the bridge is closed.
+
+        Returns:
+            bool: True if audio arrived, False if the bridge was closed
+        """
+        put_count = self._put_count
+        while self.empty() and not self._closed and self._put_count == put_count:
+            self._audio_ready.clear()
+            await self._audio_ready.wait()
+        return not self.empty() or self._put_count != put_count
+
+    def get(self, epoch: Optional[int] = None, max_batch: int = 1) -> Optional[bytes]:
+        """
+        Block until a chunk is available.
+
+        Args:
+            epoch: Reader epoch; the call returns None once interrupt() moves past it
+            max_batch: Maximum queued chunks merged into the returned bytes
+
+        Returns:
+            Audio bytes, or None on close/interrupt
+        """
+        with self._cond:
+            if epoch is None:
+                epoch = self._epoch
+            while not self._chunks and not self._closed and self._epoch == epoch:
+                self._cond.wait()
+            if self._epoch != epoch or not self._chunks:
+                return None
+            return self._consume(max_batch)
+
+    def _consume(self, max_batch: int = 1) -> bytes:
+        """
+        Pop the next chunk, merged with up to ``max_batch - 1`` more if a backlog
+        has built up, and record it in the history. Caller holds the lock.
+
+        Chunks are merged whole and only while the request stays within
+        MAX_REQUEST_BYTES.
+        """
+        chunk = self._chunks.popleft()
+        if self.policy == "merge" and self.throttled:
+            # Catching up: as many chunks as fit in one request
+            max_batch = len(self._chunks) + 1
+        if max_batch > 1 and self._chunks:
+            batch = [chunk]
+            size = len(chunk)
+            while self._chunks and len(batch) < max_batch and size + len(self._chunks[0]) <= MAX_REQUEST_BYTES:
+                size += len(self._chunks[0])
+                batch.append(self._chunks.popleft())
+            chunk = b"".join(batch)
+            self.coalesced += len(batch) - 1
+        self._buffered -= len(chunk)
+        if self.throttled and self._buffered <= self._low_water:
+            self.throttled = False
+            self._flow_changed()
+        self._position += len(chunk)
+        self._history.write(chunk)
+        if self.trace is not None:
+            self.trace.mark_sent(self._position)
+        return chunk
+
+    def reader(self, epoch: Optional[int] = None, max_batch: int = 1) -> Iterator[bytes]:
+        """
+        Yield queued chunks until the bridge is closed or interrupted.
+
+        Args:
+            epoch: Epoch captured when the stream was started (defaults to current)
+            max_batch: Maximum queued chunks merged into one yielded item
+
+        Yields:
+            Audio bytes in arrival order
+        """
+        if epoch is None:
+            epoch = self._epoch
+        while True:
+            chunk = self.get(epoch, max_batch)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def areader(
+        self, epoch: Optional[int] = None, max_batch: int = 1
+    ) -> AsyncIterator[bytes]:
+        """
+        Async variant of ``reader`` for consumers running on the event loop.
+
+        Args:
+            epoch: Epoch captured when the stream was started (defaults to current)
+            max_batch: Maximum queued chunks merged into one yielded item
+
+        Yields:
+            Audio bytes in arrival order
+        """
+        if epoch is None:
+            epoch = self._epoch
+        while True:
+            while not self._chunks and not self._closed and self._epoch == epoch:
+                self._audio_ready.clear()
+                await self._audio_ready.wait()
+            with self._cond:
+                if self._epoch != epoch or not self._chunks:
+                    return
+                chunk = self._consume(max_batch)
+            yield chunk
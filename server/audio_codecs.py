@@ -0,0 +1,480 @@
+"""
+Audio Codecs
+Negotiated client audio encodings: passed through to Google or decoded server-side
+"""
+
+import asyncio
+import io
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple, Optional
+import numpy as np
+from fastapi import WebSocket
+from config import AUDIO_DECODE_WORKERS
+from logger import get_logger
+from metrics import CODEC_BYTES, CODEC_DECODE_SECONDS, CODEC_PCM_BYTES, ERRORS
+from session_scheduler import ServerBusyError
+
+try:
+    import av
+except ImportError:  # Optional: only needed for container codecs
+    av = None
+
+logger = get_logger("audio_codecs")
+
+
+class AudioFormat(NamedTuple):
+    """Raw audio as sent upstream (an ``ExplicitDecodingConfig`` encoding)."""
+
+    encoding: str
+    sample_rate: int
+    sample_width: int
+
+    @property
+    def bytes_per_ms(self) -> int:
+        """Bytes of mono audio per millisecond."""
+        return self.sample_rate * self.sample_width // 1000
+
+    def frame_bytes(self, frame_ms: int) -> int:
+        """Bytes in one upstream frame of ``frame_ms`` milliseconds."""
+        return self.sample_rate * frame_ms // 1000 * self.sample_width
+
+
+# What the client sent before codec negotiation, and what decoded audio becomes
+LINEAR16 = AudioFormat("LINEAR16", 16000, 2)
+
+
+class UnsupportedCodecError(ValueError):
+    """Raised when a client asks for an audio codec the server can't take."""
+
+
+def _mulaw_table() -> np.ndarray:
+    """G.711 μ-law code -> LINEAR16 sample."""
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = ((((codes & 0x0F) << 3) + 0x84) << exponent) - 0x84
+    return np.where(codes & 0x80, -magnitude, magnitude).astype("<i2")
+
+
+def _alaw_table() -> np.ndarray:
+    """G.711 A-law code -> LINEAR16 sample."""
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    exponent = (codes >> 4) & 0x07
+    mantissa = (codes & 0x0F) << 4
+    magnitude = np.where(
+        exponent == 0, mantissa + 8, (mantissa + 0x108) << np.maximum(exponent - 1, 0)
+    )
+    return np.where(codes & 0x80, magnitude, -magnitude).astype("<i2")
+
+
+_G711_TABLES = {"MULAW": _mulaw_table(), "ALAW": _alaw_table()}
+
+
+def to_linear16(chunk: bytes, audio_format: AudioFormat) -> bytes:
+    """
+    Expand passthrough audio to LINEAR16 (for level measurements only).
+
+    Args:
+        chunk: Audio in ``audio_format``
+        audio_format: LINEAR16, MULAW or ALAW format of the chunk
+
+    Returns:
+        Little-endian 16-bit PCM at the same sample rate
+    """
+    table = _G711_TABLES.get(audio_format.encoding)
+    if table is None:
+        return chunk
+    return table[np.frombuffer(chunk, dtype=np.uint8)].tobytes()
+
+
+# Codecs Google decodes itself: client audio is forwarded as is.
+# codec -> (ExplicitDecodingConfig encoding, bytes per sample, default sample rate)
+PASSTHROUGH_CODECS = {
+    "linear16": ("LINEAR16", 2, 16000),
+    "mulaw": ("MULAW", 1, 8000),
+    "alaw": ("ALAW", 1, 8000),
+}
+
+# Containers decoded to LINEAR16 here: rollover replay restarts a stream from
+# an arbitrary byte offset and VAD needs samples, neither of which works on a
+# container stream. codec -> demuxer
+DECODED_CODECS = {
+    "ogg_opus": "ogg",
+    "webm_opus": "matroska",
+    "flac": "flac",
+}
+
+
+class _StreamInput(io.RawIOBase):
+    """Non-seekable file fed from the event loop and read by a decoder thread."""
+
+    def __init__(self):
+        super().__init__()
+        self._cond = threading.Condition()
+        self._buffer = bytearray()
+        self._ended = False
+
+    def readable(self) -> bool:
+        return True
+
+    def feed(self, data: bytes) -> None:
+        with self._cond:
+            self._buffer += data
+            self._cond.notify()
+
+    def end(self) -> None:
+        with self._cond:
+            self._ended = True
+            self._cond.notify()
+
+    def readinto(self, buffer) -> int:
+        # Blocks until data arrives; 0 means end of input
+        with self._cond:
+            while not self._buffer and not self._ended:
+                self._cond.wait()
+            size = min(len(buffer), len(self._buffer))
+            buffer[:size] = self._buffer[:size]
+            del self._buffer[:size]
+            return size
+
+
+class AudioDecoderPool:
+    """
+    Worker threads that decode container audio to LINEAR16.
+
+    A decoding session keeps one worker for its whole lifetime (the demuxer
+    reads the client stream as it arrives), so sessions beyond the pool size
+    are refused at connect time instead of waiting for a worker.
+    """
+
+    def __init__(self, workers: int = AUDIO_DECODE_WORKERS):
+        """
+        Initialize the pool.
+
+        Args:
+            workers: Maximum concurrently decoding sessions
+        """
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio-decode")
+        self._lock = threading.Lock()
+        self.active = 0
+        self.rejected = 0
+
+    def start(self, decoder: "AudioDecoder") -> None:
+        """
+        Run a decoder on a worker.
+
+        Raises:
+            ServerBusyError: If every worker is taken
+        """
+        with self._lock:
+            if self.active >= self.workers:
+                self.rejected += 1
+                raise ServerBusyError(f"All {self.workers} audio decoders are busy")
+            self.active += 1
+        self._executor.submit(self._run, decoder)
+
+    def stats(self) -> dict:
+        """Return worker usage."""
+        return {"workers": self.workers, "active": self.active, "rejected": self.rejected}
+
+    def _run(self, decoder: "AudioDecoder") -> None:
+        try:
+            decoder.run()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class AudioDecoder:
+    """
+    Streaming decoder for one session's container audio.
+
+    Client bytes are fed from the event loop; a pool worker demuxes and
+    decodes them with PyAV, resamples to LINEAR16 mono and hands the PCM
+    back to the loop as it is produced.
+    """
+
+    def __init__(
+        self,
+        codec: str,
+        output_format: AudioFormat,
+        on_audio: Callable[[bytes], None],
+        on_end: Callable[[], None],
+    ):
+        """
+        Initialize the decoder (it starts when submitted to the pool).
+
+        Args:
+            codec: Key of DECODED_CODECS
+            output_format: LINEAR16 format to produce
+            on_audio: Called on the event loop with each decoded PCM chunk
+            on_end: Called on the event loop once all input is decoded
+        """
+        self.codec = codec
+        self.output_format = output_format
+        self.on_audio = on_audio
+        self.on_end = on_end
+        self.loop = asyncio.get_running_loop()
+        self._input = _StreamInput()
+
+        # Written by the worker
+        self.pcm_bytes = 0
+        self.cpu_seconds = 0.0
+
+    def feed(self, data: bytes) -> None:
+        """Queue client bytes for decoding."""
+        self._input.feed(data)
+
+    def end(self) -> None:
+        """Signal end of client audio (the decoder drains what is queued)."""
+        self._input.end()
+
+    def run(self) -> None:
+        """Decode until end of input (runs on a pool worker)."""
+        cpu_start = time.thread_time()
+        try:
+            container = av.open(self._input, mode="r", format=DECODED_CODECS[self.codec])
+            try:
+                resampler = av.AudioResampler(
+                    format="s16", layout="mono", rate=self.output_format.sample_rate
+                )
+                for frame in container.decode(audio=0):
+                    for pcm_frame in resampler.resample(frame):
+                        cpu_start = self._deliver(pcm_frame, cpu_start)
+                for pcm_frame in resampler.resample(None):
+                    cpu_start = self._deliver(pcm_frame, cpu_start)
+            finally:
+                container.close()
+        except Exception as e:
+            ERRORS.inc(category="decode")
+            logger.error("❌ Audio decoding failed", codec=self.codec, error=e)
+        finally:
+            self._account(cpu_start)
+            self._input.end()
+            self._to_loop(self.on_end)
+
+    def _deliver(self, pcm_frame, cpu_start: float) -> float:
+        """Hand one decoded frame to the loop; returns the new CPU mark."""
+        pcm = pcm_frame.to_ndarray().tobytes()
+        self.pcm_bytes += len(pcm)
+        CODEC_PCM_BYTES.inc(len(pcm), codec=self.codec)
+        cpu_mark = self._account(cpu_start)
+        self._to_loop(self.on_audio, pcm)
+        return cpu_mark
+
+    def _to_loop(self, callback: Callable, *args) -> None:
+        """Run a callback on the event loop (dropped if the loop is gone)."""
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass
+
+    def _account(self, cpu_start: float) -> float:
+        """Add this thread's CPU time since ``cpu_start``; returns the new mark."""
+        now = time.thread_time()
+        self.cpu_seconds += now - cpu_start
+        CODEC_DECODE_SECONDS.inc(now - cpu_start, codec=self.codec)
+        return now
+
+
+class AudioInput:
+    """
+    A session's client audio, converted to what is sent upstream.
+
+    Passthrough codecs reach ``on_audio`` unchanged as they are fed; container
+    codecs go through an ``AudioDecoder`` and reach it as LINEAR16 once
+    decoded. Either way ``format`` describes the bytes ``on_audio`` gets.
+    """
+
+    def __init__(self, codec: str = "linear16", sample_rate: Optional[int] = None):
+        """
+        Initialize the input.
+
+        Args:
+            codec: Key of PASSTHROUGH_CODECS or DECODED_CODECS
+            sample_rate: Client sample rate for passthrough codecs (codec default if omitted)
+
+        Raises:
+            UnsupportedCodecError: If the codec is unknown or can't be decoded here
+        """
+        self.codec = codec
+        if codec in PASSTHROUGH_CODECS:
+            encoding, sample_width, default_rate = PASSTHROUGH_CODECS[codec]
+            self.format = AudioFormat(encoding, sample_rate or default_rate, sample_width)
+            self.decoded = False
+        elif codec in DECODED_CODECS:
+            if av is None:
+                raise UnsupportedCodecError(f"Codec '{codec}' needs PyAV (pip install av)")
+            self.format = LINEAR16
+            self.decoded = True
+        else:
+            supported = ", ".join([*PASSTHROUGH_CODECS, *DECODED_CODECS])
+            raise UnsupportedCodecError(f"Unknown codec '{codec}' (supported: {supported})")
+
+        self._decoder: Optional[AudioDecoder] = None
+        self._on_audio: Optional[Callable[[bytes], None]] = None
+        self._on_end: Optional[Callable[[], None]] = None
+        self.bytes_received = 0
+
+    def start(self, on_audio: Callable[[bytes], None], on_end: Callable[[], None]) -> None:
+        """
+        Set where converted audio goes, starting a decoder if needed.
+
+        Args:
+            on_audio: Called with audio in ``format``
+            on_end: Called once after the last audio
+
+        Raises:
+            ServerBusyError: If no decoder worker is free
+        """
+        self._on_audio = on_audio
+        self._on_end = on_end
+        if self.decoded:
+            self._decoder = AudioDecoder(self.codec, self.format, on_audio, on_end)
+            get_audio_decoder_pool().start(self._decoder)
+
+    def feed(self, data: bytes) -> None:
+        """Take one client message."""
+        self.bytes_received += len(data)
+        CODEC_BYTES.inc(len(data), codec=self.codec)
+        if self._decoder is not None:
+            self._decoder.feed(data)
+            return
+        CODEC_PCM_BYTES.inc(self._linear16_bytes(len(data)), codec=self.codec)
+        self._on_audio(data)
+
+    def end(self) -> None:
+        """Signal end of client audio (``on_end`` follows once everything is delivered)."""
+        if self._decoder is not None:
+            self._decoder.end()
+        elif self._on_end is not None:
+            on_end, self._on_end = self._on_end, None
+            on_end()
+
+    def stats(self) -> dict:
+        """Return bytes received vs. their 16 kHz LINEAR16 size, and decoding cost."""
+        if self._decoder is not None:
+            pcm_bytes = self._decoder.pcm_bytes
+            cpu_seconds = self._decoder.cpu_seconds
+        else:
+            pcm_bytes = self._linear16_bytes(self.bytes_received)
+            cpu_seconds = 0.0
+        audio_seconds = pcm_bytes / (LINEAR16.bytes_per_ms * 1000)
+        return {
+            "codec": self.codec,
+            "upstream_encoding": self.format.encoding,
+            "sample_rate": self.format.sample_rate,
+            "bytes_received": self.bytes_received,
+            "linear16_bytes": pcm_bytes,
+            "bytes_saved": pcm_bytes - self.bytes_received,
+            "compression_ratio": round(pcm_bytes / self.bytes_received, 2) if self.bytes_received else 0.0,
+            "decode_cpu_ms": round(cpu_seconds * 1000, 1),
+            # CPU seconds per second of audio
+            "decode_cpu_ratio": round(cpu_seconds / audio_seconds, 4) if audio_seconds else 0.0,
+        }
+
+    def _linear16_bytes(self, size: int) -> int:
+        """Size of ``size`` bytes of passthrough audio as 16 kHz LINEAR16."""
+        return size * LINEAR16.bytes_per_ms // self.format.bytes_per_ms
+
+
+def negotiate_audio(websocket: WebSocket) -> AudioInput:
+    """
+    Pick the client audio codec for a connection.
+
+    Clients choose with ``?codec=`` (linear16, mulaw, alaw, ogg_opus,
+    webm_opus, flac) and, for raw codecs, ``&sample_rate=``. The default is
+    16 kHz LINEAR16.
+
+    Args:
+        websocket: Client connection
+
+    Returns:
+        AudioInput for the session (not started yet)
+
+    Raises:
+        UnsupportedCodecError: If the codec or sample rate is not usable
+    """
+    codec = websocket.query_params.get("codec", "linear16").lower()
+    sample_rate = websocket.query_params.get("sample_rate")
+    if sample_rate is not None:
+        if not sample_rate.isdigit() or not 8000 <= int(sample_rate) <= 48000:
+            raise UnsupportedCodecError(f"Invalid sample_rate '{sample_rate}' (8000-48000)")
+        sample_rate = int(sample_rate)
+    return AudioInput(codec, sample_rate)
+
+
+def decode_file(data: bytes, codec: Optional[str] = None, sample_rate: Optional[int] = None) -> bytes:
+    """
+    Decode a whole uploaded file to 16 kHz mono LINEAR16 (blocking; run in a thread).
+
+    WAV files with 16-bit PCM are read directly; raw audio needs ``codec``
+    (linear16, mulaw or alaw) and ``sample_rate``; anything else goes through
+    PyAV (Ogg/WebM Opus, FLAC, MP3, M4A, ...).
+
+    Args:
+        data: File contents
+        codec: Passthrough codec of headerless audio (None to detect)
+        sample_rate: Sample rate of headerless audio (codec default if omitted)
+
+    Returns:
+        LINEAR16 bytes at LINEAR16.sample_rate
+
+    Raises:
+        UnsupportedCodecError: If the file can't be decoded
+    """
+    if codec in PASSTHROUGH_CODECS:
+        encoding, sample_width, default_rate = PASSTHROUGH_CODECS[codec]
+        audio_format = AudioFormat(encoding, sample_rate or default_rate, sample_width)
+        samples = np.frombuffer(to_linear16(data[:len(data) - len(data) % sample_width], audio_format), dtype="<i2")
+        return _resample(samples, audio_format.sample_rate)
+    if codec is not None and codec not in DECODED_CODECS:
+        raise UnsupportedCodecError(f"Unknown codec '{codec}'")
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            with wave.open(io.BytesIO(data), "rb") as wav:
+                if wav.getsampwidth() == 2:
+                    samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+                    samples = samples.reshape(-1, wav.getnchannels()).mean(axis=1)
+                    return _resample(samples, wav.getframerate())
+        except (wave.Error, EOFError, ValueError):
+            pass  # e.g. float or compressed WAV: let PyAV try
+
+    if av is None:
+        raise UnsupportedCodecError("Only 16-bit WAV and raw audio can be decoded without PyAV (pip install av)")
+    try:
+        with av.open(io.BytesIO(data), mode="r") as container:
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=LINEAR16.sample_rate)
+            pcm = bytearray()
+            for frame in container.decode(audio=0):
+                for pcm_frame in resampler.resample(frame):
+                    pcm += pcm_frame.to_ndarray().tobytes()
+            for pcm_frame in resampler.resample(None):
+                pcm += pcm_frame.to_ndarray().tobytes()
+            return bytes(pcm)
+    except (av.FFmpegError, ValueError) as e:
+        raise UnsupportedCodecError(f"Can't decode audio file: {e}") from e
+
+
+def _resample(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Linearly resample mono samples to LINEAR16.sample_rate."""
+    if sample_rate != LINEAR16.sample_rate and samples.size:
+        positions = np.arange(0, samples.size, sample_rate / LINEAR16.sample_rate)
+        samples = np.interp(positions, np.arange(samples.size), samples)
+    return samples.astype("<i2").tobytes()
+
+
+# Singleton instance for reuse
+_audio_decoder_pool: Optional[AudioDecoderPool] = None
+
+
+def get_audio_decoder_pool() -> AudioDecoderPool:
+    """Get or create the audio decoder pool singleton."""
+    global _audio_decoder_pool
+    if _audio_decoder_pool is None:
+        _audio_decoder_pool = AudioDecoderPool()
+    return _audio_decoder_pool
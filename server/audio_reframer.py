@@ -0,0 +1,88 @@
+"""
+Audio Reframer
+Turns arbitrarily sized client chunks into fixed-duration upstream frames
+"""
+
+from typing import List
+
+
+class AudioReframer:
+    """
+    Cuts a byte stream into frames of exactly ``frame_bytes``.
+
+    Every frame is copied once into its own ``bytes`` object, since frames
+    outlive the client chunk they came from and are sent upstream as bytes.
+    The incoming chunk is addressed through a memoryview, so slicing it
+    does not add copies on top of that. At most one partial frame is
+    pending between chunks. It is kept at the start of a preallocated
+    staging bytearray, and the next chunk fills the rest in place.
+    """
+
+    def __init__(self, frame_bytes: int):
+        """
+        Initialize the reframer.
+
+        Args:
+            frame_bytes: Size of every emitted frame in bytes
+        """
+        self.frame_bytes = frame_bytes
+        self._staging = bytearray(frame_bytes)
+        self._staging_view = memoryview(self._staging)
+        self._pending = 0
+
+        # Counters for monitoring
+        self.chunks_in = 0
+        self.frames_out = 0
+
+    @property
+    def pending(self) -> int:
+        """Bytes held back waiting for the rest of a frame."""
+        return self._pending
+
+    def push(self, data: bytes) -> List[bytes]:
+        """
+        Add client audio and return every frame it completes.
+
+        Args:
+            data: Audio bytes of any length
+
+        Returns:
+            Complete frames, oldest first
+        """
+        self.chunks_in += 1
+        frames = []
+        view = memoryview(data)
+        frame_bytes = self.frame_bytes
+
+        if self._pending:
+            take = min(frame_bytes - self._pending, len(view))
+            self._staging_view[self._pending:self._pending + take] = view[:take]
+            self._pending += take
+            view = view[take:]
+            if self._pending < frame_bytes:
+                return frames
+            frames.append(bytes(self._staging))
+            self._pending = 0
+
+        full = len(view) - len(view) % frame_bytes
+        for offset in range(0, full, frame_bytes):
+            frames.append(bytes(view[offset:offset + frame_bytes]))
+
+        rest = len(view) - full
+        if rest:
+            self._staging_view[:rest] = view[full:]
+            self._pending = rest
+
+        self.frames_out += len(frames)
+        return frames
+
+    def flush(self) -> bytes:
+        """
+        Return the incomplete trailing frame (at end of audio).
+
+        Returns:
+            Remaining bytes, possibly empty
+        """
+        tail = bytes(self._staging_view[:self._pending])
+        self._pending = 0
+        return tail
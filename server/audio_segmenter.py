@@ -0,0 +1,114 @@
+"""
+Audio Segmenter
+Splits recorded audio at silence boundaries for parallel transcription
+"""
+
+from typing import List, NamedTuple
+import numpy as np
+from config import (
+    VAD_NOISE_MARGIN_DB,
+    TRANSCRIBE_MIN_SEGMENT_S,
+    TRANSCRIBE_MAX_SEGMENT_S,
+    TRANSCRIBE_MIN_SILENCE_MS,
+)
+
+# Analysis frame for level measurements
+FRAME_MS = 20
+
+
+class Segment(NamedTuple):
+    """A span of the recording (milliseconds from its start)."""
+
+    start_ms: int
+    end_ms: int
+
+    @property
+    def duration_ms(self) -> int:
+        return self.end_ms - self.start_ms
+
+
+def frame_levels_db(pcm: bytes, sample_rate: int = 16000, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """
+    Level of every full frame of a LINEAR16 recording.
+
+    Args:
+        pcm: Little-endian 16-bit mono PCM
+        sample_rate: Sample rate of the PCM
+        frame_ms: Frame length
+
+    Returns:
+        Array of frame levels in dBFS
+    """
+    frame_samples = sample_rate * frame_ms // 1000
+    samples = np.frombuffer(pcm, dtype="<i2")
+    frames = samples[: samples.size // frame_samples * frame_samples].reshape(-1, frame_samples)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20.0 * np.log10(rms / 32768.0 + 1e-9)
+
+
+def split_on_silence(
+    pcm: bytes,
+    sample_rate: int = 16000,
+    min_segment_s: float = TRANSCRIBE_MIN_SEGMENT_S,
+    max_segment_s: float = TRANSCRIBE_MAX_SEGMENT_S,
+    min_silence_ms: int = TRANSCRIBE_MIN_SILENCE_MS,
+) -> List[Segment]:
+    """
+    Cut a recording into segments that start and end in silence.
+
+    A segment is closed in the middle of the first pause of at least
+    ``min_silence_ms`` once it is ``min_segment_s`` long. If it reaches
+    ``max_segment_s`` without one, it is cut at its quietest frame after
+    the minimum length. Segments with no audio above the silence threshold
+    are left out.
+
+    Silence is judged relative to the recording: frames below its noise
+    floor (10th percentile of frame levels) plus VAD_NOISE_MARGIN_DB, but
+    never closer than that margin to the median level (recordings with
+    hardly any pauses have no usable floor).
+
+    Args:
+        pcm: Little-endian 16-bit mono PCM
+        sample_rate: Sample rate of the PCM
+        min_segment_s: Shortest segment that may be closed at a pause
+        max_segment_s: Longest segment
+        min_silence_ms: Shortest pause counted as a boundary
+
+    Returns:
+        Segments in order
+    """
+    levels = frame_levels_db(pcm, sample_rate)
+    total_ms = len(pcm) * 1000 // (sample_rate * 2)
+    if levels.size == 0:
+        return [Segment(0, total_ms)] if total_ms else []
+
+    noise_floor, median = np.percentile(levels, [10, 50])
+    silent = levels < min(noise_floor + VAD_NOISE_MARGIN_DB, median - VAD_NOISE_MARGIN_DB)
+    min_frames = max(1, int(min_segment_s * 1000 // FRAME_MS))
+    max_frames = max(min_frames + 1, int(max_segment_s * 1000 // FRAME_MS))
+    pause_frames = max(1, min_silence_ms // FRAME_MS)
+
+    # Frame index where each cut happens
+    cuts = [0]
+    start = 0
+    run = 0
+    for index in range(levels.size):
+        run = run + 1 if silent[index] else 0
+        length = index + 1 - start
+        if run >= pause_frames and length - run // 2 >= min_frames and (index + 1 == levels.size or not silent[index + 1]):
+            # End of a long enough pause: cut in its middle
+            start = index + 1 - run // 2
+            cuts.append(start)
+            run = 0
+        elif length >= max_frames:
+            window = levels[start + min_frames:index + 1]
+            start = start + min_frames + int(np.argmin(window)) + 1 if window.size else index + 1
+            cuts.append(start)
+            run = 0
+
+    segments = []
+    for begin, end in zip(cuts, cuts[1:] + [levels.size]):
+        if end > begin and not silent[begin:end].all():
+            end_ms = total_ms if end == levels.size else end * FRAME_MS
+            segments.append(Segment(begin * FRAME_MS, end_ms))
+    return segments
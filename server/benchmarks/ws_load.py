@@ -0,0 +1,369 @@
+"""
+WebSocket Load Generator
+Replays WAV/PCM audio over many concurrent sessions and reports latency percentiles
+
+Run the server against the mock recognizer to find its own ceiling:
+
+    STT_BACKEND=mock python main.py
+    python benchmarks/ws_load.py --sessions 100 --audio speech.wav --output report.json
+
+Every session streams the same audio (16kHz mono LINEAR16) in fixed frames,
+at real time or ``--speed`` times faster, with ``?trace=1`` so final results
+carry the server's timing of the audio that completed them.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import urllib.request
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 16000
+BYTES_PER_MS = SAMPLE_RATE * 2 // 1000
+
+
+def load_audio(path: Optional[str], synthetic_seconds: float) -> bytes:
+    """
+    Load the audio every session replays, as 16kHz mono LINEAR16.
+
+    Args:
+        path: WAV file (any rate / channel count, 16-bit) or raw 16kHz mono PCM
+        synthetic_seconds: Length of generated audio when no path is given
+
+    Returns:
+        LINEAR16 bytes
+    """
+    if path is None:
+        # Tone bursts over low noise, so VAD sees speech-like onsets
+        rng = np.random.default_rng(0)
+        t = np.arange(int(SAMPLE_RATE * synthetic_seconds)) / SAMPLE_RATE
+        bursts = (np.sin(2 * np.pi * 0.5 * t) > 0).astype(np.float32)
+        samples = 6000 * bursts * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 60, t.size)
+        return samples.astype("<i2").tobytes()
+
+    if Path(path).suffix.lower() != ".wav":
+        return Path(path).read_bytes()
+
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise SystemExit(f"{path}: only 16-bit WAV is supported")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, samples.size, rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(samples.size), samples)
+    return samples.astype("<i2").tobytes()
+
+
+def percentiles(values: List[float]) -> Optional[dict]:
+    """Nearest-rank p50/p95/p99 plus mean and max (None without samples)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "p50": round(rank(50), 1),
+        "p95": round(rank(95), 1),
+        "p99": round(rank(99), 1),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class SessionResult:
+    """What one simulated client observed."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.connected = False
+        self.completed = False
+        self.dropped: Optional[str] = None
+        self.time_to_first_interim: Optional[float] = None
+        # Client-side: final's audio reached the server -> final received; server-side: trace total_ms
+        self.final_latencies: List[float] = []
+        self.final_server_latencies: List[float] = []
+        # Client-side: final received -> translation_final received; server-side: latency_ms
+        self.translation_latencies: List[float] = []
+        self.translation_server_latencies: List[float] = []
+        self.interims = 0
+        self.finals = 0
+        self.translations = 0
+        self.errors = 0
+
+
+async def run_session(index: int, args: argparse.Namespace, audio: bytes, start_delay: float) -> SessionResult:
+    """Connect, stream the audio, and record results until the server closes."""
+    result = SessionResult(index)
+    await asyncio.sleep(start_delay)
+
+    url = f"{args.url.rstrip('/')}{args.endpoint}?trace=1"
+    frame_bytes = args.frame_ms * BYTES_PER_MS
+    first_sent_at: Optional[float] = None
+    final_received_at: Dict[int, float] = {}
+
+    async def send_audio(ws) -> None:
+        nonlocal first_sent_at
+        started = time.monotonic()
+        for loop in range(args.loops):
+            for offset in range(0, len(audio), frame_bytes):
+                frame = audio[offset:offset + frame_bytes]
+                sent_ms = (loop * len(audio) + offset + len(frame)) // BYTES_PER_MS
+                if args.speed > 0:
+                    delay = started + (sent_ms - args.frame_ms) / args.speed / 1000 - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await ws.send(frame)
+                now = time.monotonic()
+                if first_sent_at is None:
+                    first_sent_at = now
+                if args.speed <= 0:
+                    await asyncio.sleep(0)
+        # Empty message = end of audio
+        await ws.send(b"")
+
+    async def receive(ws) -> None:
+        async for raw in ws:
+            now = time.monotonic()
+            message = json.loads(raw)
+            kind = message.get("type")
+            if kind == "transcript":
+                if result.time_to_first_interim is None and first_sent_at is not None:
+                    result.time_to_first_interim = (now - first_sent_at) * 1000
+                if not message.get("is_final"):
+                    result.interims += 1
+                    continue
+                result.finals += 1
+                final_received_at[message.get("segment_id", result.finals)] = now
+                trace = message.get("trace")
+                if trace:
+                    # total_ms starts when the final's own audio reached the server, so it
+                    # holds under VAD or queue drops (trace.audio_position_ms counts only the
+                    # audio forwarded upstream and can't be matched to what was sent). The
+                    # downlink comes from the wall-clock sent_at; the uplink is not included.
+                    downlink_ms = max(0.0, time.time() * 1000 - trace["sent_at"])
+                    result.final_latencies.append(trace["total_ms"] + downlink_ms)
+                    result.final_server_latencies.append(trace["total_ms"])
+            elif kind == "translation_final" and message.get("is_final"):
+                result.translations += 1
+                final_at = final_received_at.get(message.get("segment_id"))
+                if final_at is not None:
+                    result.translation_latencies.append((now - final_at) * 1000)
+                if message.get("latency_ms") is not None:
+                    result.translation_server_latencies.append(message["latency_ms"])
+            elif kind == "error":
+                result.errors += 1
+                if message.get("code") == "server_busy":
+                    result.dropped = "server_busy"
+
+    try:
+        async with websockets.connect(url, max_size=None, open_timeout=args.connect_timeout) as ws:
+            result.connected = True
+            receiver = asyncio.create_task(receive(ws))
+            try:
+                await send_audio(ws)
+            except websockets.ConnectionClosed:
+                pass
+            try:
+                await asyncio.wait_for(receiver, args.drain_timeout)
+            except asyncio.TimeoutError:
+                result.dropped = result.dropped or "drain_timeout"
+        result.completed = result.dropped is None
+    except websockets.ConnectionClosedError as e:
+        result.dropped = result.dropped or f"closed_{e.code}"
+    except (OSError, asyncio.TimeoutError, websockets.InvalidHandshake) as e:
+        result.dropped = f"connect_failed: {type(e).__name__}"
+    return result
+
+
+class ServerSampler:
+    """Polls the server's /metrics for process CPU time and resident memory."""
+
+    def __init__(self, metrics_url: str, interval: float):
+        self.metrics_url = metrics_url
+        self.interval = interval
+        # (wall time, cpu seconds, rss bytes)
+        self.samples: List[tuple] = []
+
+    def _scrape(self) -> Optional[tuple]:
+        try:
+            with urllib.request.urlopen(self.metrics_url, timeout=2) as response:
+                text = response.read().decode()
+        except OSError:
+            return None
+        values = {}
+        for line in text.splitlines():
+            if line.startswith(("stt_process_cpu_seconds ", "stt_process_resident_memory_bytes ")):
+                name, value = line.split()
+                values[name] = float(value)
+        if len(values) < 2:
+            return None
+        return time.monotonic(), values["stt_process_cpu_seconds"], values["stt_process_resident_memory_bytes"]
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while True:
+            sample = await asyncio.to_thread(self._scrape)
+            if sample is not None:
+                self.samples.append(sample)
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+                break
+            except asyncio.TimeoutError:
+                pass
+        sample = await asyncio.to_thread(self._scrape)
+        if sample is not None:
+            self.samples.append(sample)
+
+    def summary(self) -> Optional[dict]:
+        if len(self.samples) < 2:
+            return None
+        usage = [
+            (cpu - prev_cpu) / (at - prev_at) * 100
+            for (prev_at, prev_cpu, _), (at, cpu, _) in zip(self.samples, self.samples[1:])
+            if at > prev_at
+        ]
+        (first_at, first_cpu, first_rss), (last_at, last_cpu, last_rss) = self.samples[0], self.samples[-1]
+        return {
+            "cpu_percent_avg": round((last_cpu - first_cpu) / (last_at - first_at) * 100, 1),
+            "cpu_percent_max": round(max(usage), 1) if usage else None,
+            "cpu_seconds": round(last_cpu - first_cpu, 2),
+            "rss_mb_start": round(first_rss / 2**20, 1),
+            "rss_mb_peak": round(max(rss for _, _, rss in self.samples) / 2**20, 1),
+            "rss_mb_end": round(last_rss / 2**20, 1),
+        }
+
+
+def build_report(args: argparse.Namespace, audio: bytes, results: List[SessionResult], server: Optional[dict], elapsed: float) -> dict:
+    """Aggregate session results into the JSON report."""
+    drop_reasons: Dict[str, int] = {}
+    for result in results:
+        if result.dropped:
+            drop_reasons[result.dropped] = drop_reasons.get(result.dropped, 0) + 1
+
+    def collect(attribute: str) -> List[float]:
+        values = []
+        for result in results:
+            value = getattr(result, attribute)
+            if isinstance(value, list):
+                values.extend(value)
+            elif value is not None:
+                values.append(value)
+        return values
+
+    return {
+        "label": args.label,
+        "started_at": int(time.time() - elapsed),
+        "elapsed_s": round(elapsed, 2),
+        "config": {
+            "url": args.url,
+            "endpoint": args.endpoint,
+            "sessions": args.sessions,
+            "ramp_up_s": args.ramp_up,
+            "frame_ms": args.frame_ms,
+            "speed": args.speed,
+            "audio_s": round(len(audio) / BYTES_PER_MS / 1000 * args.loops, 2),
+        },
+        "sessions": {
+            "connected": sum(result.connected for result in results),
+            "completed": sum(result.completed for result in results),
+            "dropped": sum(result.dropped is not None for result in results),
+            "drop_reasons": drop_reasons,
+        },
+        "latency_ms": {
+            "time_to_first_interim": percentiles(collect("time_to_first_interim")),
+            "final": percentiles(collect("final_latencies")),
+            "final_server": percentiles(collect("final_server_latencies")),
+            "translation": percentiles(collect("translation_latencies")),
+            "translation_server": percentiles(collect("translation_server_latencies")),
+        },
+        "results": {
+            "interim": sum(result.interims for result in results),
+            "final": sum(result.finals for result in results),
+            "translation": sum(result.translations for result in results),
+            "errors": sum(result.errors for result in results),
+        },
+        "server": server,
+    }
+
+
+def print_report(report: dict, baseline: Optional[dict]) -> None:
+    """Print a summary, with deltas against a previous report if given."""
+    sessions = report["sessions"]
+    print(
+        f"\n📊 {report['config']['sessions']} sessions on {report['config']['endpoint']}: "
+        f"{sessions['completed']} completed, {sessions['dropped']} dropped {sessions['drop_reasons'] or ''}"
+    )
+    print(f"{'latency (ms)':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'count':>8}")
+    for name, stats in report["latency_ms"].items():
+        if stats is None:
+            continue
+        line = f"{name:<24}{stats['p50']:>9}{stats['p95']:>9}{stats['p99']:>9}{stats['count']:>8}"
+        previous = (baseline or {}).get("latency_ms", {}).get(name)
+        if previous:
+            line += "   Δp50 {:+.1f}  Δp95 {:+.1f}  Δp99 {:+.1f}".format(
+                stats["p50"] - previous["p50"], stats["p95"] - previous["p95"], stats["p99"] - previous["p99"]
+            )
+        print(line)
+    if report["server"]:
+        server = report["server"]
+        print(
+            f"server: cpu avg {server['cpu_percent_avg']}% max {server['cpu_percent_max']}%, "
+            f"rss {server['rss_mb_start']} → peak {server['rss_mb_peak']} MB"
+        )
+
+
+async def main(args: argparse.Namespace) -> dict:
+    audio = load_audio(args.audio, args.synthetic_seconds)
+    metrics_url = args.url.replace("ws://", "http://").replace("wss://", "https://").rstrip("/") + "/metrics"
+    sampler = ServerSampler(metrics_url, args.sample_interval)
+    stop = asyncio.Event()
+    sampling = asyncio.create_task(sampler.run(stop))
+
+    started = time.monotonic()
+    spacing = args.ramp_up / args.sessions if args.sessions else 0
+    results = await asyncio.gather(
+        *(run_session(index, args, audio, index * spacing) for index in range(args.sessions))
+    )
+    elapsed = time.monotonic() - started
+    stop.set()
+    await sampling
+
+    return build_report(args, audio, list(results), sampler.summary(), elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent WebSocket load test for /ws/stt and /ws/stt-translate")
+    parser.add_argument("--url", default="ws://127.0.0.1:8000", help="Server base URL")
+    parser.add_argument("--endpoint", default="/ws/stt", choices=["/ws/stt", "/ws/stt-translate"])
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which sessions start")
+    parser.add_argument("--audio", help="WAV or raw 16kHz mono PCM file (synthetic audio if omitted)")
+    parser.add_argument("--synthetic-seconds", type=float, default=20.0, help="Length of synthetic audio")
+    parser.add_argument("--loops", type=int, default=1, help="Times each session replays the audio")
+    parser.add_argument("--frame-ms", type=int, default=50, help="Audio per WebSocket message")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed (1 = real time, 0 = unpaced)")
+    parser.add_argument("--connect-timeout", type=float, default=10.0)
+    parser.add_argument("--drain-timeout", type=float, default=15.0, help="Seconds to wait for results after the audio")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between /metrics scrapes")
+    parser.add_argument("--label", default="", help="Free-form run label stored in the report")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_report(report, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"💾 Report written to {args.output}")
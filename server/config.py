@@ -15,3 +15,137 @@ CORS_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+
+# Production launcher (python main.py --production): worker processes (0 = one per CPU)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 0))
+# Per-worker default executor threads (asyncio.to_thread) and native math library threads
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", 4))
+WORKER_NATIVE_THREADS = int(os.getenv("WORKER_NATIVE_THREADS", 1))
+# Seconds a stopping worker waits for sessions and jobs to finish
+WORKER_DRAIN_TIMEOUT = float(os.getenv("WORKER_DRAIN_TIMEOUT", 60.0))
+# Seconds before a worker is replaced and drained (0 disables recycling)
+WORKER_MAX_LIFETIME = float(os.getenv("WORKER_MAX_LIFETIME", 0.0))
+
+# Logging: level, "text" or "json", and records buffered before new ones are dropped
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Hot-path events (audio chunks, interim results) logged once per this many
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 20))
+
+# Attach a per-result latency breakdown to transcripts (clients can also ask with ?trace=1)
+LATENCY_TRACE_ENABLED = os.getenv("LATENCY_TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Recognizer backend: "google" (Cloud Speech-to-Text) or "mock" (local scripted server)
+STT_BACKEND = os.getenv("STT_BACKEND", "google")
+# host:port of a running mock_speech_server (empty starts one in-process per region),
+# or one address per region: "region=host:port,region=host:port"
+MOCK_STT_ADDRESS = os.getenv("MOCK_STT_ADDRESS", "")
+# Mock result timing: delay after the audio (± jitter), audio per interim and per final (ms)
+MOCK_STT_LATENCY_MS = int(os.getenv("MOCK_STT_LATENCY_MS", 300))
+MOCK_STT_JITTER_MS = int(os.getenv("MOCK_STT_JITTER_MS", 100))
+MOCK_STT_INTERIM_MS = int(os.getenv("MOCK_STT_INTERIM_MS", 500))
+MOCK_STT_UTTERANCE_MS = int(os.getenv("MOCK_STT_UTTERANCE_MS", 3000))
+# Mock failures: share of streams failing at random, duration limit and audio timeout (seconds)
+MOCK_STT_ERROR_RATE = float(os.getenv("MOCK_STT_ERROR_RATE", 0.0))
+MOCK_STT_MAX_STREAM_SECONDS = float(os.getenv("MOCK_STT_MAX_STREAM_SECONDS", 300.0))
+MOCK_STT_AUDIO_TIMEOUT = float(os.getenv("MOCK_STT_AUDIO_TIMEOUT", 10.0))
+# Text file with one mock utterance per line (built-in Korean sentences if empty)
+MOCK_STT_SCRIPT = os.getenv("MOCK_STT_SCRIPT", "")
+# Mock stream setup delay (ms), and per-region overrides of it and of the result latency
+# for in-process servers ("region=ms,region=ms")
+MOCK_STT_SETUP_MS = int(os.getenv("MOCK_STT_SETUP_MS", 0))
+MOCK_STT_REGION_SETUP_MS = os.getenv("MOCK_STT_REGION_SETUP_MS", "")
+MOCK_STT_REGION_LATENCY_MS = os.getenv("MOCK_STT_REGION_LATENCY_MS", "")
+
+# Recognizer regions new streams are routed between (the fastest healthy one is used)
+STT_REGIONS = [
+    region.strip()
+    for region in os.getenv("STT_REGIONS", os.getenv("STT_LOCATION", "asia-northeast1")).split(",")
+    if region.strip()
+]
+# Languages per region ("region=ko-KR|en-US,..."); regions not listed serve every language
+STT_REGION_LANGUAGES = os.getenv("STT_REGION_LANGUAGES", "")
+# Seconds between region probes and seconds a probe may take
+STT_REGION_PROBE_INTERVAL = float(os.getenv("STT_REGION_PROBE_INTERVAL", 30.0))
+STT_REGION_PROBE_TIMEOUT = float(os.getenv("STT_REGION_PROBE_TIMEOUT", 5.0))
+# Consecutive probe or stream outages after which a region is skipped
+STT_REGION_MAX_FAILURES = int(os.getenv("STT_REGION_MAX_FAILURES", 3))
+
+# Pre-warmed streaming_recognize sessions (0 disables the pool)
+STT_POOL_SIZE = int(os.getenv("STT_POOL_SIZE", 2))
+# Seconds an unclaimed stream may idle before it is recycled (keep below Google's audio timeout)
+STT_POOL_TTL = float(os.getenv("STT_POOL_TTL", 8.0))
+
+# Session admission (concurrent WebSocket sessions per process)
+STT_MAX_SESSIONS = int(os.getenv("STT_MAX_SESSIONS", 64))
+# Sessions allowed to wait for a free slot before new ones are rejected
+STT_ADMISSION_QUEUE = int(os.getenv("STT_ADMISSION_QUEUE", 32))
+# Seconds a waiting session may queue before it is rejected as busy
+STT_ADMISSION_TIMEOUT = float(os.getenv("STT_ADMISSION_TIMEOUT", 5.0))
+
+# Seconds a dropped WebSocket session is kept for a reconnect with its token (0 disables).
+# The session holds its slot meanwhile; a recognizer stream that times out without audio is
+# reopened on the next audio. Sessions live in one process, so the launcher turns resumption
+# off when it runs more than one worker
+SESSION_RESUME_GRACE_S = float(os.getenv("SESSION_RESUME_GRACE_S", 30.0))
+# Messages (finals, translations) held for replay while a session is detached
+SESSION_RESUME_MAX_PENDING = int(os.getenv("SESSION_RESUME_MAX_PENDING", 200))
+
+# Voice activity gating of upstream audio
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() in ("1", "true", "yes")
+# Absolute speech level threshold (dBFS)
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", -45.0))
+# Required level above the adaptive noise floor (dB)
+VAD_NOISE_MARGIN_DB = float(os.getenv("VAD_NOISE_MARGIN_DB", 10.0))
+# Maximum zero-crossing rate (crossings per sample) for a speech onset
+VAD_ZCR_MAX = float(os.getenv("VAD_ZCR_MAX", 0.35))
+# Audio still sent after the last speech chunk (ms)
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", 600))
+# Audio sent from before a speech onset (ms)
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", 300))
+
+# Offline file transcription: segments transcribed at once across all requests
+TRANSCRIBE_MAX_PARALLEL = int(os.getenv("TRANSCRIBE_MAX_PARALLEL", 8))
+# Segments are cut at the first pause of TRANSCRIBE_MIN_SILENCE_MS after
+# TRANSCRIBE_MIN_SEGMENT_S, and at TRANSCRIBE_MAX_SEGMENT_S at the latest
+TRANSCRIBE_MIN_SEGMENT_S = float(os.getenv("TRANSCRIBE_MIN_SEGMENT_S", 15.0))
+TRANSCRIBE_MAX_SEGMENT_S = float(os.getenv("TRANSCRIBE_MAX_SEGMENT_S", 50.0))
+TRANSCRIBE_MIN_SILENCE_MS = int(os.getenv("TRANSCRIBE_MIN_SILENCE_MS", 300))
+# Longest file POST /transcribe answers directly (longer ones go through /jobs)
+TRANSCRIBE_SYNC_MAX_S = float(os.getenv("TRANSCRIBE_SYNC_MAX_S", 120.0))
+TRANSCRIBE_MAX_UPLOAD_MB = int(os.getenv("TRANSCRIBE_MAX_UPLOAD_MB", 200))
+# Unfinished jobs accepted at once, and seconds finished jobs stay available
+TRANSCRIBE_MAX_JOBS = int(os.getenv("TRANSCRIBE_MAX_JOBS", 16))
+TRANSCRIBE_JOB_TTL = float(os.getenv("TRANSCRIBE_JOB_TTL", 3600.0))
+
+# Per-session audio queue: budget in ms of audio, overflow policy (pause, drop_oldest
+# or merge) and the shares of the budget where clients are told to slow down / resume
+AUDIO_QUEUE_MAX_MS = int(os.getenv("AUDIO_QUEUE_MAX_MS", 10000))
+AUDIO_QUEUE_POLICY = os.getenv("AUDIO_QUEUE_POLICY", "pause").lower()
+AUDIO_QUEUE_HIGH_WATER = float(os.getenv("AUDIO_QUEUE_HIGH_WATER", 0.75))
+AUDIO_QUEUE_LOW_WATER = float(os.getenv("AUDIO_QUEUE_LOW_WATER", 0.25))
+
+# Items that may wait between two stages of a session pipeline (client audio chunks, results, messages)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 32))
+
+# Sessions that may send container audio (Ogg/WebM Opus, FLAC) decoded server-side at once
+AUDIO_DECODE_WORKERS = int(os.getenv("AUDIO_DECODE_WORKERS", 8))
+
+# Process-wide translation cache
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", 10000))
+TRANSLATION_CACHE_MAX_BYTES = int(os.getenv("TRANSLATION_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+# Seconds a cached translation stays valid
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", 3600.0))
+
+# Shared Gemini clients: number of clients and max concurrent requests across them
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", 2))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 32))
+
+# Cross-session batching of final-segment translations
+TRANSLATION_BATCH_ENABLED = os.getenv("TRANSLATION_BATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+# Time a batch stays open for more segments (ms) and segments that flush it early
+TRANSLATION_BATCH_WINDOW_MS = int(os.getenv("TRANSLATION_BATCH_WINDOW_MS", 30))
+TRANSLATION_BATCH_MAX_SIZE = int(os.getenv("TRANSLATION_BATCH_MAX_SIZE", 16))
+# Seconds a batched request may take before its segments fall back to single requests
+TRANSLATION_BATCH_DEADLINE = float(os.getenv("TRANSLATION_BATCH_DEADLINE", 5.0))
@@ -3,15 +3,309 @@ API Endpoints and WebSocket Handlers
 """
 
 import asyncio
-import queue
-import time
-from fastapi import WebSocket, WebSocketDisconnect, APIRouter
-from stt_service import STTStreamingService
-from translation_service import TranslationService
+import os
+import threading
+from typing import Awaitable, Callable, List, Optional
+from fastapi import WebSocket, APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+from config import (
+    AUDIO_QUEUE_HIGH_WATER,
+    AUDIO_QUEUE_LOW_WATER,
+    AUDIO_QUEUE_MAX_MS,
+    AUDIO_QUEUE_POLICY,
+    LATENCY_TRACE_ENABLED,
+    TRANSCRIBE_MAX_UPLOAD_MB,
+    TRANSCRIBE_SYNC_MAX_S,
+    TRANSLATION_BATCH_ENABLED,
+)
+from logger import ContextLogger, get_logger
+import metrics
+from metrics import (
+    ERRORS,
+    FLOW_CONTROL_MESSAGES,
+    render_metrics,
+)
+from audio_bridge import AudioBridge
+from audio_codecs import (
+    LINEAR16,
+    AudioFormat,
+    AudioInput,
+    UnsupportedCodecError,
+    decode_file,
+    get_audio_decoder_pool,
+    negotiate_audio,
+)
+from latency_trace import LatencyTrace
+from message_codec import MessageCodec, negotiate_codec
+from stt_service import (
+    STTStreamingService,
+    ROLLOVER_REPLAY_MS,
+)
+from stream_pool import get_stream_pool
+from stream_pipeline import Stage, StreamPipeline
+from session_scheduler import ServerBusyError, get_session_scheduler
+from session_resume import ResumableSession, get_session_resume_registry
+from session_stages import (
+    AudioStage,
+    IngestStage,
+    RecognizeStage,
+    SendStage,
+    SessionContext,
+    TranscriptStage,
+    TranslateStage,
+)
+from translation_service import get_translation_service
+from translation_cache import get_translation_cache
+from translation_batcher import get_translation_batcher
+from file_transcriber import TooManyJobsError, get_file_transcriber
 
 # Create router
 router = APIRouter()
 
+logger = get_logger("endpoints")
+
+# Pre-warmed Google streams shared by all connections
+stream_pool = get_stream_pool()
+
+# Admission control for concurrent sessions
+session_scheduler = get_session_scheduler()
+
+# Dropped sessions waiting for their client to reconnect
+session_registry = get_session_resume_registry()
+
+
+def _stream_threads() -> dict:
+    """Blocking stream threads: all of them, and those parked in the pool."""
+    total = sum(1 for thread in threading.enumerate() if thread.name == "stt-stream")
+    return {("total",): total, ("pooled",): stream_pool.idle}
+
+
+# Gauges are read from their owners when /metrics is scraped
+metrics.ACTIVE_SESSIONS.set_callback(
+    lambda: {(endpoint,): count for endpoint, count in session_scheduler.active_by_endpoint().items()}
+)
+metrics.QUEUED_SESSIONS.set_callback(lambda: {(): session_scheduler.queued})
+metrics.STREAM_THREADS.set_callback(_stream_threads)
+metrics.PROCESS_THREADS.set_callback(lambda: {(): threading.active_count()})
+metrics.AUDIO_DECODERS.set_callback(lambda: {(): get_audio_decoder_pool().active})
+metrics.AUDIO_QUEUE_BYTES.set_callback(
+    lambda: {(): sum(session.get("audio_queue", {}).get("buffered_bytes", 0) for session in session_scheduler.sessions())}
+)
+metrics.AUDIO_QUEUE_THROTTLED.set_callback(
+    lambda: {(): sum(session.get("audio_queue", {}).get("throttled", False) for session in session_scheduler.sessions())}
+)
+
+
+async def _admit_session(websocket: WebSocket, endpoint: str, codec: MessageCodec):
+    """
+    Reserve a session slot, or tell the client the server is busy.
+
+    Returns:
+        SessionSlot, or None if the session was rejected and the socket closed
+    """
+    try:
+        return await session_scheduler.admit(endpoint)
+    except ServerBusyError as e:
+        ERRORS.inc(category="session_rejected")
+        logger.warning("🚫 Session rejected", endpoint=endpoint, reason=str(e))
+        # 1013 = Try Again Later
+        await _reject(websocket, codec, "server_busy", str(e), 1013)
+        return None
+
+
+async def _reject(websocket: WebSocket, codec: MessageCodec, code: str, message: str, close_code: int) -> None:
+    """Send an error with a machine-readable code and close the socket."""
+    try:
+        await codec.send(
+            websocket,
+            {
+                "type": "error",
+                "code": code,
+                "message": message,
+            }
+        )
+        await websocket.close(code=close_code)
+    except Exception:
+        pass
+
+
+async def _resume_session(websocket: WebSocket, codec: MessageCodec, endpoint: str) -> bool:
+    """
+    Reattach a reconnect that presents ``?resume=<token>`` to its session.
+
+    The session's own handler keeps serving it; this connection only lends
+    its socket and waits until the session is done with it.
+
+    Returns:
+        True if the connection resumed a session (the handler is finished),
+        False if it should start a new one
+    """
+    token = websocket.query_params.get("resume")
+    if not token:
+        return False
+    session = session_registry.claim(token, endpoint)
+    if session is None:
+        logger.info("🔁 Unknown or expired session token, starting a new session", endpoint=endpoint)
+        return False
+    try:
+        released = await session.attach(websocket, codec)
+    except Exception as e:
+        session.log.warning("⚠️ Resume failed", error=e)
+        return True
+    await released.wait()
+    return True
+
+
+async def _negotiate_audio(websocket: WebSocket, codec: MessageCodec, log: ContextLogger) -> Optional[AudioInput]:
+    """
+    Read the client's audio codec, or tell the client it can't be used.
+
+    Returns:
+        AudioInput, or None if the codec was rejected and the socket closed
+    """
+    try:
+        return negotiate_audio(websocket)
+    except UnsupportedCodecError as e:
+        ERRORS.inc(category="unsupported_codec")
+        log.warning("🚫 Unsupported audio codec", reason=str(e))
+        # 1003 = Unsupported Data
+        await _reject(websocket, codec, "unsupported_codec", str(e), 1003)
+        return None
+
+
+def _create_audio_bridge(websocket: WebSocket, audio_format: AudioFormat) -> AudioBridge:
+    """Build the queue of audio waiting for the recognizer, for the session's negotiated format."""
+    # Keep recent audio so stream rollovers can replay it; bound what may
+    # pile up while the upstream stream stalls or restarts
+    return AudioBridge(
+        history_bytes=ROLLOVER_REPLAY_MS * audio_format.bytes_per_ms,
+        trace=LatencyTrace() if _trace_requested(websocket) else None,
+        max_bytes=AUDIO_QUEUE_MAX_MS * audio_format.bytes_per_ms,
+        policy=AUDIO_QUEUE_POLICY,
+        high_water=AUDIO_QUEUE_HIGH_WATER,
+        low_water=AUDIO_QUEUE_LOW_WATER,
+    )
+
+
+async def _send_flow_control(
+    session: ResumableSession, audio_bridge: AudioBridge, bytes_per_ms: int, log: ContextLogger
+) -> None:
+    """Tell the client to slow down / resume as the session's audio queue crosses its watermarks."""
+    throttled = False
+    while not audio_bridge.closed:
+        throttled_now = await audio_bridge.wait_flow_change(throttled)
+        if throttled_now == throttled:
+            return
+        throttled = throttled_now
+        action = "slow_down" if throttled else "resume"
+        FLOW_CONTROL_MESSAGES.inc(action=action)
+        log.info("🚦 Flow control", action=action, buffered_ms=audio_bridge.buffered_bytes // bytes_per_ms)
+        try:
+            await session.send(
+                {
+                    "type": "flow_control",
+                    "action": action,
+                    "buffered_ms": audio_bridge.buffered_bytes // bytes_per_ms,
+                    "policy": audio_bridge.policy,
+                },
+                replay=False,
+            )
+        except Exception:
+            return
+
+
+def _trace_requested(websocket: WebSocket) -> bool:
+    """Check if transcripts should carry a latency breakdown for this connection."""
+    requested = websocket.query_params.get("trace", "").lower() in ("1", "true", "yes")
+    return LATENCY_TRACE_ENABLED or requested
+
+
+async def _serve_session(
+    websocket: WebSocket,
+    codec: MessageCodec,
+    endpoint: str,
+    define_pipeline: Callable[[SessionContext], Awaitable[List[Stage]]],
+) -> None:
+    """
+    Run an accepted streaming connection: resume or admit it, then run its pipeline.
+
+    Args:
+        websocket: Accepted socket
+        codec: Negotiated message encoding
+        endpoint: Endpoint path
+        define_pipeline: Coroutine function returning the session's stages
+    """
+    if await _resume_session(websocket, codec, endpoint):
+        return
+
+    slot = await _admit_session(websocket, endpoint, codec)
+    if slot is None:
+        return
+    log = logger.bind(session=slot.session_id, endpoint=endpoint)
+
+    audio_input = await _negotiate_audio(websocket, codec, log)
+    if audio_input is None:
+        slot.release()
+        return
+
+    session = session_registry.create(endpoint, websocket, codec, log)
+    context = SessionContext(
+        endpoint, slot, log, session, audio_input, _create_audio_bridge(websocket, audio_input.format)
+    )
+    try:
+        pipeline = StreamPipeline(await define_pipeline(context), endpoint, log)
+        await pipeline.open()
+    except ServerBusyError as e:
+        ERRORS.inc(category="session_rejected")
+        log.warning("🚫 Session rejected", reason=str(e))
+        await _reject(websocket, codec, "server_busy", str(e), 1013)
+        slot.release()
+        await session.close()
+        return
+    except Exception:
+        slot.release()
+        await session.close()
+        raise
+    slot.add_stats("pipeline", pipeline.stats)
+    log.info("🎚️ Audio codec", codec=audio_input.codec, upstream=audio_input.format.encoding)
+    if session.resumable:
+        await session.send(session.describe(), replay=False)
+
+    flow_control = asyncio.create_task(
+        _send_flow_control(session, context.audio_bridge, audio_input.format.bytes_per_ms, log)
+    )
+    try:
+        await pipeline.run()
+    except Exception as e:
+        ERRORS.inc(category="websocket")
+        log.error("❌ WebSocket error", error=e)
+    finally:
+        flow_control.cancel()
+        slot.release()
+        await session.close()
+        log.info("👋 WebSocket connection closed")
+
+
+async def _stt_pipeline(context: SessionContext) -> List[Stage]:
+    return [
+        IngestStage(context),
+        AudioStage(context),
+        RecognizeStage(context),
+        TranscriptStage(),
+        SendStage(context),
+    ]
+
+
+async def _stt_translate_pipeline(context: SessionContext) -> List[Stage]:
+    return [
+        IngestStage(context),
+        AudioStage(context),
+        RecognizeStage(context),
+        TranscriptStage(segments=True),
+        await TranslateStage.create(context),
+        SendStage(context),
+    ]
+
 
 @router.get("/")
 async def root():
@@ -26,7 +320,122 @@ async def root():
 @router.get("/health")
 async def health():
     """Health check for monitoring."""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "pid": os.getpid(),
+        "sessions": {
+            "active": session_scheduler.active,
+            "queued": session_scheduler.queued,
+            "max": session_scheduler.max_sessions,
+        },
+        "audio_decoders": get_audio_decoder_pool().stats(),
+        "recognizer": STTStreamingService.get_router().stats(),
+        "session_resume": session_registry.stats(),
+        "transcription": get_file_transcriber().stats(),
+        "translation": {
+            "cache": get_translation_cache().stats(),
+            "gemini_pool": (await get_translation_service()).client_pool.stats(),
+            "batching": (await get_translation_batcher()).stats() if TRANSLATION_BATCH_ENABLED else None,
+        },
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text-format metrics."""
+    # Creates the shared translation service so its pool gauges are registered
+    await get_translation_service()
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/sessions")
+async def sessions():
+    """Per-session slot accounting (streams opened, VAD counters, ...)."""
+    return {"sessions": session_scheduler.sessions()}
+
+
+async def _read_upload(file: UploadFile, codec: Optional[str], sample_rate: Optional[int]) -> bytes:
+    """Read an uploaded recording and decode it to 16 kHz LINEAR16 (HTTP errors on failure)."""
+    limit = TRANSCRIBE_MAX_UPLOAD_MB * 1024 * 1024
+    data = await file.read(limit + 1)
+    if len(data) > limit:
+        raise HTTPException(413, f"File exceeds {TRANSCRIBE_MAX_UPLOAD_MB} MB")
+    try:
+        # Decoding an hour of audio takes a while; keep it off the event loop
+        return await asyncio.to_thread(decode_file, data, codec, sample_rate)
+    except UnsupportedCodecError as e:
+        raise HTTPException(415, str(e))
+
+
+@router.post("/transcribe")
+async def transcribe_file(
+    file: UploadFile = File(...),
+    translate: bool = False,
+    codec: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+):
+    """
+    Transcribe a short recording and return the result directly.
+
+    The file may be WAV, Ogg/WebM Opus, FLAC, MP3, ... (``?codec=`` and
+    ``&sample_rate=`` for headerless linear16/mulaw/alaw). Recordings longer
+    than TRANSCRIBE_SYNC_MAX_S must go through ``POST /jobs``.
+
+    Returns:
+    {
+        "duration_ms": 63000,
+        "transcript": "stitched final results",
+        "segments": [
+            {"start_ms": 0, "end_ms": 4200, "transcript": "...", "confidence": 0.93,
+             "translation": "..."}   // translation only with ?translate=true
+        ],
+        "failed_segments": 0
+    }
+    """
+    pcm = await _read_upload(file, codec, sample_rate)
+    if len(pcm) > TRANSCRIBE_SYNC_MAX_S * 1000 * LINEAR16.bytes_per_ms:
+        raise HTTPException(413, f"Recordings over {TRANSCRIBE_SYNC_MAX_S:.0f}s must use POST /jobs")
+    return await get_file_transcriber().transcribe(pcm, translate)
+
+
+@router.post("/jobs", status_code=202)
+async def create_transcription_job(
+    file: UploadFile = File(...),
+    translate: bool = False,
+    codec: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+):
+    """
+    Start transcribing a recording of any length in the background.
+
+    Poll ``GET /jobs/{job_id}`` for progress; the result (same shape as
+    ``POST /transcribe``) is included once the status is "completed".
+    """
+    pcm = await _read_upload(file, codec, sample_rate)
+    try:
+        job = get_file_transcriber().submit(pcm, translate)
+    except TooManyJobsError as e:
+        raise HTTPException(429, str(e))
+    logger.info("📼 Transcription job queued", job=job.job_id, duration_s=job.duration_ms // 1000)
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}")
+async def get_transcription_job(job_id: str):
+    """Job status and progress (queued, running, translating, completed, failed, cancelled)."""
+    job = get_file_transcriber().get_job(job_id)
+    if job is None:
+        raise HTTPException(404, "Unknown job")
+    return job.to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_transcription_job(job_id: str):
+    """Cancel a job that has not finished."""
+    job = get_file_transcriber().cancel_job(job_id)
+    if job is None:
+        raise HTTPException(404, "Unknown job")
+    return {"job_id": job.job_id, "status": job.status if job.finished else "cancelling"}
 
 
 @router.websocket("/ws/stt")
@@ -34,8 +443,12 @@ async def websocket_stt_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time speech-to-text streaming.
 
-    Client sends: Binary audio chunks (16kHz, mono, LINEAR16)
-    Server sends: JSON with transcription results
+    Client sends: Binary audio chunks (16kHz, mono, LINEAR16 by default;
+    ?codec=mulaw|alaw[&sample_rate=8000] is passed through to Google,
+    ?codec=ogg_opus|webm_opus|flac is decoded server-side)
+    Server sends: JSON with transcription results (MessagePack maps in
+    binary frames if negotiated with the ``stt.msgpack`` subprotocol or
+    ``?encoding=msgpack``; same fields either way)
 
     Message format from server:
     {
@@ -46,185 +459,48 @@ async def websocket_stt_endpoint(websocket: WebSocket):
         "confidence": 0.95   // only for final results
     }
 
+    With LATENCY_TRACE_ENABLED or ?trace=1, transcripts also carry:
+        "trace": {
+            "audio_position_ms": 5230,  // session audio clock at the result's end
+            "queued_ms": 12.0,          // server arrival -> handed upstream
+            "upstream_ms": 410.5,       // handed upstream -> result received
+            "server_ms": 0.8,           // result received -> sent to client
+            "total_ms": 423.3,          // server arrival -> sent to client
+            "sent_at": 1700000000000    // wall-clock send time (epoch ms)
+        }
+
+    Flow control, when the session's audio queue passes AUDIO_QUEUE_HIGH_WATER
+    of its budget (upstream stalled or restarting) and again once it drains:
+    {
+        "type": "flow_control",
+        "action": "slow_down" | "resume",
+        "buffered_ms": 7600,
+        "policy": "pause"    // pause: the server stops reading until resume
+    }
+
+    Session resumption (SESSION_RESUME_GRACE_S > 0): the first message is
+    {
+        "type": "session",
+        "token": "vgDvL4vck0AL_8tvJhZpJw",
+        "resumed": false,
+        "resume_grace_s": 30.0
+    }
+    If the connection drops (anything but a 1000 close), the session waits
+    that long for a reconnect with ?resume=<token>. The reconnect gets the
+    session message with "resumed": true, then the finals and the latest
+    interim it missed, each with "replayed": true. A reconnect also takes
+    over a socket the server still has open (closed with 4001).
+
     or error:
     {
         "type": "error",
         "message": "error description"
     }
     """
-    await websocket.accept()
-    print(f"\n{'*'*80}", flush=True)
-    print("✅ WebSocket client connected - 실시간 음성 인식 시작", flush=True)
-    print(f"{'*'*80}\n", flush=True)
-
-    # Initialize STT service
-    stt_service = STTStreamingService()
-    audio_queue = queue.Queue()
-
-    # Flag to control tasks
-    receiving = True
-
-    async def receive_audio():
-        """Receive audio chunks from client and put in queue."""
-        nonlocal receiving
-        chunk_count = 0
-        try:
-            while receiving:
-                # Receive binary audio data
-                data = await websocket.receive_bytes()
-
-                if data:
-                    audio_queue.put(data)
-                    chunk_count += 1
-                    # Log every 20 chunks for better visibility
-                    if chunk_count % 20 == 0:
-                        print(
-                            f"🎵 Received {chunk_count} audio chunks ({len(data)} bytes)",
-                            flush=True,
-                        )
-                else:
-                    # Empty data signals end
-                    audio_queue.put(None)
-                    break
-
-        except WebSocketDisconnect:
-            print("🔌 Client disconnected")
-            receiving = False
-            audio_queue.put(None)  # Signal end of stream
-        except Exception as e:
-            print(f"❌ Error receiving audio: {e}")
-            receiving = False
-            audio_queue.put(None)
-
-    async def send_transcripts():
-        """Process audio through STT and send results to client."""
-        nonlocal stt_service
-        restart_count = 0
-        max_restarts = 100  # Allow up to 100 restarts (500 minutes total)
-        audio_received_in_session = False  # Track if we received audio in current session
-        stop_event = asyncio.Event()  # Used to stop generator on restart
-        
-        while receiving and restart_count < max_restarts:
-            try:
-                # Wait for first audio chunk before starting Google Cloud stream
-                print(f"\n⏳ 오디오 대기 중... (session {restart_count + 1})")
-                while receiving and audio_queue.empty():
-                    await asyncio.sleep(0.1)
-                
-                if not receiving:
-                    break
-                    
-                audio_received_in_session = True
-                stop_event.clear()
-                print(f"\n🔄 Starting STT stream (session {restart_count + 1})")
-                
-                async for result in stt_service.stream_recognize(audio_queue, stop_event):
-                    if not receiving:
-                        stop_event.set()
-                        break
-
-                    # Check if it's an error
-                    if "error" in result:
-                        error_msg = result.get("error", "")
-                        # Check if it's the 5-minute limit error
-                        if "5 minutes" in error_msg or "Max duration" in error_msg:
-                            print(f"\n⚠️ Stream limit reached, will restart...")
-                            break  # Break to restart
-                        
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "message": error_msg,
-                                "timestamp": result.get("timestamp", 0),
-                            }
-                        )
-                        continue
-
-                    # Send both interim and final results
-                    is_final = result.get("is_final", False)
-                    timestamp_str = time.strftime("%H:%M:%S")
-
-                    message = {
-                        "type": "transcript",
-                        "transcript": result["transcript"],
-                        "is_final": is_final,
-                        "timestamp": result["timestamp"],
-                    }
-
-                    # Add confidence if available (usually only for final results)
-                    if "confidence" in result:
-                        message["confidence"] = result["confidence"]
-
-                    # Send to client
-                    await websocket.send_json(message)
-
-                    # Logging
-                    marker = "✅" if is_final else "💬"
-                    status = "final" if is_final else "interim"
-                    print(f"[{timestamp_str}] {marker} → 클라이언트 전송 ({status}): {result['transcript'][:50]}", flush=True)
-
-                # Stream ended - only restart if we had actual audio (4-min limit case)
-                # Don't restart on timeout due to no audio
-                if receiving and not audio_queue.empty():
-                    restart_count += 1
-                    print(f"\n🔄 Restarting STT stream (attempt {restart_count})...")
-                    stt_service = STTStreamingService()  # Create new service instance
-                    audio_received_in_session = False
-                    await asyncio.sleep(0.1)  # Brief pause before restart
-                elif receiving:
-                    # No audio in queue - go back to waiting mode instead of restarting
-                    print(f"\n⏸️ STT 스트림 종료 - 오디오 대기 모드로 전환")
-                    audio_received_in_session = False
-                    # Don't increment restart_count, just loop back to wait for audio
-                    stt_service = STTStreamingService()
-                    
-            except Exception as e:
-                error_str = str(e)
-                print(f"❌ Error in send_transcripts: {e}")
-                
-                # Check if it's a timeout error (no audio case)
-                if "409" in error_str or "timed out" in error_str.lower():
-                    # Don't restart on timeout - go back to waiting mode
-                    print(f"\n⏸️ 타임아웃 - 오디오 대기 모드로 전환")
-                    stt_service = STTStreamingService()
-                    audio_received_in_session = False
-                    continue
-                
-                # Check if it's a restart-able error
-                if "5 minutes" in error_str or "Max duration" in error_str:
-                    restart_count += 1
-                    print(f"\n🔄 Restarting after timeout (attempt {restart_count})...")
-                    stt_service = STTStreamingService()
-                    await asyncio.sleep(0.1)
-                    continue
-                
-                if receiving:
-                    try:
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "message": str(e),
-                            }
-                        )
-                    except Exception:
-                        pass
-                break  # Exit on non-restartable errors
-
-    # Run both tasks concurrently
-    try:
-        await asyncio.gather(
-            receive_audio(),
-            send_transcripts(),
-        )
-    except Exception as e:
-        print(f"❌ WebSocket error: {e}")
-    finally:
-        receiving = False
-        try:
-            await websocket.close()
-        except Exception:
-            pass
-        print("👋 WebSocket connection closed")
+    codec, subprotocol = negotiate_codec(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    logger.info("✅ WebSocket client connected - 실시간 음성 인식 시작", endpoint="/ws/stt")
+    await _serve_session(websocket, codec, "/ws/stt", _stt_pipeline)
 
 
 @router.websocket("/ws/stt-translate")
@@ -232,203 +508,64 @@ async def websocket_stt_translate_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time speech-to-text with translation.
 
-    Client sends: Binary audio chunks (16kHz, mono, LINEAR16)
-    Server sends: JSON with transcription and translation results
+    Client sends: Binary audio chunks (16kHz, mono, LINEAR16 by default;
+    other codecs are negotiated with ?codec= as for /ws/stt)
+    Server sends: JSON with transcription results as soon as they are
+    recognized, followed by translations that arrive independently
+    (MessagePack instead of JSON if negotiated, as for /ws/stt)
 
     Message format from server:
     {
         "type": "transcript",
+        "segment_id": 3,     // increments after every final result
         "transcript": "recognized Korean text",
-        "translation": "translated English text",
         "is_final": true/false,
         "timestamp": 12345,
         "confidence": 0.95
     }
 
+    With LATENCY_TRACE_ENABLED or ?trace=1, transcripts also carry:
+        "trace": {
+            "audio_position_ms": 5230,  // session audio clock at the result's end
+            "queued_ms": 12.0,          // server arrival -> handed upstream
+            "upstream_ms": 410.5,       // handed upstream -> result received
+            "server_ms": 0.8,           // result received -> sent to client
+            "total_ms": 423.3,          // server arrival -> sent to client
+            "sent_at": 1700000000000    // wall-clock send time (epoch ms)
+        }
+    (translation latency is reported by the translation_final message)
+
+    Translation follow-ups, streamed as Gemini generates them (interim
+    translations superseded by a newer result are dropped; finals are
+    always translated):
+    {
+        "type": "translation_delta",
+        "segment_id": 3,
+        "is_final": true/false,
+        "sequence": 0,       // 0, 1, 2, ... per segment
+        "delta": "translated "
+    }
+    {
+        "type": "translation_final",
+        "segment_id": 3,
+        "is_final": true/false,
+        "sequence": 2,       // number of deltas sent before it
+        "transcript": "recognized Korean text",
+        "translation": "translated English text",
+        "first_token_ms": 180,
+        "latency_ms": 420
+    }
+
+    Flow control and session resumption as for /ws/stt (translation_final
+    messages are replayed too).
+
     or error:
     {
         "type": "error",
         "message": "error description"
     }
     """
-    await websocket.accept()
-    print(f"\n{'*'*80}", flush=True)
-    print("✅ WebSocket client connected - 실시간 음성 인식 + 번역 시작", flush=True)
-    print(f"{'*'*80}\n", flush=True)
-
-    # Initialize services
-    stt_service = STTStreamingService()
-    translation_service = TranslationService()
-    audio_queue = queue.Queue()
-
-    # Connect to translation service
-    await translation_service.connect()
-
-    # Flag to control tasks
-    receiving = True
-
-    async def receive_audio():
-        """Receive audio chunks from client and put in queue."""
-        nonlocal receiving
-        chunk_count = 0
-        try:
-            while receiving:
-                data = await websocket.receive_bytes()
-
-                if data:
-                    audio_queue.put(data)
-                    chunk_count += 1
-                    if chunk_count % 20 == 0:
-                        print(
-                            f"🎵 Received {chunk_count} audio chunks ({len(data)} bytes)",
-                            flush=True,
-                        )
-                else:
-                    audio_queue.put(None)
-                    break
-
-        except WebSocketDisconnect:
-            print("🔌 Client disconnected")
-            receiving = False
-            audio_queue.put(None)
-        except Exception as e:
-            print(f"❌ Error receiving audio: {e}")
-            receiving = False
-            audio_queue.put(None)
-
-    async def send_transcripts_with_translation():
-        """Process audio through STT, translate, and send results to client."""
-        nonlocal stt_service
-        restart_count = 0
-        max_restarts = 100
-        audio_received_in_session = False
-        stop_event = asyncio.Event()
-
-        while receiving and restart_count < max_restarts:
-            try:
-                # Wait for first audio chunk before starting Google Cloud stream
-                print(f"\n⏳ 오디오 대기 중... (session {restart_count + 1})")
-                while receiving and audio_queue.empty():
-                    await asyncio.sleep(0.1)
-                
-                if not receiving:
-                    break
-                    
-                audio_received_in_session = True
-                stop_event.clear()
-                print(f"\n🔄 Starting STT+Translation stream (session {restart_count + 1})")
-
-                async for result in stt_service.stream_recognize(audio_queue, stop_event):
-                    if not receiving:
-                        stop_event.set()
-                        break
-
-                    # Check if it's an error
-                    if "error" in result:
-                        error_msg = result.get("error", "")
-                        if "5 minutes" in error_msg or "Max duration" in error_msg:
-                            print(f"\n⚠️ Stream limit reached, will restart...")
-                            break
-
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "message": error_msg,
-                                "timestamp": result.get("timestamp", 0),
-                            }
-                        )
-                        continue
-
-                    is_final = result.get("is_final", False)
-                    transcript = result["transcript"]
-                    timestamp_str = time.strftime("%H:%M:%S")
-
-                    # Prepare base message
-                    message = {
-                        "type": "transcript",
-                        "transcript": transcript,
-                        "is_final": is_final,
-                        "timestamp": result["timestamp"],
-                    }
-
-                    if "confidence" in result:
-                        message["confidence"] = result["confidence"]
-
-                    # Translate both interim and final results
-                    if transcript.strip():
-                        translation = await translation_service.translate(transcript)
-                        if translation:
-                            message["translation"] = translation
-                            print(f"[{timestamp_str}] 🌐 번역: {transcript[:30]}... → {translation[:50]}...", flush=True)
-                        else:
-                            message["translation"] = "[Translation failed]"
-                    else:
-                        message["translation"] = ""
-
-                    # Send to client
-                    await websocket.send_json(message)
-
-                    marker = "✅" if is_final else "💬"
-                    status = "final+translated" if is_final else "interim"
-                    print(f"[{timestamp_str}] {marker} → 클라이언트 전송 ({status}): {transcript[:50]}", flush=True)
-
-                # Stream ended - only restart if we had actual audio (4-min limit case)
-                if receiving and not audio_queue.empty():
-                    restart_count += 1
-                    print(f"\n🔄 Restarting STT stream (attempt {restart_count})...")
-                    stt_service = STTStreamingService()
-                    audio_received_in_session = False
-                    await asyncio.sleep(0.1)
-                elif receiving:
-                    # No audio in queue - go back to waiting mode
-                    print(f"\n⏸️ STT 스트림 종료 - 오디오 대기 모드로 전환")
-                    audio_received_in_session = False
-                    stt_service = STTStreamingService()
-
-            except Exception as e:
-                error_str = str(e)
-                print(f"❌ Error in send_transcripts_with_translation: {e}")
-
-                # Check if it's a timeout error (no audio case)
-                if "409" in error_str or "timed out" in error_str.lower():
-                    print(f"\n⏸️ 타임아웃 - 오디오 대기 모드로 전환")
-                    stt_service = STTStreamingService()
-                    audio_received_in_session = False
-                    continue
-
-                if "5 minutes" in error_str or "Max duration" in error_str:
-                    restart_count += 1
-                    print(f"\n🔄 Restarting after timeout (attempt {restart_count})...")
-                    stt_service = STTStreamingService()
-                    await asyncio.sleep(0.1)
-                    continue
-
-                if receiving:
-                    try:
-                        await websocket.send_json(
-                            {
-                                "type": "error",
-                                "message": str(e),
-                            }
-                        )
-                    except Exception:
-                        pass
-                break
-
-    # Run both tasks concurrently
-    try:
-        await asyncio.gather(
-            receive_audio(),
-            send_transcripts_with_translation(),
-        )
-    except Exception as e:
-        print(f"❌ WebSocket error: {e}")
-    finally:
-        receiving = False
-        await translation_service.disconnect()
-        try:
-            await websocket.close()
-        except Exception:
-            pass
-        print("👋 WebSocket connection closed (STT+Translation)")
-
+    codec, subprotocol = negotiate_codec(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    logger.info("✅ WebSocket client connected - 실시간 음성 인식 + 번역 시작", endpoint="/ws/stt-translate")
+    await _serve_session(websocket, codec, "/ws/stt-translate", _stt_translate_pipeline)
@@ -0,0 +1,279 @@
+"""
+File Transcriber
+Offline transcription of recorded audio: silence-split segments recognized in parallel
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+from audio_bridge import AudioBridge
+from audio_codecs import LINEAR16
+from audio_segmenter import Segment, split_on_silence
+from config import (
+    TRANSCRIBE_MAX_PARALLEL,
+    TRANSCRIBE_MAX_JOBS,
+    TRANSCRIBE_JOB_TTL,
+    TRANSLATION_BATCH_ENABLED,
+)
+from logger import get_logger
+from metrics import ERRORS
+from stt_service import FRAME_BYTES, STTStreamingService
+from translation_batcher import get_translation_batcher
+from translation_service import get_translation_service
+
+logger = get_logger("file_transcriber")
+
+# Attempts per segment before it is reported as failed
+SEGMENT_ATTEMPTS = 2
+
+
+class TooManyJobsError(Exception):
+    """Raised when the job queue is full."""
+
+
+class TranscriptionJob:
+    """Progress and result of one file transcription."""
+
+    def __init__(self, job_id: str, duration_ms: int, translate: bool):
+        self.job_id = job_id
+        self.duration_ms = duration_ms
+        self.translate = translate
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.segments_total = 0
+        self.segments_done = 0
+        self.audio_ms_done = 0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> dict:
+        """Client-facing job state (the result only once completed)."""
+        state = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": int(self.created_at * 1000),
+            "progress": {
+                "segments_done": self.segments_done,
+                "segments_total": self.segments_total,
+                "audio_ms_done": self.audio_ms_done,
+                "audio_ms_total": self.duration_ms,
+                "percent": round(self.audio_ms_done * 100 / self.duration_ms, 1) if self.duration_ms else 0.0,
+            },
+        }
+        if self.finished_at is not None:
+            state["elapsed_ms"] = int((self.finished_at - self.created_at) * 1000)
+        if self.error is not None:
+            state["error"] = self.error
+        if self.result is not None:
+            state["result"] = self.result
+        return state
+
+
+class FileTranscriber:
+    """
+    Transcribes whole recordings through the streaming recognizer path.
+
+    The audio is cut at pauses (see ``audio_segmenter``) and every segment is
+    streamed, as fast as the recognizer accepts it, on its own
+    streaming_recognize call. A process-wide semaphore bounds the calls in
+    flight across all requests and jobs. Final results are shifted by their
+    segment's offset and stitched back into one transcript, optionally
+    followed by translation of every final.
+    """
+
+    def __init__(self, max_parallel: int = TRANSCRIBE_MAX_PARALLEL, max_jobs: int = TRANSCRIBE_MAX_JOBS):
+        """
+        Initialize the transcriber.
+
+        Args:
+            max_parallel: Segments recognized at once
+            max_jobs: Unfinished jobs accepted at once
+        """
+        self.max_parallel = max_parallel
+        self.max_jobs = max_jobs
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._jobs: Dict[str, TranscriptionJob] = {}
+        self.in_flight = 0
+
+    async def transcribe(self, pcm: bytes, translate: bool = False, job: Optional[TranscriptionJob] = None) -> dict:
+        """
+        Transcribe a recording.
+
+        Args:
+            pcm: 16 kHz mono LINEAR16
+            translate: Also translate every final segment
+            job: Job whose progress to update
+
+        Returns:
+            Dict with "transcript", "segments" (start_ms, end_ms, transcript,
+            confidence and translation per final result) and "duration_ms"
+        """
+        duration_ms = len(pcm) // LINEAR16.bytes_per_ms
+        segments = await asyncio.to_thread(split_on_silence, pcm, LINEAR16.sample_rate)
+        if job is not None:
+            job.segments_total = len(segments)
+            job.status = "running"
+        logger.info("📼 Transcribing file", duration_s=duration_ms // 1000, segments=len(segments))
+
+        per_segment = await asyncio.gather(
+            *(self._transcribe_segment(pcm, segment, job) for segment in segments)
+        )
+        finals = [final for segment_finals in per_segment if segment_finals for final in segment_finals]
+        if job is not None:
+            # Silence left out of the segments counts as done too
+            job.audio_ms_done = duration_ms
+
+        if translate and finals:
+            if job is not None:
+                job.status = "translating"
+            translations = await asyncio.gather(
+                *(self._translate(final["transcript"]) for final in finals)
+            )
+            for final, translation in zip(finals, translations):
+                final["translation"] = translation
+
+        return {
+            "duration_ms": duration_ms,
+            "transcript": " ".join(final["transcript"] for final in finals),
+            "segments": finals,
+            "failed_segments": sum(result is None for result in per_segment),
+        }
+
+    def submit(self, pcm: bytes, translate: bool = False) -> TranscriptionJob:
+        """
+        Start transcribing a recording in the background.
+
+        Raises:
+            TooManyJobsError: If max_jobs jobs are already unfinished
+        """
+        self._prune()
+        if self.unfinished_jobs >= self.max_jobs:
+            raise TooManyJobsError(f"{self.max_jobs} transcription jobs are already in progress")
+
+        job = TranscriptionJob(uuid.uuid4().hex, len(pcm) // LINEAR16.bytes_per_ms, translate)
+        job.task = asyncio.create_task(self._run_job(job, pcm))
+        self._jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[TranscriptionJob]:
+        """Look up a job (finished jobs are kept for TRANSCRIBE_JOB_TTL seconds)."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def cancel_job(self, job_id: str) -> Optional[TranscriptionJob]:
+        """Cancel an unfinished job."""
+        job = self._jobs.get(job_id)
+        if job is not None and not job.finished:
+            job.task.cancel()
+        return job
+
+    @property
+    def unfinished_jobs(self) -> int:
+        """Jobs queued or in progress."""
+        return sum(not job.finished for job in self._jobs.values())
+
+    def stats(self) -> dict:
+        """Return segment concurrency and job counters."""
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "segments_in_flight": self.in_flight,
+            "max_parallel": self.max_parallel,
+            "jobs": statuses,
+        }
+
+    async def _run_job(self, job: TranscriptionJob, pcm: bytes) -> None:
+        try:
+            job.result = await self.transcribe(pcm, job.translate, job)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            ERRORS.inc(category="transcription_job")
+            logger.error("❌ Transcription job failed", job=job.job_id, error=e)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            logger.info("📼 Transcription job finished", job=job.job_id, status=job.status)
+
+    async def _transcribe_segment(
+        self, pcm: bytes, segment: Segment, job: Optional[TranscriptionJob]
+    ) -> Optional[List[dict]]:
+        """Recognize one segment; returns its finals on the recording's timeline (None if it failed)."""
+        audio = pcm[segment.start_ms * LINEAR16.bytes_per_ms:segment.end_ms * LINEAR16.bytes_per_ms]
+        finals = None
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                for attempt in range(1, SEGMENT_ATTEMPTS + 1):
+                    finals = await self._recognize(audio, segment)
+                    if finals is not None:
+                        break
+                    logger.warning("⚠️ Segment failed", start_ms=segment.start_ms, attempt=attempt)
+            finally:
+                self.in_flight -= 1
+
+        if finals is None:
+            ERRORS.inc(category="transcription_segment")
+        if job is not None:
+            job.segments_done += 1
+            job.audio_ms_done += segment.duration_ms
+        return finals
+
+    async def _recognize(self, audio: bytes, segment: Segment) -> Optional[List[dict]]:
+        """Stream a segment through one recognizer call and collect its finals."""
+        audio_bridge = AudioBridge()
+        for offset in range(0, len(audio), FRAME_BYTES):
+            audio_bridge.put(audio[offset:offset + FRAME_BYTES])
+        audio_bridge.close()
+
+        finals = []
+        # Finals cover the audio since the previous one
+        start_ms = 0
+        service = STTStreamingService(logger.bind(segment_ms=segment.start_ms))
+        async for result in service.stream_recognize(audio_bridge):
+            if "error" in result:
+                return None
+            if not result["is_final"] or not result["transcript"].strip():
+                continue
+            end_ms = min(result.get("audio_end_ms", segment.duration_ms), segment.duration_ms)
+            finals.append({
+                "start_ms": segment.start_ms + start_ms,
+                "end_ms": segment.start_ms + end_ms,
+                "transcript": result["transcript"].strip(),
+                "confidence": result.get("confidence"),
+            })
+            start_ms = end_ms
+        return finals
+
+    async def _translate(self, text: str) -> Optional[str]:
+        if TRANSLATION_BATCH_ENABLED:
+            return await (await get_translation_batcher()).translate(text)
+        return await (await get_translation_service()).translate(text)
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than TRANSCRIBE_JOB_TTL."""
+        cutoff = time.time() - TRANSCRIBE_JOB_TTL
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+# Singleton instance for reuse
+_file_transcriber: Optional[FileTranscriber] = None
+
+
+def get_file_transcriber() -> FileTranscriber:
+    """Get or create the file transcriber singleton."""
+    global _file_transcriber
+    if _file_transcriber is None:
+        _file_transcriber = FileTranscriber()
+    return _file_transcriber
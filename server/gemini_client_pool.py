@@ -0,0 +1,123 @@
+"""
+Gemini Client Pool
+Process-wide async Gemini clients shared by every translation session
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+from google import genai
+from config import GEMINI_POOL_SIZE, GEMINI_MAX_CONCURRENCY
+from logger import get_logger
+
+logger = get_logger("gemini_client_pool")
+
+
+class GeminiClientPool:
+    """
+    Pool of long-lived ``genai.Client`` instances used through their async API.
+
+    Clients are created once and kept for the life of the process, so their
+    HTTP connections stay warm across WebSocket sessions. Requests are spread
+    over the least busy client and the number of concurrent requests is
+    capped by a semaphore.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        size: int = GEMINI_POOL_SIZE,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+    ):
+        """
+        Initialize the pool (clients are created lazily).
+
+        Args:
+            api_key: Gemini API key
+            size: Number of clients (independent HTTP connection pools)
+            max_concurrency: Maximum requests in flight across all clients
+        """
+        self.api_key = api_key
+        self.size = max(1, size)
+        self.max_concurrency = max_concurrency
+
+        self._clients: List[genai.Client] = []
+        self._in_use: List[int] = []
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Counters for monitoring
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queued = 0
+        self.total_wait = 0.0
+
+    @property
+    def started(self) -> bool:
+        """Check if the clients have been created."""
+        return bool(self._clients)
+
+    def start(self) -> None:
+        """Create the clients. Safe to call more than once."""
+        if self._clients:
+            return
+        self._clients = [genai.Client(api_key=self.api_key) for _ in range(self.size)]
+        self._in_use = [0] * self.size
+        logger.info(
+            "🔌 Gemini client pool ready",
+            clients=self.size,
+            max_concurrency=self.max_concurrency,
+        )
+
+    async def close(self) -> None:
+        """Close every client's HTTP connections."""
+        clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                await client.aio.aclose()
+            except Exception as e:
+                logger.warning("⚠️ Failed to close Gemini client", error=e)
+
+    @asynccontextmanager
+    async def client(self) -> AsyncIterator[genai.client.AsyncClient]:
+        """
+        Borrow the least busy client's async interface.
+
+        Yields:
+            ``client.aio`` of the selected client
+        """
+        self.start()
+        started = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.total_wait += time.perf_counter() - started
+
+        index = min(range(len(self._in_use)), key=self._in_use.__getitem__)
+        self._in_use[index] += 1
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield self._clients[index].aio
+        finally:
+            self._in_use[index] -= 1
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Return pool utilization."""
+        return {
+            "clients": len(self._clients),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "utilization": round(self.in_flight / self.max_concurrency, 3),
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "avg_wait_ms": round(self.total_wait * 1000 / self.requests, 2) if self.requests else 0.0,
+            "per_client_in_flight": list(self._in_use),
+        }
@@ -0,0 +1,137 @@
+"""
+Latency Trace
+Per-session audio clock used to break a result's latency down by stage
+"""
+
+import bisect
+import threading
+import time
+from typing import List, Optional
+
+
+class _Marks:
+    """Increasing end positions of audio spans and the time of an event for each."""
+
+    def __init__(self, max_marks: int):
+        self.max_marks = max_marks
+        self.positions: List[int] = []
+        self.times: List[float] = []
+        # Positions up to here were dropped
+        self.floor = 0
+
+    def add(self, position: int, at: float) -> None:
+        if self.positions and position <= self.positions[-1]:
+            return
+        self.positions.append(position)
+        self.times.append(at)
+        if len(self.positions) > self.max_marks * 2:
+            self.floor = self.positions[self.max_marks - 1]
+            del self.positions[:self.max_marks]
+            del self.times[:self.max_marks]
+
+    def find(self, position: int) -> Optional[float]:
+        # First span whose end lies at or after the byte
+        index = bisect.bisect_left(self.positions, position)
+        if position <= self.floor or index == len(self.positions):
+            return None
+        return self.times[index]
+
+
+class LatencyTrace:
+    """
+    Records when each span of session audio reached the server and when it
+    was handed to the upstream stream.
+
+    Positions are byte offsets on the audio bridge, the same clock that
+    Google's result offsets are mapped onto, so a result's end position can
+    be traced back to the client message that carried that audio.
+    Received marks are written on the event loop and sent marks by whichever
+    thread reads the bridge, hence the lock.
+    """
+
+    def __init__(self, max_marks: int = 4096):
+        """
+        Initialize an empty trace.
+
+        Args:
+            max_marks: Marks kept per kind (older ones are dropped)
+        """
+        self._lock = threading.Lock()
+        self._received = _Marks(max_marks)
+        self._sent = _Marks(max_marks)
+
+    def mark_received(self, position: int, at: Optional[float] = None) -> None:
+        """
+        Record that audio up to ``position`` arrived from the client.
+
+        Args:
+            position: Bridge position after the span was queued (bytes)
+            at: time.monotonic() of arrival (now if omitted)
+        """
+        with self._lock:
+            self._received.add(position, time.monotonic() if at is None else at)
+
+    def mark_sent(self, position: int, at: Optional[float] = None) -> None:
+        """
+        Record that audio up to ``position`` was handed upstream.
+
+        Args:
+            position: Bridge position after the span was consumed (bytes)
+            at: time.monotonic() of the handoff (now if omitted)
+        """
+        with self._lock:
+            self._sent.add(position, time.monotonic() if at is None else at)
+
+    def received_at(self, position: int) -> Optional[float]:
+        """Arrival time of the audio byte at ``position``, if still known."""
+        with self._lock:
+            return self._received.find(position)
+
+    def sent_at(self, position: int) -> Optional[float]:
+        """Upstream handoff time of the audio byte at ``position``, if still known."""
+        with self._lock:
+            return self._sent.find(position)
+
+    def breakdown(self, position: int, result_at: float) -> Optional[dict]:
+        """
+        Break down the latency of a result ending at ``position``.
+
+        Args:
+            position: Bridge position of the result's last audio byte
+            result_at: time.monotonic() when the result reached the server
+
+        Returns:
+            Dict of stage timings in ms, or None if the audio is no longer traced
+        """
+        received = self.received_at(position)
+        sent = self.sent_at(position)
+        if received is None or sent is None:
+            return None
+        return {
+            "queued_ms": round((sent - received) * 1000, 1),
+            "upstream_ms": round((result_at - sent) * 1000, 1),
+            "_received_at": received,
+            "_result_at": result_at,
+        }
+
+
+def finish_trace(trace: dict) -> dict:
+    """
+    Complete a result's breakdown right before it is sent to the client.
+
+    Adds the time spent in the server after the result arrived, the total
+    from audio arrival to send, and the wall-clock send time.
+
+    Args:
+        trace: Breakdown produced by ``LatencyTrace.breakdown`` (plus fields
+            such as ``audio_position_ms``)
+
+    Returns:
+        Client-facing trace dict
+    """
+    now = time.monotonic()
+    finished = {key: value for key, value in trace.items() if not key.startswith("_")}
+    finished["server_ms"] = round((now - trace["_result_at"]) * 1000, 1)
+    finished["total_ms"] = round((now - trace["_received_at"]) * 1000, 1)
+    finished["sent_at"] = int(time.time() * 1000)
+    return finished
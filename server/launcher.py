@@ -0,0 +1,313 @@
+"""
+Production Launcher
+Supervises several uvicorn worker processes that share one listening socket
+"""
+
+import asyncio
+import importlib.util
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import uvicorn
+from config import (
+    HOST,
+    PORT,
+    SERVER_WORKERS,
+    SESSION_RESUME_GRACE_S,
+    WORKER_THREADS,
+    WORKER_NATIVE_THREADS,
+    WORKER_DRAIN_TIMEOUT,
+    WORKER_MAX_LIFETIME,
+)
+from file_transcriber import get_file_transcriber
+from logger import get_logger
+from session_scheduler import get_session_scheduler
+
+logger = get_logger("launcher")
+
+# Seconds a new worker may take to finish startup before it counts as crashed
+WORKER_START_TIMEOUT = 60.0
+# Restart delay after a worker dies shortly after starting (doubles per repeat, capped)
+RESTART_BACKOFF = 1.0
+RESTART_BACKOFF_MAX = 30.0
+# Uptime after which a crash no longer counts as a crash loop
+STABLE_UPTIME = 30.0
+
+# Thread pools of native libraries (numpy's BLAS) read these when they load
+_NATIVE_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def _choose(module: str, preferred: str, fallback: str) -> str:
+    return preferred if importlib.util.find_spec(module) is not None else fallback
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that lets live sessions finish before shutting down.
+
+    On SIGTERM/SIGINT it stops accepting connections (the other workers keep
+    serving the shared socket), then waits up to WORKER_DRAIN_TIMEOUT for
+    WebSocket sessions and file transcription jobs to end. Sessions still
+    open after that are closed by uvicorn with 1012 (service restart).
+    """
+
+    def __init__(self, config: uvicorn.Config, ready=None):
+        """
+        Initialize the server.
+
+        Args:
+            config: uvicorn configuration
+            ready: multiprocessing Event set once startup has finished
+        """
+        super().__init__(config)
+        self._ready = ready
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        if WORKER_THREADS > 0:
+            # asyncio.to_thread (file decoding, segmentation) uses the default executor
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="worker")
+            )
+        await super().startup(sockets=sockets)
+        if self.started and self._ready is not None:
+            self._ready.set()
+
+    async def shutdown(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        for server in self.servers:
+            server.close()
+        for sock in sockets or []:
+            sock.close()
+        if not self.force_exit:
+            await self._drain()
+        await super().shutdown(sockets=None)
+
+    async def _drain(self) -> None:
+        scheduler = get_session_scheduler()
+        transcriber = get_file_transcriber()
+        deadline = time.monotonic() + WORKER_DRAIN_TIMEOUT
+        remaining = scheduler.active + scheduler.queued + transcriber.unfinished_jobs
+        if remaining:
+            logger.info("🚰 Draining worker", pid=os.getpid(), sessions=scheduler.active, jobs=transcriber.unfinished_jobs)
+        while remaining and time.monotonic() < deadline and not self.force_exit:
+            await asyncio.sleep(0.5)
+            remaining = scheduler.active + scheduler.queued + transcriber.unfinished_jobs
+        if remaining:
+            logger.warning("⚠️ Drain timed out", pid=os.getpid(), sessions=scheduler.active, jobs=transcriber.unfinished_jobs)
+
+
+def _run_worker(sock: socket.socket, index: int, ready) -> None:
+    """Entry point of a worker process."""
+    config = uvicorn.Config(
+        "main:app",
+        loop=_choose("uvloop", "uvloop", "asyncio"),
+        http=_choose("httptools", "httptools", "h11"),
+        lifespan="on",
+        log_level="info",
+        # Only reached if the drain itself overruns
+        timeout_graceful_shutdown=5,
+    )
+    logger.info("🧵 Worker starting", worker=index, pid=os.getpid(), loop=config.loop, http=config.http)
+    DrainingServer(config, ready).run(sockets=[sock])
+
+
+class _Worker:
+    """Supervisor-side handle of one worker process."""
+
+    def __init__(self, context, sock: socket.socket, index: int):
+        self.index = index
+        self.ready = context.Event()
+        self.process = context.Process(
+            target=_run_worker, args=(sock, index, self.ready), name=f"stt-worker-{index}"
+        )
+        self.process.start()
+        self.started_at = time.monotonic()
+        # Recycle times are spread out so workers do not restart together
+        self.recycle_at = (
+            self.started_at + WORKER_MAX_LIFETIME * random.uniform(0.9, 1.1)
+            if WORKER_MAX_LIFETIME > 0 else None
+        )
+
+    def stop(self) -> None:
+        """Ask the worker to drain and exit."""
+        if self.process.is_alive():
+            os.kill(self.process.pid, signal.SIGTERM)
+
+
+class Supervisor:
+    """
+    Runs SERVER_WORKERS worker processes on one listening socket.
+
+    The socket is bound here and inherited by spawned workers, so the
+    kernel spreads connections across them and throughput scales with
+    cores without an external process manager. Workers that die are
+    restarted (with backoff when they keep dying on startup). Workers are
+    recycled after WORKER_MAX_LIFETIME seconds and on SIGHUP: a
+    replacement is started first, and the old worker drains before it
+    exits. SIGINT/SIGTERM drain all workers and stop.
+    """
+
+    def __init__(self, workers: int = SERVER_WORKERS, host: str = HOST, port: int = PORT):
+        """
+        Initialize the supervisor.
+
+        Args:
+            workers: Worker processes (0 uses one per CPU)
+            host: Address to listen on
+            port: Port to listen on
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        # Workers are spawned, never forked: gRPC and the log thread do not survive fork
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        # Old workers draining after being replaced
+        self._retiring: List[_Worker] = []
+        # When each dead worker's slot gets its replacement (backoff after a crash)
+        self._restart_at: Dict[int, float] = {}
+        # Recycle in progress: (slot, replacement worker, reason, start deadline)
+        self._recycling: Optional[Tuple[int, _Worker, str, float]] = None
+        self._stopping = False
+        self._rolling = False
+        self._rolling_since = 0.0
+        self._backoff = RESTART_BACKOFF
+        self.restarts = 0
+
+    def run(self) -> None:
+        """Serve until SIGINT/SIGTERM, then wait for the workers to drain."""
+        for name in _NATIVE_THREAD_VARS:
+            os.environ.setdefault(name, str(WORKER_NATIVE_THREADS))
+        if self.workers > 1 and SESSION_RESUME_GRACE_S > 0:
+            # A held session lives in one worker, but the kernel hands the
+            # reconnect to any of them; spawned workers read the override
+            logger.warning(
+                "⚠️ Session resumption disabled: sessions cannot move between workers",
+                workers=self.workers,
+                grace_s=SESSION_RESUME_GRACE_S,
+            )
+            os.environ["SESSION_RESUME_GRACE_S"] = "0"
+
+        sock = uvicorn.Config("main:app", host=self.host, port=self.port).bind_socket()
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._handle_reload)
+
+        logger.info(
+            "🚀 Starting workers",
+            workers=self.workers,
+            address=f"{self.host}:{self.port}",
+            threads=WORKER_THREADS,
+            drain_timeout=WORKER_DRAIN_TIMEOUT,
+            max_lifetime=WORKER_MAX_LIFETIME,
+        )
+        self._workers = [_Worker(self._context, sock, index) for index in range(self.workers)]
+        try:
+            while not self._stopping:
+                self._supervise(sock)
+                time.sleep(0.5)
+        finally:
+            sock.close()
+            self._shutdown()
+
+    def _supervise(self, sock: socket.socket) -> None:
+        """
+        One pass of the supervision loop; never blocks.
+
+        Crashed workers are restarted on a later pass once their backoff has
+        passed, and a recycle's replacement is checked for readiness on
+        every pass, so one slow worker does not hold up the others or the
+        handling of stop signals.
+        """
+        now = time.monotonic()
+        self._retiring = [worker for worker in self._retiring if worker.process.is_alive()]
+
+        for slot, worker in enumerate(self._workers):
+            if worker.process.is_alive():
+                continue
+            restart_at = self._restart_at.get(slot)
+            if restart_at is None:
+                uptime = now - worker.started_at
+                logger.error("❌ Worker died", worker=worker.index, pid=worker.process.pid, exitcode=worker.process.exitcode, uptime=round(uptime, 1))
+                if uptime < STABLE_UPTIME:
+                    restart_at = now + self._backoff
+                    self._backoff = min(self._backoff * 2, RESTART_BACKOFF_MAX)
+                else:
+                    restart_at = now
+                    self._backoff = RESTART_BACKOFF
+                self._restart_at[slot] = restart_at
+            if now >= restart_at:
+                del self._restart_at[slot]
+                self.restarts += 1
+                self._workers[slot] = _Worker(self._context, sock, worker.index)
+
+        # One recycle at a time, so capacity never drops by more than a worker
+        if self._recycling is not None:
+            self._finish_recycle(now)
+            return
+        if self._retiring:
+            return
+        for slot, worker in enumerate(self._workers):
+            if slot in self._restart_at:
+                continue
+            if self._rolling and worker.started_at < self._rolling_since:
+                self._start_recycle(slot, sock, "reload")
+                return
+            if worker.recycle_at is not None and now >= worker.recycle_at:
+                self._start_recycle(slot, sock, "max_lifetime")
+                return
+        self._rolling = False
+
+    def _start_recycle(self, slot: int, sock: socket.socket, reason: str) -> None:
+        """Start a replacement for a worker; later passes swap it in once it is ready."""
+        new = _Worker(self._context, sock, self._workers[slot].index)
+        self._recycling = (slot, new, reason, time.monotonic() + WORKER_START_TIMEOUT)
+
+    def _finish_recycle(self, now: float) -> None:
+        """Swap in a ready replacement and drain the old worker, or give up on it."""
+        slot, new, reason, deadline = self._recycling
+        old = self._workers[slot]
+        if new.ready.is_set():
+            self._recycling = None
+            if not old.process.is_alive():
+                # The old worker died meanwhile; the replacement takes over its slot
+                self._restart_at.pop(slot, None)
+            logger.info("♻️ Recycling worker", worker=old.index, old_pid=old.process.pid, new_pid=new.process.pid, reason=reason)
+            old.stop()
+            self._retiring.append(old)
+            self._workers[slot] = new
+        elif now >= deadline or not new.process.is_alive():
+            # Keep the old worker; a later pass tries the recycle again
+            self._recycling = None
+            logger.error("❌ Replacement worker did not start", worker=old.index, reason=reason)
+            new.stop()
+            self._retiring.append(new)
+
+    def _shutdown(self) -> None:
+        workers = self._workers + self._retiring
+        if self._recycling is not None:
+            workers.append(self._recycling[1])
+        for worker in workers:
+            worker.stop()
+        # Workers give up draining after WORKER_DRAIN_TIMEOUT; allow for shutdown after that
+        deadline = time.monotonic() + WORKER_DRAIN_TIMEOUT + 10
+        for worker in workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning("⚠️ Killing worker", worker=worker.index, pid=worker.process.pid)
+                worker.process.kill()
+                worker.process.join()
+        logger.info("👋 All workers stopped", restarts=self.restarts)
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame) -> None:
+        logger.info("♻️ Rolling restart requested")
+        self._rolling = True
+        self._rolling_since = time.monotonic()
@@ -0,0 +1,227 @@
+"""
+Structured Logging
+Queue-backed, leveled logging with per-session context and hot-path sampling
+"""
+
+import asyncio
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE
+
+# Every logger of the service lives under this namespace
+ROOT_LOGGER = "stt"
+
+# Keyword arguments understood by logging itself (everything else is a field)
+_LOGGING_KWARGS = ("exc_info", "stack_info", "stacklevel", "extra")
+
+
+class _TextFormatter(logging.Formatter):
+    """``time level logger message key=value ...``"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_exc_formatter = logging.Formatter()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args and render the traceback, leaving formatting to the writer thread."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ContextLogger(logging.LoggerAdapter):
+    """
+    Logger carrying key/value context (session ID, endpoint, ...).
+
+    Extra keyword arguments become structured fields of the record::
+
+        log = get_logger(__name__).bind(session=3, endpoint="stt")
+        log.info("🔄 Stream started", attempt=2)
+
+    Hot-path events are thinned out with ``sample``::
+
+        if log.sample("audio", every=20):
+            log.debug("🎵 Audio received", chunks=count)
+    """
+
+    def __init__(self, logger: logging.Logger, context: Optional[dict] = None):
+        super().__init__(logger, context or {})
+        # key -> (events seen, time last allowed)
+        self._samples: Dict[str, Tuple[int, float]] = {}
+
+    def bind(self, **context) -> "ContextLogger":
+        """Return a logger with additional context fields."""
+        return ContextLogger(self.logger, {**self.extra, **context})
+
+    def process(self, msg, kwargs):
+        fields = dict(self.extra)
+        for key in list(kwargs):
+            if key not in _LOGGING_KWARGS:
+                fields[key] = kwargs.pop(key)
+        extra = dict(kwargs.get("extra") or {})
+        extra["fields"] = fields
+        kwargs["extra"] = extra
+        return msg, kwargs
+
+    def sample(self, key: str, every: int = 0, interval: float = 0.0) -> bool:
+        """
+        Decide whether a hot-path event should be logged.
+
+        Args:
+            key: Event name (sampled independently per key and logger)
+            every: Log only every N-th event (0 disables)
+            interval: Log at most once per this many seconds (0 disables)
+
+        Returns:
+            True if the event should be logged
+        """
+        count, last = self._samples.get(key, (0, 0.0))
+        count += 1
+        now = time.monotonic()
+        allowed = (not every or (count - 1) % every == 0) and (
+            not interval or now - last >= interval
+        )
+        self._samples[key] = (count, now if allowed else last)
+        return allowed
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[_DroppingQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> None:
+    """
+    Route service logs through a queue to a background writer thread.
+
+    Callers only enqueue records; stdout is written by the listener thread,
+    so the event loop never blocks on log I/O. Safe to call more than once.
+
+    Args:
+        level: Minimum level name (DEBUG, INFO, ...)
+        fmt: "text" or "json"
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if fmt == "json":
+            stream_handler.setFormatter(_JsonFormatter())
+        else:
+            stream_handler.setFormatter(
+                _TextFormatter("%(asctime)s %(levelname)-5s %(name)s %(message)s", "%H:%M:%S")
+            )
+
+        _queue_handler = _DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(level.upper())
+        root.addHandler(_queue_handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, stream_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+
+
+def dropped_records() -> int:
+    """Number of records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def get_logger(name: str, **context) -> ContextLogger:
+    """
+    Get a service logger.
+
+    Args:
+        name: Module name (placed under the ``stt`` namespace)
+        **context: Fields attached to every record
+
+    Returns:
+        ContextLogger for the module
+    """
+    setup_logging()
+    return ContextLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"), context)
+
+
+def log_task_error(log: ContextLogger, message: str) -> Callable[[asyncio.Task], None]:
+    """
+    Make a done-callback that logs a background task's exception.
+
+    Retrieving the exception in the callback means a failure that no one
+    awaited is logged where it happened. Without it, the failure only shows
+    up as "Task exception was never retrieved" when the task is collected.
+
+    Args:
+        log: Logger to report the failure to
+        message: Log message for the failure
+
+    Returns:
+        Callback for ``Task.add_done_callback``
+    """
+
+    def callback(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            log.error(message, task=task.get_name(), error=task.exception())
+
+    return callback
@@ -2,16 +2,38 @@
 FastAPI Server with WebSocket for Real-time STT
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config import HOST, PORT, CORS_ORIGINS
+from config import HOST, PORT, CORS_ORIGINS, SERVER_WORKERS
 from endpoints import router
+from logger import shutdown_logging
+from stream_pool import get_stream_pool
+from stt_service import STTStreamingService
+from translation_service import get_translation_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop process-wide background resources."""
+    region_router = STTStreamingService.get_router()
+    region_router.start()
+    stream_pool = get_stream_pool()
+    stream_pool.start()
+    yield
+    await stream_pool.stop()
+    await region_router.stop()
+    region_router.close()
+    await (await get_translation_service()).close()
+    shutdown_logging()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Real-time STT Service",
     description="WebSocket-based Speech-to-Text service using Google Cloud",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -28,8 +50,18 @@ app.include_router(router)
 
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
 
+    parser = argparse.ArgumentParser(description="Real-time STT Service")
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="Run supervised worker processes on a shared socket (no reload)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default SERVER_WORKERS)")
+    args = parser.parse_args()
+
     print(
         f"""
     🚀 Starting Real-time STT Service
@@ -39,10 +71,15 @@ if __name__ == "__main__":
     """
     )
 
-    uvicorn.run(
-        "main:app",
-        host=HOST,
-        port=PORT,
-        reload=True,
-        log_level="info",
-    )
+    if args.production:
+        from launcher import Supervisor
+
+        Supervisor(workers=args.workers if args.workers is not None else SERVER_WORKERS).run()
+    else:
+        uvicorn.run(
+            "main:app",
+            host=HOST,
+            port=PORT,
+            reload=True,
+            log_level="info",
+        )
@@ -0,0 +1,339 @@
+"""
+Metrics
+Prometheus-style counters and histograms that are cheap to update on the hot path
+"""
+
+import bisect
+import math
+import os
+import resource
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+
+class _ShardedMetric:
+    """
+    Metric whose values are kept in one shard per thread.
+
+    Updates only touch the calling thread's own dict, so they need no lock;
+    shards are summed when the metric is scraped. Shards of finished threads
+    (e.g. per-stream request threads) are folded into a retired shard.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (owning thread, shard)
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+
+    def _shard(self) -> dict:
+        """Return the calling thread's shard, creating it on first use."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _collect_shards(self) -> List[dict]:
+        """Snapshot every shard (retiring those of finished threads)."""
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard)
+            self._shards = live
+            # dict() copies atomically under the GIL
+            return [dict(self._retired)] + [dict(shard) for _, shard in live]
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_ShardedMetric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add ``amount`` to the counter for the given labels."""
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for key, value in shard.items():
+            into[key] = into.get(key, 0) + value
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        """Return totals per label set."""
+        totals: dict = {}
+        for shard in self._collect_shards():
+            self._merge(totals, shard)
+        return totals
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(_ShardedMetric):
+    """Cumulative histogram with fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation for the given labels."""
+        shard = self._shard()
+        key = self._key(labels)
+        # [count per bucket ..., +Inf count, sum]
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for key, state in shard.items():
+            total = into.get(key)
+            if total is None:
+                into[key] = list(state)
+            else:
+                for i, value in enumerate(state):
+                    total[i] += value
+
+    def render(self) -> List[str]:
+        totals: dict = {}
+        for shard in self._collect_shards():
+            self._merge(totals, shard)
+
+        lines = []
+        for key, state in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                labels = _labels(self.labelnames + ("le",), key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Callable[[], Dict[Tuple[str, ...], float]] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def set_callback(self, callback: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+        """Set the function returning ``{label values: value}``."""
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        if self.callback is None:
+            return []
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in sorted(self.callback().items())
+        ]
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a label set, e.g. ``{endpoint="/ws/stt"}``."""
+    if not names:
+        return ""
+    parts = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Every metric exposed on /metrics
+_registry: List = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _process_cpu_seconds() -> dict:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {(): usage.ru_utime + usage.ru_stime}
+
+
+def _process_rss_bytes() -> dict:
+    try:
+        with open("/proc/self/statm") as statm:
+            return {(): int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")}
+    except OSError:
+        # Peak RSS (in KiB) where /proc is unavailable
+        return {(): resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
+
+
+# Process resources
+PROCESS_CPU = _register(
+    Gauge("stt_process_cpu_seconds", "User + system CPU time of the process", callback=_process_cpu_seconds)
+)
+PROCESS_RSS = _register(
+    Gauge("stt_process_resident_memory_bytes", "Resident memory of the process", callback=_process_rss_bytes)
+)
+
+# Sessions and threads (filled in by their owners at scrape time)
+ACTIVE_SESSIONS = _register(Gauge("stt_active_sessions", "Admitted WebSocket sessions", ["endpoint"]))
+QUEUED_SESSIONS = _register(Gauge("stt_queued_sessions", "Sessions waiting for admission"))
+STREAM_THREADS = _register(
+    Gauge("stt_stream_threads", "Threads running blocking streaming_recognize calls", ["state"])
+)
+PROCESS_THREADS = _register(Gauge("stt_process_threads", "Live threads in the process"))
+GEMINI_IN_FLIGHT = _register(Gauge("stt_gemini_requests_in_flight", "Gemini requests in flight"))
+GEMINI_UTILIZATION = _register(
+    Gauge("stt_gemini_pool_utilization", "Gemini requests in flight / max concurrency")
+)
+
+# Audio path
+AUDIO_CHUNKS = _register(Counter("stt_audio_chunks_received_total", "Audio chunks received from clients", ["endpoint"]))
+AUDIO_BYTES = _register(Counter("stt_audio_bytes_received_total", "Audio bytes received from clients", ["endpoint"]))
+UPSTREAM_REQUESTS = _register(Counter("stt_upstream_requests_total", "Audio requests sent to Google"))
+UPSTREAM_BYTES = _register(Counter("stt_upstream_bytes_total", "Audio bytes sent to Google"))
+CODEC_BYTES = _register(Counter("stt_codec_bytes_received_total", "Client audio bytes received per codec", ["codec"]))
+CODEC_PCM_BYTES = _register(
+    Counter("stt_codec_linear16_bytes_total", "Received audio measured as 16 kHz LINEAR16 bytes", ["codec"])
+)
+CODEC_DECODE_SECONDS = _register(
+    Counter("stt_codec_decode_cpu_seconds_total", "CPU time spent decoding client audio", ["codec"])
+)
+AUDIO_DECODERS = _register(Gauge("stt_audio_decoders_active", "Sessions with a server-side audio decoder"))
+AUDIO_QUEUE_BYTES = _register(Gauge("stt_audio_queue_bytes", "Audio queued for upstream across sessions"))
+AUDIO_QUEUE_THROTTLED = _register(
+    Gauge("stt_audio_queue_throttled_sessions", "Sessions whose audio queue is over its high watermark")
+)
+AUDIO_QUEUE_PEAK = _register(
+    Histogram(
+        "stt_audio_queue_peak_seconds",
+        "Deepest audio queue of a session, in seconds of audio",
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 20.0),
+    )
+)
+AUDIO_QUEUE_DROPPED = _register(
+    Counter("stt_audio_queue_dropped_bytes_total", "Audio dropped by full session queues", ["policy"])
+)
+FLOW_CONTROL_MESSAGES = _register(
+    Counter("stt_flow_control_messages_total", "Flow control messages sent to clients", ["action"])
+)
+
+# Session pipelines
+PIPELINE_STAGE_SECONDS = _register(
+    Histogram(
+        "stt_pipeline_stage_seconds",
+        "Time a session pipeline stage spent on one item",
+        ["endpoint", "stage"],
+        buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+    )
+)
+PIPELINE_BLOCKED = _register(
+    Counter(
+        "stt_pipeline_blocked_seconds_total",
+        "Time pipeline stages waited for room in the next stage's queue",
+        ["endpoint", "stage"],
+    )
+)
+
+# Session resumption
+SESSION_RESUMES = _register(
+    Counter("stt_session_resumes_total", "Reconnects with a session token, by outcome", ["outcome"])
+)
+
+# Recognizer regions
+REGION_SELECTIONS = _register(
+    Counter("stt_region_selections_total", "Recognizer streams routed to each region", ["region"])
+)
+REGION_PROBES = _register(
+    Counter("stt_region_probes_total", "Region probes by outcome", ["region", "outcome"])
+)
+REGION_HEALTHY = _register(
+    Gauge("stt_region_healthy", "1 while the region is healthy, 0 while it is skipped", ["region"])
+)
+REGION_LATENCY = _register(
+    Gauge("stt_region_latency_ms", "Moving average of stream setup and first-result latency", ["region", "kind"])
+)
+
+# Streams and results
+STREAM_RESTARTS = _register(Counter("stt_stream_restarts_total", "Google stream restarts and rollovers", ["reason"]))
+RESULTS = _register(Counter("stt_results_total", "Recognition results sent to clients", ["kind"]))
+TIME_TO_FIRST_INTERIM = _register(
+    Histogram("stt_time_to_first_interim_seconds", "Time from stream start to its first result")
+)
+INTERIM_TO_FINAL = _register(
+    Histogram("stt_interim_to_final_seconds", "Time from an utterance's first interim to its final")
+)
+
+# Translation
+TRANSLATION_LATENCY = _register(
+    Histogram("stt_translation_latency_seconds", "Time to a complete translation", ["kind"])
+)
+TRANSLATION_FIRST_TOKEN = _register(
+    Histogram("stt_translation_first_token_seconds", "Time to the first translation delta", ["kind"])
+)
+
+# Errors
+ERRORS = _register(Counter("stt_errors_total", "Errors by category", ["category"]))
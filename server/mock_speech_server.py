@@ -0,0 +1,335 @@
+"""
+Mock Speech Server
+Local stand-in for the Speech-to-Text v2 streaming API, for offline load tests and profiling
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import List, Optional
+import grpc
+from google.cloud.speech_v2.types import cloud_speech as cloud_speech_types
+from config import (
+    MOCK_STT_LATENCY_MS,
+    MOCK_STT_JITTER_MS,
+    MOCK_STT_INTERIM_MS,
+    MOCK_STT_UTTERANCE_MS,
+    MOCK_STT_ERROR_RATE,
+    MOCK_STT_MAX_STREAM_SECONDS,
+    MOCK_STT_AUDIO_TIMEOUT,
+    MOCK_STT_SCRIPT,
+    MOCK_STT_SETUP_MS,
+)
+from logger import get_logger
+
+logger = get_logger("mock_speech_server")
+
+# Recognized text when no script file is given (one utterance per entry)
+DEFAULT_SCRIPT = [
+    "안녕하세요 오늘 회의를 시작하겠습니다",
+    "지난주 진행 상황부터 공유해 주세요",
+    "배포 일정은 다음 주 화요일로 잡혀 있습니다",
+    "질문이 있으시면 언제든지 말씀해 주세요",
+]
+
+# Bytes per sample of the encodings the mock understands (others count as 2)
+_SAMPLE_WIDTHS = {"LINEAR16": 2, "MULAW": 1, "ALAW": 1}
+
+_SERVICE = "google.cloud.speech.v2.Speech"
+
+
+def load_script(path: str) -> List[str]:
+    """Read one utterance per non-empty line (DEFAULT_SCRIPT if no path)."""
+    if not path:
+        return list(DEFAULT_SCRIPT)
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip()] or list(DEFAULT_SCRIPT)
+
+
+class _Abort(Exception):
+    """Ends a mock stream with a gRPC error, the way Google would."""
+
+    def __init__(self, code: grpc.StatusCode, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class MockSpeechServer:
+    """
+    gRPC server implementing ``Speech.StreamingRecognize`` with scripted results.
+
+    Audio is only counted, not recognized: every ``interim_ms`` of audio
+    produces an interim result with a growing prefix of the current script
+    line, and every ``utterance_ms`` a final result for the whole line.
+    Results are sent ``latency_ms`` (± ``jitter_ms``) after the audio that
+    completes them arrived. Streams fail like Google's do: after
+    ``max_stream_seconds``, after ``audio_timeout`` seconds without audio,
+    and at a random point for a share ``error_rate`` of streams. Every call
+    waits ``setup_ms`` before it is served, and while ``available`` is False
+    new calls fail with UNAVAILABLE, like a region in an outage. Both can be
+    changed while the server runs.
+
+    The server runs on its own thread and event loop, so it can live in the
+    service process (``STT_BACKEND=mock``) without sharing its loop.
+    """
+
+    def __init__(
+        self,
+        address: str = "127.0.0.1:0",
+        latency_ms: int = MOCK_STT_LATENCY_MS,
+        jitter_ms: int = MOCK_STT_JITTER_MS,
+        interim_ms: int = MOCK_STT_INTERIM_MS,
+        utterance_ms: int = MOCK_STT_UTTERANCE_MS,
+        error_rate: float = MOCK_STT_ERROR_RATE,
+        max_stream_seconds: float = MOCK_STT_MAX_STREAM_SECONDS,
+        audio_timeout: float = MOCK_STT_AUDIO_TIMEOUT,
+        script: Optional[List[str]] = None,
+        setup_ms: int = MOCK_STT_SETUP_MS,
+    ):
+        """
+        Initialize the server (call ``start`` to serve).
+
+        Args:
+            address: host:port to bind (port 0 picks a free one)
+            latency_ms: Delay from audio arrival to its result
+            jitter_ms: Maximum random deviation from latency_ms
+            interim_ms: Audio per interim result
+            utterance_ms: Audio per final result
+            error_rate: Share of streams that fail with UNAVAILABLE at a random point
+            max_stream_seconds: Stream duration limit (Google's is 5 minutes)
+            audio_timeout: Seconds without audio before a stream is aborted
+            script: Utterances cycled through as transcripts
+            setup_ms: Delay before a call is served (stream setup)
+        """
+        self.address = address
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.interim_ms = max(1, interim_ms)
+        self.utterance_ms = max(self.interim_ms, utterance_ms)
+        self.error_rate = error_rate
+        self.max_stream_seconds = max_stream_seconds
+        self.audio_timeout = audio_timeout
+        self.script = script or load_script(MOCK_STT_SCRIPT)
+        self.setup_ms = setup_ms
+        self.available = True
+
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+        # Counters for monitoring
+        self.streams = 0
+        self.active = 0
+        self.results = 0
+        self.errors = 0
+
+    def start(self) -> str:
+        """
+        Serve on a background thread.
+
+        Returns:
+            Address the server is bound to (host:port)
+        """
+        ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(ready,), name="mock-speech", daemon=True
+        )
+        self._thread.start()
+        ready.wait()
+        return self.address
+
+    def stop(self) -> None:
+        """Stop serving and wait for the server thread."""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        """Return stream and result counters."""
+        return {
+            "streams": self.streams,
+            "active": self.active,
+            "results": self.results,
+            "errors": self.errors,
+        }
+
+    def _run(self, ready: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve(ready))
+        finally:
+            self._loop.close()
+
+    async def _serve(self, ready: threading.Event) -> None:
+        server = grpc.aio.server()
+        server.add_generic_rpc_handlers((
+            grpc.method_handlers_generic_handler(
+                _SERVICE,
+                {
+                    "StreamingRecognize": grpc.stream_stream_rpc_method_handler(
+                        self._streaming_recognize,
+                        request_deserializer=cloud_speech_types.StreamingRecognizeRequest.deserialize,
+                        response_serializer=cloud_speech_types.StreamingRecognizeResponse.serialize,
+                    ),
+                },
+            ),
+        ))
+        host = self.address.rsplit(":", 1)[0]
+        port = server.add_insecure_port(self.address)
+        self.address = f"{host}:{port}"
+        self._stopped = asyncio.Event()
+        await server.start()
+        logger.info(
+            "🧪 Mock Speech server listening",
+            address=self.address,
+            setup_ms=self.setup_ms,
+            latency_ms=self.latency_ms,
+            jitter_ms=self.jitter_ms,
+            error_rate=self.error_rate,
+        )
+        ready.set()
+        await self._stopped.wait()
+        await server.stop(grace=1.0)
+
+    async def _streaming_recognize(self, request_iterator, context):
+        """One streaming_recognize call: count audio, emit scripted results on schedule."""
+        if self.setup_ms:
+            await asyncio.sleep(self.setup_ms / 1000)
+        if not self.available:
+            self.errors += 1
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "Mock Speech server: unavailable")
+        self.streams += 1
+        self.active += 1
+        # (due time, response), or an _Abort, or None at the end
+        outbox = asyncio.Queue()
+        reader = asyncio.create_task(self._read(request_iterator, outbox, self.streams))
+        try:
+            while True:
+                item = await outbox.get()
+                if item is None:
+                    return
+                if isinstance(item, _Abort):
+                    self.errors += 1
+                    await context.abort(item.code, item.message)
+                due, response = item
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.results += 1
+                yield response
+        finally:
+            reader.cancel()
+            self.active -= 1
+
+    async def _read(self, request_iterator, outbox: asyncio.Queue, stream_number: int) -> None:
+        """Consume a stream's requests and queue the results they complete."""
+        started = time.monotonic()
+        deadline = started + self.max_stream_seconds
+        if random.random() < self.error_rate:
+            # Fail somewhere within the stream's lifetime
+            deadline = min(deadline, started + random.uniform(0.5, self.max_stream_seconds))
+            failure = _Abort(grpc.StatusCode.UNAVAILABLE, "Mock Speech server: injected failure")
+        else:
+            failure = _Abort(grpc.StatusCode.OUT_OF_RANGE, "Max duration of 5 minutes reached for stream.")
+
+        bytes_per_ms = 32
+        audio_bytes = 0
+        last_due = 0.0
+        # Audio position (ms) of the last interim and final result
+        interim_at = 0
+        final_at = 0
+        iterator = request_iterator.__aiter__()
+
+        def due() -> float:
+            nonlocal last_due
+            jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            last_due = max(last_due, time.monotonic() + max(0.0, self.latency_ms + jitter) / 1000)
+            return last_due
+
+        try:
+            while True:
+                timeout = min(self.audio_timeout, deadline - time.monotonic())
+                try:
+                    request = await asyncio.wait_for(iterator.__anext__(), max(0.0, timeout))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    if time.monotonic() >= deadline:
+                        outbox.put_nowait(failure)
+                    else:
+                        outbox.put_nowait(_Abort(
+                            grpc.StatusCode.ABORTED,
+                            "Audio Timeout Error: Long duration elapsed without audio. "
+                            "Audio should be sent close to real time.",
+                        ))
+                    return
+
+                if request.streaming_config:
+                    decoding = request.streaming_config.config.explicit_decoding_config
+                    if decoding.sample_rate_hertz:
+                        width = _SAMPLE_WIDTHS.get(decoding.encoding.name, 2)
+                        bytes_per_ms = max(1, decoding.sample_rate_hertz * width // 1000)
+                    continue
+
+                audio_bytes += len(request.audio)
+                position = audio_bytes // bytes_per_ms
+                while position - final_at >= self.utterance_ms:
+                    end = final_at + self.utterance_ms
+                    outbox.put_nowait((due(), self._result(final_at, end, True)))
+                    final_at = interim_at = end
+                if position - interim_at >= self.interim_ms:
+                    interim_at = position - (position - final_at) % self.interim_ms
+                    outbox.put_nowait((due(), self._result(final_at, interim_at, False)))
+
+            # End of audio: finalize the utterance in progress
+            position = audio_bytes // bytes_per_ms
+            if position > final_at:
+                outbox.put_nowait((due(), self._result(final_at, position, True)))
+            outbox.put_nowait(None)
+        except Exception as e:
+            logger.warning("⚠️ Mock stream ended unexpectedly", stream=stream_number, error=e)
+            outbox.put_nowait(None)
+
+    def _result(self, utterance_start: int, position: int, is_final: bool):
+        """Build the response for audio up to ``position`` of the utterance at ``utterance_start``."""
+        line = self.script[(utterance_start // self.utterance_ms) % len(self.script)]
+        words = line.split()
+        if not is_final:
+            progress = (position - utterance_start) / self.utterance_ms
+            words = words[:max(1, round(len(words) * progress))]
+        alternative = cloud_speech_types.SpeechRecognitionAlternative(
+            transcript=" ".join(words),
+            confidence=0.9 if is_final else 0.0,
+        )
+        return cloud_speech_types.StreamingRecognizeResponse(
+            results=[
+                cloud_speech_types.StreamingRecognitionResult(
+                    alternatives=[alternative],
+                    is_final=is_final,
+                    result_end_offset=timedelta(milliseconds=position),
+                    language_code="ko-KR",
+                )
+            ]
+        )
+
+
+if __name__ == "__main__":
+    # Standalone server for load tests against several service processes:
+    #   STT_BACKEND=mock MOCK_STT_ADDRESS=127.0.0.1:50051 python main.py
+    parser = argparse.ArgumentParser(description="Mock Speech-to-Text v2 streaming server")
+    parser.add_argument("--address", default="127.0.0.1:50051")
+    args = parser.parse_args()
+
+    server = MockSpeechServer(args.address)
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
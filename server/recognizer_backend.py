@@ -0,0 +1,144 @@
+"""
+Recognizer Backends
+Where streaming_recognize calls go: Google Cloud or a local mock Speech server
+"""
+
+import os
+from typing import Optional
+import grpc
+from google.api_core.client_options import ClientOptions
+from google.cloud.speech_v2 import SpeechAsyncClient, SpeechClient
+from google.cloud.speech_v2.services.speech.transports import (
+    SpeechGrpcAsyncIOTransport,
+    SpeechGrpcTransport,
+)
+from logger import get_logger
+
+logger = get_logger("recognizer_backend")
+
+
+class RecognizerBackend:
+    """
+    Creates Speech v2 clients for one recognition service.
+
+    Everything above the clients (stream handles, rollover, the pool) is the
+    same for every backend.
+    """
+
+    name = ""
+
+    def create_client(self) -> SpeechClient:
+        """Create a blocking client (thread engine)."""
+        raise NotImplementedError
+
+    def create_async_client(self) -> SpeechAsyncClient:
+        """Create a grpc.aio client (asyncio engine; call from the event loop)."""
+        raise NotImplementedError
+
+    def recognizer_path(self) -> str:
+        """Recognizer resource name sent in every config request."""
+        raise NotImplementedError
+
+    def describe(self) -> dict:
+        """Fields identifying the backend in logs."""
+        return {"backend": self.name}
+
+    def close(self) -> None:
+        """Release resources owned by the backend."""
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Cloud Speech-to-Text v2 with service account credentials."""
+
+    name = "google"
+
+    def __init__(self, project_id: str, location: str, credentials_path: str, api_endpoint: str):
+        """
+        Initialize the backend.
+
+        Args:
+            project_id: Google Cloud project
+            location: Speech region (e.g. asia-northeast1)
+            credentials_path: Service account JSON file
+            api_endpoint: Regional API endpoint
+        """
+        self.project_id = project_id
+        self.location = location
+        self.credentials_path = credentials_path
+        self.api_endpoint = api_endpoint
+
+    def create_client(self) -> SpeechClient:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.credentials_path
+        return SpeechClient(client_options=ClientOptions(api_endpoint=self.api_endpoint))
+
+    def create_async_client(self) -> SpeechAsyncClient:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.credentials_path
+        return SpeechAsyncClient(client_options=ClientOptions(api_endpoint=self.api_endpoint))
+
+    def recognizer_path(self) -> str:
+        return SpeechClient.recognizer_path(self.project_id, self.location, "_")
+
+    def describe(self) -> dict:
+        return {"backend": self.name, "location": self.location}
+
+
+class MockBackend(RecognizerBackend):
+    """
+    The mock Speech server over an insecure local channel.
+
+    Connects to a running ``mock_speech_server`` at ``address``, or starts
+    one in this process when no address is given. Each region of an offline
+    setup gets its own backend, so regions can be given different latencies
+    or be taken down one at a time.
+    """
+
+    name = "mock"
+
+    def __init__(self, address: str = "", location: str = "local", **server_options):
+        """
+        Initialize the backend.
+
+        Args:
+            address: host:port of a mock server (empty starts one in-process)
+            location: Region name used in the recognizer path
+            **server_options: MockSpeechServer settings of an in-process server
+        """
+        self.location = location
+        self._server = None
+        if not address:
+            # Imported here so the Google backend never loads the mock's settings
+            from mock_speech_server import MockSpeechServer
+
+            self._server = MockSpeechServer(**server_options)
+            address = self._server.start()
+        self.address = address
+
+    def create_client(self) -> SpeechClient:
+        return SpeechClient(
+            transport=SpeechGrpcTransport(channel=grpc.insecure_channel(self.address))
+        )
+
+    def create_async_client(self) -> SpeechAsyncClient:
+        return SpeechAsyncClient(
+            transport=SpeechGrpcAsyncIOTransport(channel=grpc.aio.insecure_channel(self.address))
+        )
+
+    def recognizer_path(self) -> str:
+        return f"projects/mock/locations/{self.location}/recognizers/_"
+
+    def describe(self) -> dict:
+        return {"backend": self.name, "address": self.address, "in_process": self._server is not None}
+
+    @property
+    def server(self):
+        """The in-process MockSpeechServer, if this backend runs one."""
+        return self._server
+
+    def stats(self) -> Optional[dict]:
+        """Counters of the in-process mock server, if this backend runs one."""
+        return self._server.stats() if self._server is not None else None
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
@@ -0,0 +1,325 @@
+"""
+Region Router
+Ranks recognizer regions by measured latency and routes new streams to the fastest healthy one
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+import grpc
+from google.cloud.speech_v2 import SpeechAsyncClient, SpeechClient
+from config import (
+    STT_REGION_MAX_FAILURES,
+    STT_REGION_PROBE_INTERVAL,
+    STT_REGION_PROBE_TIMEOUT,
+)
+from logger import get_logger
+from metrics import REGION_PROBES, REGION_SELECTIONS
+from recognizer_backend import RecognizerBackend
+
+logger = get_logger("region_router")
+
+# Weight of the newest sample in the latency averages
+EWMA_ALPHA = 0.3
+# A healthy preferred region is kept until another one scores this much better
+SWITCH_MARGIN = 0.15
+
+# Errors that say the region is down or refusing us (others, such as a
+# rejected config or an audio timeout, still mean the region answered)
+_OUTAGE_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.UNAUTHENTICATED,
+    grpc.StatusCode.PERMISSION_DENIED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+}
+
+
+def parse_region_map(spec: str) -> Dict[str, str]:
+    """Parse ``region=value,region=value`` settings (whitespace around items is ignored)."""
+    values = {}
+    for item in spec.split(","):
+        name, separator, value = item.partition("=")
+        if separator and name.strip():
+            values[name.strip()] = value.strip()
+    return values
+
+
+def is_outage(error: BaseException) -> bool:
+    """Check if a stream error means the region itself failed."""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    code = getattr(error, "grpc_status_code", None)
+    if code is None and isinstance(error, grpc.RpcError) and callable(getattr(error, "code", None)):
+        code = error.code()
+    return code in _OUTAGE_CODES
+
+
+class Region:
+    """
+    One recognizer region: its backend, its clients and how it has been doing.
+
+    Clients are created once per region and shared by every stream and
+    probe sent there. Probes keep their channels connected between
+    sessions. Latency is tracked as moving averages of stream setup (from
+    probes) and of the time from stream start to the first result (from
+    sessions). A region is unhealthy after STT_REGION_MAX_FAILURES
+    consecutive outages, and healthy again after its next success.
+
+    Stream handle threads report into a region, so its state is guarded
+    by a lock.
+    """
+
+    def __init__(self, name: str, backend: RecognizerBackend, languages: Optional[Sequence[str]] = None):
+        """
+        Initialize the region.
+
+        Args:
+            name: Region name (e.g. asia-northeast1, us)
+            backend: Backend creating the region's clients
+            languages: Language codes the region serves (None: all of them)
+        """
+        self.name = name
+        self.backend = backend
+        self.languages = set(languages) if languages else None
+        self.recognizer = backend.recognizer_path()
+        self._client: Optional[SpeechClient] = None
+        self._async_client: Optional[SpeechAsyncClient] = None
+        self._lock = threading.Lock()
+
+        self.setup_ms: Optional[float] = None
+        self.first_result_ms: Optional[float] = None
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.failures < STT_REGION_MAX_FAILURES
+
+    def supports(self, languages: Sequence[str]) -> bool:
+        """Check if the region serves every one of the language codes."""
+        return self.languages is None or self.languages.issuperset(languages)
+
+    def client(self) -> SpeechClient:
+        """The region's blocking client (thread engine), created on first use."""
+        with self._lock:
+            if self._client is None:
+                self._client = self.backend.create_client()
+                logger.info("🔌 Created SpeechClient (connection reuse enabled)", region=self.name, **self.backend.describe())
+            return self._client
+
+    def async_client(self) -> SpeechAsyncClient:
+        """The region's grpc.aio client (asyncio engine), created on first use from the event loop."""
+        if self._async_client is None:
+            self._async_client = self.backend.create_async_client()
+            logger.info("🔌 Created SpeechAsyncClient (asyncio engine)", region=self.name, **self.backend.describe())
+        return self._async_client
+
+    def score(self, first_result_fallback: float = 0.0) -> float:
+        """
+        Expected latency (ms) of a new stream in this region; lower is better.
+
+        Args:
+            first_result_fallback: Stands in for a first-result time the
+                region has no samples of yet
+        """
+        setup = self.setup_ms if self.setup_ms is not None else 0.0
+        first_result = self.first_result_ms if self.first_result_ms is not None else first_result_fallback
+        return setup + first_result
+
+    def record_setup(self, seconds: float) -> None:
+        """A probe completed in ``seconds``."""
+        with self._lock:
+            self.setup_ms = _average(self.setup_ms, seconds * 1000)
+            self._succeeded()
+
+    def record_first_result(self, seconds: float) -> None:
+        """A fresh stream got its first result ``seconds`` after it started."""
+        with self._lock:
+            self.first_result_ms = _average(self.first_result_ms, seconds * 1000)
+            self._succeeded()
+
+    def record_error(self, error: BaseException) -> None:
+        """A probe or stream failed; only outages count against the region."""
+        if not is_outage(error):
+            return
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:200]
+            if self.failures == STT_REGION_MAX_FAILURES:
+                logger.warning("🚧 STT region unhealthy", region=self.name, error=self.last_error)
+
+    def stats(self) -> dict:
+        """Return health and latency figures."""
+        return {
+            "region": self.name,
+            **self.backend.describe(),
+            "healthy": self.healthy,
+            "setup_ms": _rounded(self.setup_ms),
+            "first_result_ms": _rounded(self.first_result_ms),
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+    def close(self) -> None:
+        """Release resources owned by the region's backend."""
+        self.backend.close()
+
+    def _succeeded(self) -> None:
+        if self.failures >= STT_REGION_MAX_FAILURES:
+            logger.info("✅ STT region healthy again", region=self.name)
+        self.failures = 0
+
+
+class RegionRouter:
+    """
+    Chooses the region for every new recognizer stream.
+
+    Candidates are the regions that serve the stream's languages. Healthy
+    candidates come first; if none is healthy, the best unhealthy one is
+    used rather than failing the session. Among them the lowest ``score``
+    wins. The current choice is kept until another region beats it by
+    SWITCH_MARGIN, so sessions and the stream pool don't flap between
+    regions of about the same latency. Before any measurement the regions
+    are tried in configured order.
+
+    While running, every region is probed every STT_REGION_PROBE_INTERVAL
+    seconds with a config-only streaming_recognize call. The probe measures
+    stream setup, detects outages and recoveries, and keeps the region's
+    client connected. Sessions report first-result times and stream
+    outages as they happen, so traffic moves away from a failing region
+    without waiting for the next probe.
+    """
+
+    def __init__(
+        self,
+        regions: List[Region],
+        probe: Callable[[Region], Awaitable[None]],
+        interval: float = STT_REGION_PROBE_INTERVAL,
+        timeout: float = STT_REGION_PROBE_TIMEOUT,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            regions: Regions in order of preference before measurements
+            probe: Coroutine function opening a config-only stream in a region
+                and returning once it ends
+            interval: Seconds between probe rounds
+            timeout: Seconds a probe may take before it counts as an outage
+        """
+        if not regions:
+            raise ValueError("At least one STT region is required")
+        self.regions = regions
+        self.interval = interval
+        self.timeout = timeout
+        self._probe = probe
+        self._task: Optional[asyncio.Task] = None
+        # Current choice per language set
+        self._preferred: Dict[frozenset, Region] = {}
+
+    def select(self, languages: Sequence[str], count: bool = True) -> Region:
+        """
+        Choose the region for a new stream.
+
+        Args:
+            languages: Language codes of the stream
+            count: Count the choice in stt_region_selections_total
+
+        Raises:
+            ValueError: If no configured region serves the languages
+        """
+        candidates = [region for region in self.regions if region.supports(languages)]
+        if not candidates:
+            raise ValueError(f"No STT region serves {','.join(languages)}")
+        healthy = [region for region in candidates if region.healthy] or candidates
+
+        known = [region.first_result_ms for region in healthy if region.first_result_ms is not None]
+        fallback = min(known) if known else 0.0
+        best = min(healthy, key=lambda region: region.score(fallback))
+
+        key = frozenset(languages)
+        current = self._preferred.get(key)
+        if current is not best:
+            if current in healthy and current.score(fallback) <= best.score(fallback) * (1 + SWITCH_MARGIN):
+                best = current
+            else:
+                if current is not None:
+                    logger.info(
+                        "🌏 STT region switched",
+                        previous=current.name,
+                        region=best.name,
+                        previous_score_ms=round(current.score(fallback), 1),
+                        score_ms=round(best.score(fallback), 1),
+                    )
+                self._preferred[key] = best
+        if count:
+            REGION_SELECTIONS.inc(region=best.name)
+        return best
+
+    def start(self) -> None:
+        """Start probing on the running loop (only useful with more than one region)."""
+        if self._task is None and len(self.regions) > 1 and self.interval > 0:
+            self._task = asyncio.create_task(self._probe_loop())
+            logger.info(
+                "🌏 Region probing started",
+                regions=",".join(region.name for region in self.regions),
+                interval_s=self.interval,
+            )
+
+    async def stop(self) -> None:
+        """Stop probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def probe_all(self) -> None:
+        """Probe every region once, concurrently."""
+        await asyncio.gather(*(self._probe_region(region) for region in self.regions))
+
+    def stats(self) -> dict:
+        """Return every region's figures and the current choices."""
+        return {
+            "preferred": sorted({region.name for region in self._preferred.values()}),
+            "regions": [region.stats() for region in self.regions],
+        }
+
+    def close(self) -> None:
+        """Release every region's backend."""
+        for region in self.regions:
+            region.close()
+
+    async def _probe_region(self, region: Region) -> None:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._probe(region), self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_outage(e):
+                REGION_PROBES.inc(region=region.name, outcome="failed")
+                region.record_error(e)
+                logger.debug("🌏 Region probe failed", region=region.name, error=e)
+                return
+            # Rejected by the region, but it answered
+        REGION_PROBES.inc(region=region.name, outcome="ok")
+        region.record_setup(time.monotonic() - started)
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+
+def _average(current: Optional[float], sample: float) -> float:
+    return sample if current is None else current + EWMA_ALPHA * (sample - current)
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
@@ -0,0 +1,71 @@
+"""
+Audio Ring Buffer
+Fixed-size byte history backed by a preallocated bytearray
+"""
+
+
+class AudioRingBuffer:
+    """
+    Keeps the most recent ``capacity`` bytes of audio.
+
+    Writes copy into a preallocated bytearray through a memoryview, so
+    recording audio never allocates per chunk.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Number of most recent bytes to keep
+        """
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._write_pos = 0
+        # Total bytes ever written
+        self.total_written = 0
+
+    def __len__(self) -> int:
+        """Number of bytes currently held."""
+        return min(self.total_written, self.capacity)
+
+    def write(self, data: bytes) -> None:
+        """
+        Append audio, overwriting the oldest bytes once full.
+
+        Args:
+            data: Audio bytes
+        """
+        self.total_written += len(data)
+        if self.capacity == 0:
+            return
+        data = memoryview(data)
+        if len(data) >= self.capacity:
+            self._view[:] = data[-self.capacity:]
+            self._write_pos = 0
+            return
+        first = min(len(data), self.capacity - self._write_pos)
+        self._view[self._write_pos:self._write_pos + first] = data[:first]
+        rest = len(data) - first
+        if rest:
+            self._view[:rest] = data[first:]
+        self._write_pos = (self._write_pos + len(data)) % self.capacity
+
+    def tail(self, size: int) -> bytes:
+        """
+        Return up to ``size`` of the most recent bytes, oldest first.
+
+        Args:
+            size: Number of bytes requested
+
+        Returns:
+            Copy of the requested history
+        """
+        size = min(size, len(self))
+        if size <= 0:
+            return b""
+        start = (self._write_pos - size) % self.capacity
+        if start + size <= self.capacity:
+            return bytes(self._view[start:start + size])
+        return bytes(self._view[start:]) + bytes(self._view[:self._write_pos])
@@ -0,0 +1,342 @@
+"""
+Session Resumption
+Keeps a dropped WebSocket session alive for a grace period so a reconnect can reattach to it
+"""
+
+import asyncio
+import collections
+import secrets
+from typing import Dict, Optional
+from fastapi import WebSocket, WebSocketDisconnect
+from config import SESSION_RESUME_GRACE_S, SESSION_RESUME_MAX_PENDING
+from logger import ContextLogger, get_logger
+from message_codec import MessageCodec
+from metrics import SESSION_RESUMES
+
+logger = get_logger("session_resume")
+
+# Close code of a socket replaced by a reconnect that resumed its session
+SUPERSEDED_CLOSE_CODE = 4001
+
+
+class _Disconnected:
+    """Inbox marker: a socket stopped delivering audio."""
+
+    def __init__(self, websocket: WebSocket, error: BaseException):
+        self.websocket = websocket
+        self.error = error
+
+
+class ResumableSession:
+    """
+    The client-facing side of one STT session, detachable from its socket.
+
+    The handler that created the session keeps running while the client is
+    away: its STT service, audio bridge (with the rollover history), VAD
+    gate and slot stay as they are, so a reconnect skips the cold start.
+    Messages sent meanwhile are held back (every final and
+    translation_final, and only the latest interim) and replayed, marked
+    ``"replayed": true``, when a reconnect with the session's token
+    attaches a new socket.
+
+    With resumption enabled, audio is read from the attached socket by a
+    pump task, so a reconnect can take over from a socket that the server
+    has not yet noticed is dead (typical when a phone changes networks).
+
+    No audio reaches the recognizer while the client is away. After about
+    10 s without audio Google ends the stream; the recognize stage treats
+    that as an idle stream, as during any long pause, and opens a new one
+    (from the pool when possible) on the first audio after the resume.
+    The session itself, its slot and the held messages survive. The grace
+    period bounds how long a client that never returns keeps its slot.
+    Sessions are kept in the memory of one process, so a reconnect must
+    reach the same worker; the launcher turns resumption off when it runs
+    more than one.
+    """
+
+    def __init__(
+        self,
+        registry: "SessionResumeRegistry",
+        token: str,
+        endpoint: str,
+        websocket: WebSocket,
+        codec: MessageCodec,
+        log: ContextLogger,
+        grace: float,
+    ):
+        """
+        Initialize a session attached to its first socket.
+
+        Args:
+            registry: Registry the token is registered with
+            token: Secret the client presents to resume
+            endpoint: Endpoint path the session belongs to
+            websocket: Accepted socket of the first connection
+            codec: Message encoding of that connection
+            log: Session logger
+            grace: Seconds a dropped session waits for a reconnect (0 disables resumption)
+        """
+        self._registry = registry
+        self.token = token
+        self.endpoint = endpoint
+        self.websocket: Optional[WebSocket] = websocket
+        self.codec = codec
+        self.log = log
+        self.grace = grace
+        self.resumes = 0
+        self.replayed = 0
+        self.closed = False
+        self._pending = collections.deque(maxlen=SESSION_RESUME_MAX_PENDING)
+        self._last_interim: Optional[dict] = None
+        self._attached = asyncio.Event()
+        self._attached.set()
+        # Set when the attached socket is no longer used by the session
+        self._released = asyncio.Event()
+        # Audio (or a _Disconnected marker) read by the pump; one slot, so a
+        # paused receiver also stops the pump from reading
+        self._inbox: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._pump: Optional[asyncio.Task] = None
+        self._closing: set = set()
+
+    @property
+    def resumable(self) -> bool:
+        return self.grace > 0
+
+    def describe(self) -> dict:
+        """Message telling the client how to resume this session."""
+        return {
+            "type": "session",
+            "token": self.token,
+            "resumed": self.resumes > 0,
+            "resume_grace_s": self.grace,
+        }
+
+    async def send(self, message: dict, replay: bool = True) -> None:
+        """
+        Send a message to the attached socket, or hold it for replay.
+
+        Args:
+            message: Message to send
+            replay: Hold the message while detached (interims keep only the latest)
+
+        Raises:
+            Exception: Send failures, if the session is not resumable
+        """
+        websocket = self.websocket
+        if websocket is not None:
+            try:
+                await self.codec.send(websocket, message)
+                return
+            except Exception:
+                if not self.resumable:
+                    raise
+                self._detach(websocket)
+        if replay:
+            self._hold(message)
+
+    async def receive_bytes(self) -> bytes:
+        """
+        Next audio message of the session, from whichever socket is attached.
+
+        Raises:
+            WebSocketDisconnect: When the client left and did not resume in time
+        """
+        if not self.resumable:
+            return await self.websocket.receive_bytes()
+
+        while True:
+            if self.websocket is None and not await self._wait_for_resume():
+                raise WebSocketDisconnect(code=1006)
+            if self._pump is None:
+                self._pump = asyncio.create_task(self._read(self.websocket))
+            item = await self._inbox.get()
+            if not isinstance(item, _Disconnected):
+                return item
+            if item.websocket is not self.websocket:
+                # A socket the session already stopped using
+                continue
+            if not isinstance(item.error, WebSocketDisconnect):
+                raise item.error
+            if item.error.code == 1000:
+                # Clean close: the client is done, not dropped
+                raise item.error
+            self._detach(item.websocket)
+
+    async def attach(self, websocket: WebSocket, codec: MessageCodec) -> asyncio.Event:
+        """
+        Attach a reconnecting client's socket and replay what it missed.
+
+        Args:
+            websocket: Accepted socket of the reconnect
+            codec: Message encoding of the reconnect
+
+        Returns:
+            Event set once the session stops using the socket
+        """
+        if self.websocket is not None:
+            # The old socket may be half-open; the new one wins
+            self.log.info("🔁 Session taken over by reconnect")
+            self._detach(self.websocket, close=True)
+        self.resumes += 1
+        self.codec = codec
+        released = self._released = asyncio.Event()
+
+        await codec.send(websocket, self.describe())
+        # Messages held during the replay's awaits are replayed too
+        replayed = 0
+        while self._pending or self._last_interim is not None:
+            if self._pending:
+                message = self._pending.popleft()
+            else:
+                message, self._last_interim = self._last_interim, None
+            await codec.send(websocket, dict(message, replayed=True))
+            replayed += 1
+        self.replayed += replayed
+        if self.closed:
+            # The session ended while replaying
+            released.set()
+            return released
+
+        self.websocket = websocket
+        if self._pump is not None:
+            self._pump.cancel()
+        self._pump = asyncio.create_task(self._read(websocket))
+        self._attached.set()
+        SESSION_RESUMES.inc(outcome="resumed")
+        self.log.info("🔁 Session resumed", resumes=self.resumes, replayed=replayed)
+        return released
+
+    async def close(self) -> None:
+        """End the session: forget its token and close the attached socket."""
+        self.closed = True
+        self._registry._remove(self)
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+        websocket, self.websocket = self.websocket, None
+        if websocket is not None:
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+        self._released.set()
+
+    async def _read(self, websocket: WebSocket) -> None:
+        """Pump one socket's messages into the inbox until it fails."""
+        try:
+            while True:
+                await self._inbox.put(await websocket.receive_bytes())
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await self._inbox.put(_Disconnected(websocket, e))
+
+    async def _wait_for_resume(self) -> bool:
+        """Wait up to the grace period for a reconnect; True if one attached."""
+        try:
+            await asyncio.wait_for(self._attached.wait(), self.grace)
+            return True
+        except asyncio.TimeoutError:
+            # The session winds down from here; a late reconnect starts a new one
+            self._registry._remove(self)
+            SESSION_RESUMES.inc(outcome="expired")
+            self.log.info("⌛ Session not resumed within grace period", grace_s=self.grace, held=len(self._pending))
+            return False
+
+    def _detach(self, websocket: WebSocket, close: bool = False) -> None:
+        """Stop using a socket; the session waits for a reconnect."""
+        if self.websocket is not websocket:
+            return
+        self.websocket = None
+        self._attached.clear()
+        self._released.set()
+        if close:
+            # Its pending receive may never return
+            if self._pump is not None:
+                self._pump.cancel()
+                self._pump = None
+            task = asyncio.create_task(self._close_superseded(websocket))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        else:
+            self.log.info("📴 Client dropped, holding session", grace_s=self.grace)
+
+    async def _close_superseded(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=SUPERSEDED_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def _hold(self, message: dict) -> None:
+        """Keep a message for replay on resume."""
+        kind = message.get("type")
+        if kind == "transcript" and not message.get("is_final"):
+            self._last_interim = message
+            return
+        if kind not in ("transcript", "translation_final", "error"):
+            # Deltas and flow control are only useful live
+            return
+        if kind == "transcript":
+            # The final supersedes the utterance's interim
+            self._last_interim = None
+        self._pending.append(message)
+
+
+class SessionResumeRegistry:
+    """Resumable sessions by token."""
+
+    def __init__(self, grace: float = SESSION_RESUME_GRACE_S):
+        """
+        Initialize the registry.
+
+        Args:
+            grace: Seconds a dropped session waits for a reconnect (0 disables resumption)
+        """
+        self.grace = grace
+        self._sessions: Dict[str, ResumableSession] = {}
+
+    def create(self, endpoint: str, websocket: WebSocket, codec: MessageCodec, log: ContextLogger) -> ResumableSession:
+        """Register a new session attached to its first socket."""
+        session = ResumableSession(
+            self, secrets.token_urlsafe(16), endpoint, websocket, codec, log, self.grace
+        )
+        if session.resumable:
+            self._sessions[session.token] = session
+        return session
+
+    def claim(self, token: str, endpoint: str) -> Optional[ResumableSession]:
+        """
+        Look up the session a reconnect wants to resume.
+
+        Returns:
+            The session, or None if the token is unknown, expired or belongs
+            to another endpoint
+        """
+        session = self._sessions.get(token)
+        if session is None or session.closed or session.endpoint != endpoint:
+            SESSION_RESUMES.inc(outcome="unknown_token")
+            return None
+        return session
+
+    def stats(self) -> dict:
+        """Return resumable and currently detached session counts."""
+        return {
+            "grace_s": self.grace,
+            "resumable": len(self._sessions),
+            "detached": sum(session.websocket is None for session in self._sessions.values()),
+        }
+
+    def _remove(self, session: ResumableSession) -> None:
+        self._sessions.pop(session.token, None)
+
+
+# Singleton instance for reuse
+_session_resume_registry: Optional[SessionResumeRegistry] = None
+
+
+def get_session_resume_registry() -> SessionResumeRegistry:
+    """Get or create the session resumption registry singleton."""
+    global _session_resume_registry
+    if _session_resume_registry is None:
+        _session_resume_registry = SessionResumeRegistry()
+    return _session_resume_registry
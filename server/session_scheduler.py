@@ -0,0 +1,222 @@
+"""
+Session Scheduler
+Admission control and slot accounting for concurrent STT sessions
+"""
+
+import asyncio
+import collections
+import itertools
+import time
+from typing import Callable, Dict, Optional
+from config import STT_MAX_SESSIONS, STT_ADMISSION_QUEUE, STT_ADMISSION_TIMEOUT
+from logger import get_logger
+
+logger = get_logger("session_scheduler")
+
+
+class ServerBusyError(Exception):
+    """Raised when a session cannot be admitted within the admission limits."""
+
+
+class SessionSlot:
+    """
+    Capacity slot held by one WebSocket session for its whole lifetime.
+    """
+
+    def __init__(self, scheduler: "SessionScheduler", session_id: int, endpoint: str, wait_time: float):
+        """
+        Initialize the slot.
+
+        Args:
+            scheduler: Scheduler that granted the slot
+            session_id: Process-unique session number
+            endpoint: Endpoint path the session connected to
+            wait_time: Seconds spent in the admission queue
+        """
+        self._scheduler = scheduler
+        self.session_id = session_id
+        self.endpoint = endpoint
+        self.wait_time = wait_time
+        self.admitted_at = time.monotonic()
+        self.streams_opened = 0
+        self.released = False
+        # Named per-session counters, collected when the slot is inspected
+        self._stats: Dict[str, Callable[[], dict]] = {}
+
+    def stream_started(self) -> None:
+        """Record that the session opened (or restarted) an upstream stream."""
+        self.streams_opened += 1
+
+    def add_stats(self, name: str, provider: Callable[[], dict]) -> None:
+        """
+        Register a per-session counter source (e.g. the VAD gate).
+
+        Args:
+            name: Key the counters appear under in the snapshot
+            provider: Callable returning the current counters
+        """
+        self._stats[name] = provider
+
+    def release(self) -> None:
+        """Return the slot to the scheduler. Safe to call more than once."""
+        if not self.released:
+            self.released = True
+            self._scheduler._release(self)
+
+    def snapshot(self) -> dict:
+        """Return the slot's accounting data."""
+        snapshot = {
+            "session_id": self.session_id,
+            "endpoint": self.endpoint,
+            "age": round(time.monotonic() - self.admitted_at, 3),
+            "wait_time": round(self.wait_time, 3),
+            "streams_opened": self.streams_opened,
+        }
+        for name, provider in self._stats.items():
+            snapshot[name] = provider()
+        return snapshot
+
+
+class SessionScheduler:
+    """
+    Limits concurrent sessions and queues the overflow in FIFO order.
+
+    Sessions beyond ``max_sessions`` wait in the admission queue for at most
+    ``max_wait`` seconds. When the queue is full or the wait expires the
+    session is rejected with ServerBusyError instead of stalling silently.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = STT_MAX_SESSIONS,
+        max_queue: int = STT_ADMISSION_QUEUE,
+        max_wait: float = STT_ADMISSION_TIMEOUT,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_sessions: Maximum concurrently admitted sessions
+            max_queue: Maximum sessions waiting for a slot
+            max_wait: Maximum seconds a session may wait for a slot
+        """
+        self.max_sessions = max_sessions
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._slots: Dict[int, SessionSlot] = {}
+        self._waiters = collections.deque()
+        # Slots promised to woken waiters that have not registered yet
+        self._reserved = 0
+        self._ids = itertools.count(1)
+
+        # Counters for monitoring
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def active(self) -> int:
+        """Number of sessions currently holding a slot."""
+        return len(self._slots)
+
+    @property
+    def queued(self) -> int:
+        """Number of sessions waiting for a slot."""
+        return len(self._waiters)
+
+    async def admit(self, endpoint: str) -> SessionSlot:
+        """
+        Acquire a slot, waiting in the admission queue if the node is full.
+
+        Args:
+            endpoint: Endpoint path the session connected to
+
+        Returns:
+            SessionSlot to release when the session ends
+
+        Raises:
+            ServerBusyError: If the queue is full or the wait timed out
+        """
+        if self.active + self._reserved < self.max_sessions and not self._waiters:
+            return self._grant(endpoint, 0.0)
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise ServerBusyError("Server busy: admission queue is full, please retry later")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self.rejected += 1
+                raise ServerBusyError(
+                    f"Server busy: no session slot freed within {self.max_wait:g}s, please retry later"
+                )
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot we were already promised
+            if waiter.done() and not waiter.cancelled():
+                self._reserved -= 1
+                self._handoff()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        self._reserved -= 1
+        return self._grant(endpoint, time.monotonic() - started)
+
+    def active_by_endpoint(self) -> Dict[str, int]:
+        """Number of admitted sessions per endpoint."""
+        counts: Dict[str, int] = {}
+        for slot in self._slots.values():
+            counts[slot.endpoint] = counts.get(slot.endpoint, 0) + 1
+        return counts
+
+    def sessions(self) -> list:
+        """Return accounting data for every admitted session."""
+        return [slot.snapshot() for slot in self._slots.values()]
+
+    def _grant(self, endpoint: str, wait_time: float) -> SessionSlot:
+        """Create and register a slot."""
+        slot = SessionSlot(self, next(self._ids), endpoint, wait_time)
+        self._slots[slot.session_id] = slot
+        self.admitted += 1
+        logger.info(
+            "🎟️ Session admitted",
+            session=slot.session_id,
+            endpoint=endpoint,
+            active=f"{self.active}/{self.max_sessions}",
+            waited_s=round(wait_time, 2),
+        )
+        return slot
+
+    def _release(self, slot: SessionSlot) -> None:
+        """Unregister a slot and wake the next waiter."""
+        self._slots.pop(slot.session_id, None)
+        self._handoff()
+
+    def _handoff(self) -> None:
+        """Wake the oldest live waiter while slots are free."""
+        while self._waiters and self.active + self._reserved < self.max_sessions:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._reserved += 1
+                waiter.set_result(None)
+
+
+# Singleton instance for reuse
+_session_scheduler: Optional[SessionScheduler] = None
+
+
+def get_session_scheduler() -> SessionScheduler:
+    """Get or create the session scheduler singleton."""
+    global _session_scheduler
+    if _session_scheduler is None:
+        _session_scheduler = SessionScheduler()
+    return _session_scheduler
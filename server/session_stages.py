@@ -0,0 +1,397 @@
+"""
+Session Stages
+Pipeline stages of the streaming WebSocket endpoints
+"""
+
+import asyncio
+import functools
+import time
+from typing import AsyncIterator, Optional
+from fastapi import WebSocketDisconnect
+from config import LOG_SAMPLE_EVERY, TRANSLATION_BATCH_ENABLED
+from logger import ContextLogger
+from metrics import AUDIO_BYTES, AUDIO_CHUNKS, AUDIO_QUEUE_PEAK, ERRORS, STREAM_RESTARTS
+from audio_bridge import AudioBridge
+from audio_codecs import LINEAR16, AudioInput, to_linear16
+from audio_reframer import AudioReframer
+from latency_trace import finish_trace
+from session_resume import ResumableSession
+from session_scheduler import SessionSlot
+from stream_pipeline import SourceStage, Stage
+from stream_pool import get_stream_pool
+from stt_service import AUDIO_FRAME_MS, STTStreamingService
+from translation_batcher import BatchingTranslator, get_translation_batcher
+from translation_service import TranslationService, get_translation_service
+from translation_stage import TranslationStage
+from voice_activity import VoiceActivityGate
+
+# Rollovers at the streaming limit happen inside stream_recognize and don't
+# count; this only bounds restarts after errors or idle periods
+MAX_STREAM_RESTARTS = 100
+
+
+def _is_stream_limit(error: str) -> bool:
+    return "5 minutes" in error or "Max duration" in error
+
+
+class SessionContext:
+    """What the stages of one WebSocket session share."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        slot: SessionSlot,
+        log: ContextLogger,
+        session: ResumableSession,
+        audio_input: AudioInput,
+        audio_bridge: AudioBridge,
+    ):
+        """
+        Initialize the context.
+
+        Args:
+            endpoint: Endpoint path, for metrics
+            slot: The session's admission slot
+            log: Session logger
+            session: Client side of the session (socket, resumption)
+            audio_input: Negotiated client audio
+            audio_bridge: Audio queued for the recognizer
+        """
+        self.endpoint = endpoint
+        self.slot = slot
+        self.log = log
+        self.session = session
+        self.audio_input = audio_input
+        self.audio_bridge = audio_bridge
+
+
+class IngestStage(SourceStage):
+    """
+    Reads the client's audio messages.
+
+    An empty message means the client is done: the rest of the pipeline
+    drains, so the last results still reach it. A disconnect (after the
+    resumption grace period, if any) stops the pipeline.
+    """
+
+    name = "ingest"
+
+    def __init__(self, context: SessionContext):
+        super().__init__()
+        self.context = context
+
+    async def produce(self) -> AsyncIterator[bytes]:
+        context = self.context
+        try:
+            while True:
+                data = await context.session.receive_bytes()
+                if not data:
+                    return
+                AUDIO_CHUNKS.inc(endpoint=context.endpoint)
+                AUDIO_BYTES.inc(len(data), endpoint=context.endpoint)
+                yield data
+                # Under the pause policy, stop reading while the queue is too deep
+                await context.audio_bridge.pace()
+                # Sampled: this runs for every client chunk
+                if context.log.sample("client_audio", every=LOG_SAMPLE_EVERY):
+                    context.log.debug("🎵 Received audio chunks", chunks=self.items, bytes=len(data))
+        except WebSocketDisconnect:
+            context.log.info("🔌 Client disconnected")
+        except Exception as e:
+            ERRORS.inc(category="receive")
+            context.log.error("❌ Error receiving audio", error=e)
+        self.pipeline.stop()
+
+
+class AudioStage(Stage):
+    """
+    Converts client audio and queues it for the recognizer.
+
+    Audio is decoded if needed, then cut into AUDIO_FRAME_MS frames, and
+    silence is gated out. The rest goes to the session's AudioBridge, which
+    the recognize stage streams upstream. Passthrough codecs are framed
+    while this stage processes the message. Decoded codecs are framed
+    when the decoder hands back their audio.
+    """
+
+    name = "audio"
+
+    def __init__(self, context: SessionContext):
+        super().__init__()
+        self.context = context
+        audio_format = context.audio_input.format
+        # Only speech (plus hangover/pre-roll) is forwarded upstream; μ-law/A-law
+        # is measured as LINEAR16 but forwarded as received
+        self.vad_gate = VoiceActivityGate(
+            audio_format.sample_rate,
+            audio_format.sample_width,
+            decode=None if audio_format == LINEAR16 else functools.partial(to_linear16, audio_format=audio_format),
+        )
+        self.reframer = AudioReframer(audio_format.frame_bytes(AUDIO_FRAME_MS))
+
+    async def open(self) -> None:
+        """
+        Start the session's audio input.
+
+        Raises:
+            ServerBusyError: If the codec needs a decoder and none is free
+        """
+        context = self.context
+        context.audio_input.start(self._queue_audio, self._finish_audio)
+        context.slot.add_stats("vad", self.vad_gate.stats)
+        context.slot.add_stats("codec", context.audio_input.stats)
+        context.slot.add_stats("audio_queue", context.audio_bridge.queue_stats)
+
+    async def process(self, data: bytes) -> None:
+        self.context.audio_input.feed(data)
+
+    async def finish(self) -> None:
+        self.context.audio_input.end()
+
+    async def close(self) -> None:
+        context = self.context
+        # Lets a decoder worker finish if the receiver stopped early
+        context.audio_input.end()
+        audio_bridge = context.audio_bridge
+        bytes_per_ms = context.audio_input.format.bytes_per_ms
+        AUDIO_QUEUE_PEAK.observe(audio_bridge.peak_bytes / bytes_per_ms / 1000)
+        if audio_bridge.dropped_bytes or audio_bridge.throttle_events:
+            context.log.info("🚦 Audio queue stats", **audio_bridge.queue_stats())
+        if self.vad_gate.enabled:
+            context.log.info("🔇 VAD stats", **self.vad_gate.stats())
+        if context.audio_input.codec != "linear16":
+            context.log.info("🎚️ Codec stats", **context.audio_input.stats())
+
+    def _queue_audio(self, data: bytes) -> None:
+        """Reframe audio into fixed frames, gate silence, and queue the rest upstream."""
+        # Decoded audio is stamped when the decoder delivers it
+        received_at = time.monotonic()
+        for frame in self.reframer.push(data):
+            for chunk in self.vad_gate.process(frame):
+                self.context.audio_bridge.put(chunk, received_at)
+
+    def _finish_audio(self) -> None:
+        """Queue the trailing partial frame and signal end of audio."""
+        tail = self.reframer.flush()
+        if tail:
+            self.context.audio_bridge.put(tail)
+        self.context.audio_bridge.close()
+
+
+class RecognizeStage(SourceStage):
+    """
+    Streams the session's audio to the recognizer and yields its results.
+
+    A stream starts once audio is queued. When a stream ends while audio
+    is still waiting, a new stream starts. When it ends with nothing
+    queued, the stage waits for audio again. The stage stops when the
+    audio ends. Stream-limit errors restart the stream. Other errors are
+    passed on as error results.
+    """
+
+    name = "recognize"
+
+    def __init__(self, context: SessionContext):
+        """
+        Initialize the stage.
+
+        Raises:
+            Exception: If the recognizer client can't be created
+        """
+        super().__init__()
+        self.context = context
+        self.audio_format = context.audio_input.format
+        # Only the default format can use the pre-warmed streams
+        self.stream_factory = get_stream_pool().acquire if self.audio_format == LINEAR16 else None
+        self.stt_service = STTStreamingService(context.log, self.audio_format)
+        self.restarts = 0
+
+    async def produce(self) -> AsyncIterator[dict]:
+        log = self.context.log
+        audio_bridge = self.context.audio_bridge
+        # Used to stop the request generator when the stage stops
+        stop_event = asyncio.Event()
+        try:
+            while self.restarts < MAX_STREAM_RESTARTS:
+                try:
+                    # Wait for first audio chunk before starting Google Cloud stream
+                    log.debug("⏳ 오디오 대기 중...", attempt=self.restarts + 1)
+                    if not await audio_bridge.wait_for_audio():
+                        return
+
+                    stop_event.clear()
+                    self.context.slot.stream_started()
+                    log.info("🔄 Starting STT stream", attempt=self.restarts + 1)
+
+                    results = self.stt_service.stream_recognize(
+                        audio_bridge, stop_event, stream_factory=self.stream_factory
+                    )
+                    try:
+                        async for result in results:
+                            if "error" in result and _is_stream_limit(result["error"]):
+                                log.warning("⚠️ Stream limit reached, will restart...")
+                                break
+                            yield result
+                    finally:
+                        await results.aclose()
+
+                    # Detach the finished stream's request thread from the bridge
+                    audio_bridge.interrupt()
+
+                    # Stream ended - only restart right away if audio is waiting (4-min limit case)
+                    if not audio_bridge.empty():
+                        self.restarts += 1
+                        STREAM_RESTARTS.inc(reason="stream_ended")
+                        log.info("🔄 Restarting STT stream", attempt=self.restarts)
+                        self.stt_service = STTStreamingService(log, self.audio_format)
+                        await asyncio.sleep(0.1)  # Brief pause before restart
+                    else:
+                        # No audio in queue - go back to waiting mode instead of restarting
+                        STREAM_RESTARTS.inc(reason="idle")
+                        log.info("⏸️ STT 스트림 종료 - 오디오 대기 모드로 전환")
+                        self.stt_service = STTStreamingService(log, self.audio_format)
+
+                except Exception as e:
+                    error_str = str(e)
+                    ERRORS.inc(category="session")
+                    log.error("❌ Error in recognize stage", error=e)
+
+                    # Timeout because no audio came: go back to waiting mode
+                    if "409" in error_str or "timed out" in error_str.lower():
+                        STREAM_RESTARTS.inc(reason="timeout")
+                        log.info("⏸️ 타임아웃 - 오디오 대기 모드로 전환")
+                        self.stt_service = STTStreamingService(log, self.audio_format)
+                        continue
+
+                    if _is_stream_limit(error_str):
+                        self.restarts += 1
+                        STREAM_RESTARTS.inc(reason="max_duration")
+                        log.info("🔄 Restarting after timeout", attempt=self.restarts)
+                        self.stt_service = STTStreamingService(log, self.audio_format)
+                        await asyncio.sleep(0.1)
+                        continue
+
+                    # Not restartable: report it and stop recognizing
+                    yield {"error": error_str}
+                    return
+        finally:
+            stop_event.set()
+            audio_bridge.interrupt()
+
+
+class TranscriptStage(Stage):
+    """Turns recognizer results into client messages."""
+
+    name = "transcript"
+
+    def __init__(self, segments: bool = False):
+        """
+        Initialize the stage.
+
+        Args:
+            segments: Number transcripts with a segment_id that increments after every final
+        """
+        super().__init__()
+        self.segment_id: Optional[int] = 0 if segments else None
+
+    async def process(self, result: dict) -> dict:
+        if "error" in result:
+            message = {"type": "error", "message": result["error"]}
+            if "timestamp" in result:
+                message["timestamp"] = result["timestamp"]
+            return message
+
+        is_final = result.get("is_final", False)
+        message = {"type": "transcript"}
+        if self.segment_id is not None:
+            message["segment_id"] = self.segment_id
+            if is_final:
+                self.segment_id += 1
+        message["transcript"] = result["transcript"]
+        message["is_final"] = is_final
+        message["timestamp"] = result["timestamp"]
+
+        # Add confidence if available (usually only for final results)
+        if "confidence" in result:
+            message["confidence"] = result["confidence"]
+        # Completed by the send stage, so it covers the time spent queued
+        if "trace" in result:
+            message["trace"] = result["trace"]
+        return message
+
+
+class TranslateStage(Stage):
+    """
+    Translates transcripts next to the result stream.
+
+    Each transcript is passed on first, then handed to a TranslationStage.
+    Its translation_delta and translation_final follow-ups go into the same
+    queue when they arrive, so the client always gets a transcript before
+    its translation. When the results end, translations of finals already
+    under way are finished before the send stage is told.
+    """
+
+    name = "translate"
+
+    def __init__(
+        self,
+        context: SessionContext,
+        translation_service: TranslationService,
+        batcher: Optional[BatchingTranslator] = None,
+    ):
+        """
+        Initialize the stage.
+
+        Args:
+            context: Session context
+            translation_service: Service used to translate text
+            batcher: Optional batching translator used for final segments
+        """
+        super().__init__()
+        self.context = context
+        self.translation = TranslationStage(translation_service, self.emit, batcher=batcher, log=context.log)
+
+    @classmethod
+    async def create(cls, context: SessionContext) -> "TranslateStage":
+        """Build the stage on the shared translation service (and batcher, if enabled)."""
+        return cls(
+            context,
+            await get_translation_service(),
+            batcher=await get_translation_batcher() if TRANSLATION_BATCH_ENABLED else None,
+        )
+
+    async def process(self, message: dict) -> None:
+        await self.emit(message)
+        if message["type"] == "transcript":
+            self.translation.submit(message["segment_id"], message["transcript"], message["is_final"])
+
+    async def finish(self) -> None:
+        await self.translation.flush()
+
+    async def close(self) -> None:
+        await self.translation.close()
+
+
+class SendStage(Stage):
+    """Sends messages to the client (held for replay while a resumable session is detached)."""
+
+    name = "send"
+
+    def __init__(self, context: SessionContext):
+        super().__init__()
+        self.context = context
+
+    async def process(self, message: dict) -> None:
+        if "trace" in message:
+            message["trace"] = finish_trace(message["trace"])
+        await self.context.session.send(message)
+
+        # Logging (interims are sampled)
+        if message["type"] != "transcript":
+            return
+        log = self.context.log
+        fields = {"segment_id": message["segment_id"]} if "segment_id" in message else {}
+        if message["is_final"]:
+            log.info("✅ → 클라이언트 전송 (final)", transcript=message["transcript"][:50], **fields)
+        elif log.sample("interim_sent", every=LOG_SAMPLE_EVERY):
+            log.debug("💬 → 클라이언트 전송 (interim)", transcript=message["transcript"][:50], **fields)
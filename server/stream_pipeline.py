@@ -0,0 +1,241 @@
+"""
+Stream Pipeline
+Runs a streaming session as a chain of stages connected by bounded queues
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional
+from config import PIPELINE_QUEUE_SIZE
+from logger import ContextLogger, get_logger
+from metrics import PIPELINE_BLOCKED, PIPELINE_STAGE_SECONDS
+
+logger = get_logger("stream_pipeline")
+
+# Inbox marker: the stage before has finished
+_END = object()
+
+
+class Stage:
+    """
+    One step of a StreamPipeline.
+
+    The stage reads items from its inbox, a bounded queue that the stage
+    before it fills, and passes each one to ``process``. Whatever
+    ``process`` returns (None means nothing) goes to the next stage's inbox.
+    When that inbox is full, the stage waits, so a slow stage holds back
+    the stages before it. ``concurrency`` workers process items at once;
+    stages whose output order matters keep the default of one.
+    """
+
+    name = "stage"
+
+    def __init__(self, concurrency: int = 1, queue_size: int = PIPELINE_QUEUE_SIZE):
+        """
+        Initialize the stage.
+
+        Args:
+            concurrency: Items processed at once
+            queue_size: Items that may wait in the stage's inbox
+        """
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.pipeline: Optional["StreamPipeline"] = None
+        self.items = 0
+        self.emitted = 0
+        self.busy_s = 0.0
+        self.blocked_s = 0.0
+        self.queue_peak = 0
+        self._inbox: Optional[asyncio.Queue] = None
+        self._next: Optional["Stage"] = None
+        self._labels: Dict[str, str] = {}
+
+    async def open(self) -> None:
+        """Acquire what the stage needs before the pipeline runs (raising refuses the session)."""
+
+    async def process(self, item):
+        """
+        Handle one item.
+
+        Returns:
+            Item for the next stage, or None
+        """
+        raise NotImplementedError
+
+    async def finish(self) -> None:
+        """Called after the last item, before the next stage is told that no more will come."""
+
+    async def close(self) -> None:
+        """Release the stage's resources; called once the pipeline has ended, however it ended."""
+
+    async def emit(self, item) -> None:
+        """Hand an item to the next stage, waiting while its inbox is full."""
+        if self._next is None:
+            raise RuntimeError(f"Pipeline stage '{self.name}' has no next stage")
+        inbox = self._next._inbox
+        if inbox.full():
+            started = time.perf_counter()
+            await inbox.put(item)
+            blocked = time.perf_counter() - started
+            self.blocked_s += blocked
+            PIPELINE_BLOCKED.inc(blocked, **self._labels)
+        else:
+            inbox.put_nowait(item)
+        self.emitted += 1
+        self._next.queue_peak = max(self._next.queue_peak, inbox.qsize())
+
+    def stats(self) -> dict:
+        """Return item counts and time spent, for /sessions."""
+        stats = {
+            "items": self.items,
+            "emitted": self.emitted,
+            "busy_ms": int(self.busy_s * 1000),
+            "blocked_ms": int(self.blocked_s * 1000),
+        }
+        if self._inbox is not None:
+            stats["queued"] = self._inbox.qsize()
+            stats["queue_peak"] = self.queue_peak
+        return stats
+
+
+class SourceStage(Stage):
+    """A stage that produces items itself instead of reading an inbox."""
+
+    def __init__(self):
+        super().__init__(concurrency=1, queue_size=0)
+
+    def produce(self) -> AsyncIterator:
+        """Async iterator of the items for the next stage; returning ends the chain."""
+        raise NotImplementedError
+
+
+class StreamPipeline:
+    """
+    The stages of one session, each running in its own task.
+
+    Stages are chained in list order, and the first one must be a source.
+    A source later in the list starts a new chain. The stage before it ends
+    the previous chain and hands its output over some other way. For
+    example, the audio stage feeds the AudioBridge, and the recognize stage
+    streams that bridge to the recognizer.
+
+    A source that returns ends its chain. Each later stage finishes what
+    is queued before it finishes itself. ``stop`` ends every stage at once,
+    which is what happens when the client is gone. If a stage raises, the
+    other stages are stopped and ``run`` re-raises the error.
+
+    Every stage records items, busy time and time blocked on the next stage
+    (``stats``). Per-item processing times go to stt_pipeline_stage_seconds.
+    """
+
+    def __init__(self, stages: List[Stage], endpoint: str, log: Optional[ContextLogger] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages: Stages in order, starting with a source
+            endpoint: Endpoint label of the stage metrics
+            log: Session logger (module logger if omitted)
+        """
+        if not stages or not isinstance(stages[0], SourceStage):
+            raise ValueError("A pipeline starts with a source stage")
+        self.stages = stages
+        self.log = log or logger
+        self.stopped = False
+        self._tasks: List[asyncio.Task] = []
+
+        for stage, following in zip(stages, stages[1:] + [None]):
+            stage.pipeline = self
+            stage._labels = {"endpoint": endpoint, "stage": stage.name}
+            if following is not None and not isinstance(following, SourceStage):
+                following._inbox = asyncio.Queue(following.queue_size)
+                stage._next = following
+
+    async def open(self) -> None:
+        """Open every stage in order; if one raises, those already open are closed."""
+        opened = []
+        try:
+            for stage in self.stages:
+                await stage.open()
+                opened.append(stage)
+        except BaseException:
+            await self._close(opened)
+            raise
+
+    async def run(self) -> None:
+        """
+        Run until every stage is done (or stopped), then close the stages.
+
+        Raises:
+            Exception: The first error raised by a stage
+        """
+        self._tasks = [
+            asyncio.create_task(self._run_stage(stage), name=f"pipeline-{stage.name}")
+            for stage in self.stages
+        ]
+        try:
+            await asyncio.wait(self._tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self._close(self.stages)
+
+        for task in self._tasks:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    def stop(self) -> None:
+        """End every stage now, without draining queued items."""
+        self.stopped = True
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """Return every stage's stats by name."""
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    async def _run_stage(self, stage: Stage) -> None:
+        if isinstance(stage, SourceStage):
+            items = stage.produce()
+            try:
+                async for item in items:
+                    stage.items += 1
+                    await stage.emit(item)
+            finally:
+                await items.aclose()
+        else:
+            await asyncio.gather(*(self._work(stage) for _ in range(stage.concurrency)))
+
+        if self.stopped:
+            return
+        await stage.finish()
+        if stage._next is not None:
+            await stage._next._inbox.put(_END)
+
+    async def _work(self, stage: Stage) -> None:
+        """One worker of a stage: process inbox items until the stage before finishes."""
+        inbox = stage._inbox
+        while True:
+            item = await inbox.get()
+            if item is _END:
+                # Leave it for the stage's other workers
+                inbox.put_nowait(_END)
+                return
+            stage.items += 1
+            started = time.perf_counter()
+            output = await stage.process(item)
+            elapsed = time.perf_counter() - started
+            stage.busy_s += elapsed
+            PIPELINE_STAGE_SECONDS.observe(elapsed, **stage._labels)
+            if output is not None:
+                await stage.emit(output)
+
+    async def _close(self, stages: List[Stage]) -> None:
+        for stage in stages:
+            try:
+                await stage.close()
+            except Exception as e:
+                self.log.warning("⚠️ Failed to close pipeline stage", stage=stage.name, error=e)
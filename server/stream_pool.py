@@ -0,0 +1,157 @@
+"""
+Streaming Session Pool
+Keeps pre-opened streaming_recognize calls ready so new sessions skip stream setup
+"""
+
+import asyncio
+import collections
+from typing import Optional, Union
+from config import STT_POOL_SIZE, STT_POOL_TTL
+from logger import get_logger
+from region_router import Region
+from stt_service import AsyncStreamHandle, STTStreamingService, StreamHandle
+
+logger = get_logger("stream_pool")
+
+
+class StreamPool:
+    """
+    Pool of pre-warmed Google streaming sessions.
+
+    Every pooled stream has already sent its config request and is parked
+    waiting for audio. Streams older than the TTL are recycled before Google
+    closes them for inactivity. Pooled streams are configured for the
+    default 16 kHz LINEAR16 input; sessions with another codec open their own.
+    Streams are opened in the region the router currently prefers; when the
+    preference moves, streams left in other regions are recycled.
+    """
+
+    def __init__(self, size: int = STT_POOL_SIZE, ttl: float = STT_POOL_TTL):
+        """
+        Initialize the pool.
+
+        Args:
+            size: Number of idle streams to keep ready
+            ttl: Seconds an idle stream may wait before being recycled
+        """
+        self.size = size
+        self.ttl = ttl
+        self._idle = collections.deque()
+        self._refill = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters for monitoring
+        self.claimed = 0
+        self.missed = 0
+        self.recycled = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Check if the pool keeps any streams warm."""
+        return self.size > 0
+
+    @property
+    def idle(self) -> int:
+        """Number of pre-warmed streams waiting to be claimed."""
+        return len(self._idle)
+
+    def start(self) -> None:
+        """Start the background maintenance task on the running loop."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+            logger.info("♨️ Stream pool started", size=self.size, ttl_s=self.ttl)
+
+    async def stop(self) -> None:
+        """Stop maintenance and release every idle stream."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._idle:
+            self._idle.popleft().discard()
+
+    def claim(self, region: Optional[Region] = None) -> Optional[Union[StreamHandle, AsyncStreamHandle]]:
+        """
+        Take a ready stream out of the pool.
+
+        Args:
+            region: Only take a stream opened in this region (any if omitted)
+
+        Returns:
+            A pre-opened stream handle, or None if the pool has none
+        """
+        for stream in list(self._idle):
+            if not (stream.alive and stream.age < self.ttl):
+                self._idle.remove(stream)
+                self._recycle(stream)
+            elif region is None or stream.region is region:
+                self._idle.remove(stream)
+                self.claimed += 1
+                self._refill.set()
+                return stream
+
+        if self.enabled:
+            self.missed += 1
+            self._refill.set()
+        return None
+
+    def acquire(self, region: Optional[Region] = None) -> Union[StreamHandle, AsyncStreamHandle]:
+        """
+        Claim a ready stream, or open a new one if the pool has none.
+
+        Args:
+            region: Region the stream must be in (the router's choice if omitted)
+
+        Returns:
+            Stream handle with its config request already sent
+        """
+        region = region or STTStreamingService.select_region()
+        return self.claim(region) or STTStreamingService.open_stream(region=region)
+
+    def _recycle(self, stream: Union[StreamHandle, AsyncStreamHandle]) -> None:
+        """Discard an expired or dead idle stream."""
+        stream.discard()
+        self.recycled += 1
+
+    def _top_up(self) -> None:
+        """Drop expired streams and those of other regions, and open new ones up to the target size."""
+        region = STTStreamingService.select_region(count=False)
+        fresh = collections.deque()
+        for stream in self._idle:
+            if stream.alive and stream.age < self.ttl and stream.region is region:
+                fresh.append(stream)
+            else:
+                self._recycle(stream)
+        self._idle = fresh
+
+        while len(self._idle) < self.size:
+            try:
+                self._idle.append(STTStreamingService.open_stream(region=region))
+            except Exception as e:
+                logger.error("❌ Failed to pre-open STT stream", error=e)
+                break
+
+    async def _maintain(self) -> None:
+        """Keep the pool full and recycle streams before they expire."""
+        while True:
+            self._refill.clear()
+            self._top_up()
+            try:
+                await asyncio.wait_for(self._refill.wait(), timeout=self.ttl / 4)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Singleton instance for reuse
+_stream_pool: Optional[StreamPool] = None
+
+
+def get_stream_pool() -> StreamPool:
+    """Get or create the stream pool singleton."""
+    global _stream_pool
+    if _stream_pool is None:
+        _stream_pool = StreamPool()
+    return _stream_pool
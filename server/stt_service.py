@@ -5,33 +5,73 @@ Based on streaming_test.py
 
 import os
 import time
-import queue
 import asyncio
-import concurrent.futures
-import datetime
-from typing import AsyncGenerator, Optional
-from google.cloud.speech_v2 import SpeechClient
+import threading
+from typing import AsyncGenerator, AsyncIterator, Callable, Iterator, Optional, Union
+from google.cloud.speech_v2 import SpeechAsyncClient, SpeechClient
 from google.cloud.speech_v2.types import cloud_speech as cloud_speech_types
-from google.api_core.client_options import ClientOptions
 from dotenv import load_dotenv
 from pathlib import Path
+from audio_bridge import MAX_REQUEST_BYTES, AudioBridge
+from audio_codecs import LINEAR16, AudioFormat
+from config import (
+    LOG_SAMPLE_EVERY,
+    MOCK_STT_ADDRESS,
+    MOCK_STT_REGION_LATENCY_MS,
+    MOCK_STT_REGION_SETUP_MS,
+    STT_BACKEND,
+    STT_REGION_LANGUAGES,
+    STT_REGION_PROBE_TIMEOUT,
+    STT_REGIONS,
+)
+from logger import ContextLogger, get_logger, log_task_error
+from recognizer_backend import GoogleBackend, MockBackend, RecognizerBackend
+from region_router import Region, RegionRouter, parse_region_map
+from metrics import (
+    ERRORS,
+    INTERIM_TO_FINAL,
+    REGION_HEALTHY,
+    REGION_LATENCY,
+    RESULTS,
+    STREAM_RESTARTS,
+    TIME_TO_FIRST_INTERIM,
+    UPSTREAM_BYTES,
+    UPSTREAM_REQUESTS,
+)
 
 # Load environment variables
 load_dotenv()
 
 # Project settings
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT", "telos-7b2f6")
-LOCATION = os.getenv("STT_LOCATION", "asia-northeast1")
 MODEL = os.getenv(
     "STT_MODEL", "chirp_3"
 )  # "long" is fastest for streaming interim results (supports Korean)
 
 # Audio settings
-# Sample rate for STT - must match client (Google recommends 16kHz or higher)
-INPUT_SAMPLE_RATE = 16000
-# 50ms frame size for faster interim results
-CHUNK_SIZE = int(INPUT_SAMPLE_RATE / 20)  # 800 samples = 50ms at 16kHz
+# Default sample rate for STT - must match client (Google recommends 16kHz or higher);
+# clients may negotiate other encodings per session (see audio_codecs)
+INPUT_SAMPLE_RATE = LINEAR16.sample_rate
+# Upstream frame duration; client audio is reframed to CHUNK_SIZE samples
+# (50ms frames give fast interim results)
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", 50))
+CHUNK_SIZE = int(INPUT_SAMPLE_RATE * AUDIO_FRAME_MS / 1000)  # 800 samples = 50ms at 16kHz
+FRAME_BYTES = CHUNK_SIZE * 2  # LINEAR16 mono
+# When a backlog builds up, merge up to this many queued frames into one request
+MAX_COALESCE_FRAMES = int(os.getenv("AUDIO_MAX_COALESCE_FRAMES", 4))
 STREAMING_LIMIT = 240000  # 4 minutes in milliseconds
+BYTES_PER_MS = INPUT_SAMPLE_RATE * 2 // 1000  # LINEAR16 mono
+
+# Stream rollover: once a stream is older than STREAMING_LIMIT - ROLLOVER_WINDOW_MS
+# it is replaced after the next final result (or at STREAMING_LIMIT at the latest),
+# and the replacement replays the audio sent since the last final, at most
+# ROLLOVER_REPLAY_MS (the size of the bridge's history)
+ROLLOVER_WINDOW_MS = int(os.getenv("STT_ROLLOVER_WINDOW_MS", 30000))
+ROLLOVER_REPLAY_MS = int(os.getenv("STT_ROLLOVER_REPLAY_MS", 3000))
+
+# Streaming engine: "thread" runs the blocking SpeechClient in a thread per stream,
+# "aio" runs the grpc.aio SpeechAsyncClient entirely on the event loop
+STT_ENGINE = os.getenv("STT_ENGINE", "thread")
 
 # Language settings (asia-northeast1 only supports single language)
 LANGUAGE_CODES = ["ko-KR"]  # Korean only (multi-language requires us/eu/global)
@@ -42,8 +82,7 @@ CREDENTIALS_PATH = os.getenv(
     str(Path(__file__).parent.parent / "telos-7b2f6-098fa70d75c7.json"),
 )
 
-# API endpoint
-API_ENDPOINT = f"{LOCATION}-speech.googleapis.com"
+logger = get_logger("stt_service")
 
 
 def get_current_time() -> int:
@@ -51,63 +90,511 @@ def get_current_time() -> int:
     return int(round(time.time() * 1000))
 
 
+def _offset_ms(offset) -> int:
+    """Convert a result offset (timedelta/Duration) to milliseconds."""
+    if not offset:
+        return 0
+    if hasattr(offset, "total_seconds"):
+        return int(offset.total_seconds() * 1000)
+    return int(offset.seconds * 1000 + offset.nanos / 1_000_000)
+
+
+def _trim_overlap(previous: str, transcript: str, min_chars: int = 4) -> str:
+    """
+    Remove the start of ``transcript`` that repeats the end of ``previous``.
+
+    Used for results of a replacement stream that re-recognizes replayed audio.
+    """
+    previous = previous.rstrip()[-200:]
+    current = transcript.lstrip()
+    for size in range(min(len(previous), len(current)), min_chars - 1, -1):
+        if previous.endswith(current[:size]):
+            return current[size:].lstrip()
+    return transcript
+
+
+def _api_endpoint(location: str) -> str:
+    """Speech v2 API endpoint of a region (``global`` has no regional prefix)."""
+    if location == "global":
+        return "speech.googleapis.com"
+    return f"{location}-speech.googleapis.com"
+
+
+def _log_stream_error(e: Exception) -> None:
+    """Log why a Google stream ended with an error."""
+    error_msg = str(e)
+    # Check if it's a normal termination error
+    if "OutOfRange" in error_msg or "stream ended" in error_msg.lower():
+        logger.info("🔚 Stream ended by client")
+    elif "encoding" in error_msg.lower() or "audio data" in error_msg.lower():
+        ERRORS.inc(category="upstream_audio")
+        logger.warning(
+            "⚠️ Audio encoding issue (likely due to early termination)", error=error_msg[:100]
+        )
+    else:
+        ERRORS.inc(category="upstream")
+        logger.error("❌ Error in process_responses", error=e)
+
+
+def _region_latencies(regions) -> dict:
+    """stt_region_latency_ms values of the regions that have samples."""
+    values = {}
+    for region in regions:
+        if region.setup_ms is not None:
+            values[(region.name, "setup")] = region.setup_ms
+        if region.first_result_ms is not None:
+            values[(region.name, "first_result")] = region.first_result_ms
+    return values
+
+
+class StreamHandle:
+    """
+    A streaming_recognize call that is already open and has sent its config.
+
+    The blocking gRPC call runs in its own thread. Until ``attach`` is called the
+    request iterator parks right after the config request, so a handle can be
+    opened ahead of time (see ``stream_pool``) and claimed when audio arrives.
+    """
+
+    # attach() expects a blocking iterator of audio requests
+    asynchronous = False
+
+    def __init__(
+        self,
+        client: SpeechClient,
+        config_request: cloud_speech_types.StreamingRecognizeRequest,
+        region: Optional[Region] = None,
+    ):
+        """
+        Open the stream and send the config request.
+
+        Args:
+            client: SpeechClient used for the call
+            config_request: Initial configuration request
+            region: Region the call goes to (told about outages)
+        """
+        self.client = client
+        self.config_request = config_request
+        self.region = region
+        self.created_at = time.monotonic()
+
+        self._attached = threading.Event()
+        self._discarded = False
+        self._finished = False
+        self._audio_requests: Optional[Iterator] = None
+
+        # Responses that arrive before attach() (normally only the end marker)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._response_queue: Optional[asyncio.Queue] = None
+        self._pending = []
+
+        self._thread = threading.Thread(
+            target=self._process_responses, name="stt-stream", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        """Check if the underlying gRPC call is still open."""
+        return not self._finished and not self._discarded
+
+    @property
+    def age(self) -> float:
+        """Seconds since the stream was opened."""
+        return time.monotonic() - self.created_at
+
+    def attach(self, audio_requests: Iterator) -> None:
+        """
+        Start feeding audio into the stream.
+
+        Must be called from the event loop that consumes ``responses``.
+
+        Args:
+            audio_requests: Iterator of audio StreamingRecognizeRequest objects
+        """
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._response_queue = asyncio.Queue()
+            for item in self._pending:
+                self._response_queue.put_nowait(item)
+            self._pending.clear()
+        self._audio_requests = audio_requests
+        self._attached.set()
+
+    def discard(self) -> None:
+        """Half-close an unclaimed stream so its thread finishes."""
+        self._discarded = True
+        self._attached.set()
+
+    async def responses(self) -> AsyncGenerator:
+        """
+        Yield responses from Google as they arrive.
+
+        Yields:
+            StreamingRecognizeResponse objects, until the stream ends
+        """
+        while True:
+            response = await self._response_queue.get()
+            if response is None:
+                return
+            yield response
+
+    def _requests(self):
+        """Yield the config request, then audio once the handle is attached."""
+        logger.debug("📤 Sending config to Google Cloud")
+        yield self.config_request
+
+        self._attached.wait()
+        if self._discarded or self._audio_requests is None:
+            return
+        yield from self._audio_requests
+
+    def _deliver(self, item) -> None:
+        """Hand a response (or the None end marker) to the consuming loop."""
+        with self._lock:
+            if self._loop is None:
+                self._pending.append(item)
+                return
+            loop, response_queue = self._loop, self._response_queue
+        # Unbounded queue: put_nowait never blocks, so no coroutine/Future per response
+        loop.call_soon_threadsafe(response_queue.put_nowait, item)
+
+    def _process_responses(self) -> None:
+        """Process Google Cloud responses in the stream's thread."""
+        try:
+            responses = self.client.streaming_recognize(requests=self._requests())
+            for response in responses:
+                # Put response in async queue immediately
+                self._deliver(response)
+            # Stream ended normally
+            if not self._discarded:
+                logger.info("✅ Google Cloud stream ended normally")
+        except Exception as e:
+            # Streams recycled before being claimed end with an audio-less error
+            if not self._discarded:
+                _log_stream_error(e)
+                if self.region is not None:
+                    self.region.record_error(e)
+        finally:
+            self._finished = True
+            # Always signal completion
+            self._deliver(None)
+
+
+class AsyncStreamHandle:
+    """
+    A grpc.aio streaming_recognize call that is already open and has sent its config.
+
+    Same contract as StreamHandle, but the request iterator and the response
+    stream both run on the event loop: no thread per stream and no
+    cross-thread hop per response.
+    """
+
+    # attach() expects an async iterator of audio requests
+    asynchronous = True
+
+    def __init__(
+        self,
+        client: SpeechAsyncClient,
+        config_request: cloud_speech_types.StreamingRecognizeRequest,
+        region: Optional[Region] = None,
+    ):
+        """
+        Open the stream and send the config request. Must run on the event loop.
+
+        Args:
+            client: SpeechAsyncClient used for the call
+            config_request: Initial configuration request
+            region: Region the call goes to (told about outages)
+        """
+        self.client = client
+        self.config_request = config_request
+        self.region = region
+        self.created_at = time.monotonic()
+
+        self._attached = asyncio.Event()
+        self._discarded = False
+        self._finished = False
+        self._audio_requests: Optional[AsyncIterator] = None
+        self._call = None
+        self._open_task = asyncio.create_task(self._open())
+        # A pooled stream may fail to open before anyone awaits it
+        self._open_task.add_done_callback(log_task_error(logger, "❌ Failed to open Google Cloud stream"))
+
+    @property
+    def alive(self) -> bool:
+        """Check if the underlying gRPC call is still open."""
+        if self._finished or self._discarded:
+            return False
+        if self._open_task.done():
+            return not self._open_task.cancelled() and self._open_task.exception() is None
+        return True
+
+    @property
+    def age(self) -> float:
+        """Seconds since the stream was opened."""
+        return time.monotonic() - self.created_at
+
+    def attach(self, audio_requests: AsyncIterator) -> None:
+        """
+        Start feeding audio into the stream.
+
+        Args:
+            audio_requests: Async iterator of audio StreamingRecognizeRequest objects
+        """
+        self._audio_requests = audio_requests
+        self._attached.set()
+
+    def discard(self) -> None:
+        """Cancel an unclaimed stream."""
+        self._discarded = True
+        self._attached.set()
+        if self._call is not None:
+            self._call.cancel()
+        else:
+            self._open_task.cancel()
+
+    async def responses(self) -> AsyncGenerator:
+        """
+        Yield responses from Google as they arrive.
+
+        Yields:
+            StreamingRecognizeResponse objects, until the stream ends
+        """
+        try:
+            call = await self._open_task
+            async for response in call:
+                yield response
+            # Stream ended normally
+            logger.info("✅ Google Cloud stream ended normally")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _log_stream_error(e)
+            if self.region is not None:
+                self.region.record_error(e)
+        finally:
+            self._finished = True
+
+    async def _requests(self):
+        """Yield the config request, then audio once the handle is attached."""
+        logger.debug("📤 Sending config to Google Cloud")
+        yield self.config_request
+
+        await self._attached.wait()
+        if self._discarded or self._audio_requests is None:
+            return
+        async for request in self._audio_requests:
+            yield request
+
+    async def _open(self):
+        """Start the call; grpc.aio consumes the request iterator in the background."""
+        self._call = await self.client.streaming_recognize(requests=self._requests())
+        return self._call
+
+
+# Marker posted to a session's response queue when a stream hits its hard deadline
+_ROLLOVER = object()
+
+
+class _Upstream:
+    """One Google stream within a rolling recognition session."""
+
+    def __init__(self, stream, origin_ms: int, replay_ms: int = 0):
+        """
+        Initialize the upstream.
+
+        Args:
+            stream: StreamHandle or AsyncStreamHandle carrying the audio
+            origin_ms: Session audio position of the stream's first audio byte
+            replay_ms: Audio replayed from history before the live audio
+        """
+        self.stream = stream
+        self.origin_ms = origin_ms
+        self.replay_ms = replay_ms
+        self.replayed = replay_ms > 0
+        # Strip text repeated from the previous stream until the first final
+        self.trim_pending = self.replayed
+        self.started_at = get_current_time()
+        self.first_result_seen = False
+        self.task: Optional[asyncio.Task] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def age(self) -> int:
+        """Milliseconds since the stream started receiving audio."""
+        return get_current_time() - self.started_at
+
+    def close(self) -> None:
+        """Stop forwarding responses and cancel the rollover timer."""
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.task is not None:
+            self.task.cancel()
+
+
 class STTStreamingService:
     """
     Google Cloud Speech-to-Text v2 Streaming Service
     """
-    
-    # Class-level executor for reuse across streams
-    _executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
-    
-    # Singleton client for connection reuse (avoids gRPC handshake overhead)
-    _client = None
-    _recognizer = None
+
+    # Process-wide router over the regions' clients (connection reuse per region)
+    _router: Optional[RegionRouter] = None
 
     @classmethod
-    def _get_client(cls):
-        """Get or create singleton SpeechClient for connection reuse."""
-        if cls._client is None:
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = CREDENTIALS_PATH
-            cls._client = SpeechClient(
-                client_options=ClientOptions(api_endpoint=API_ENDPOINT)
+    def get_router(cls) -> RegionRouter:
+        """Get or create the router over the STT_REGIONS of the STT_BACKEND backend."""
+        if cls._router is None:
+            languages = {
+                name: value.split("|") for name, value in parse_region_map(STT_REGION_LANGUAGES).items()
+            }
+            regions = [
+                Region(name, cls._create_backend(name), languages.get(name)) for name in STT_REGIONS
+            ]
+            cls._router = RegionRouter(regions, cls._probe_region)
+            REGION_HEALTHY.set_callback(
+                lambda: {(region.name,): int(region.healthy) for region in regions}
+            )
+            REGION_LATENCY.set_callback(lambda: _region_latencies(regions))
+            logger.info(
+                "🌏 STT regions configured",
+                regions=",".join(STT_REGIONS),
+                model=MODEL,
+                language=",".join(LANGUAGE_CODES),
+                backend=STT_BACKEND,
             )
-            cls._recognizer = cls._client.recognizer_path(PROJECT_ID, LOCATION, "_")
-            print("🔌 Created singleton SpeechClient (connection reuse enabled)")
-        return cls._client, cls._recognizer
+        return cls._router
+
+    @classmethod
+    def select_region(cls, count: bool = True) -> Region:
+        """
+        Choose the region for a new stream in the session language.
 
-    def __init__(self):
-        """Initialize the STT service with Google Cloud credentials."""
-        # Use singleton client for connection reuse
-        self.client, self.recognizer = self._get_client()
+        Args:
+            count: Count the choice in stt_region_selections_total
+        """
+        return cls.get_router().select(LANGUAGE_CODES, count)
+
+    @staticmethod
+    def _create_backend(location: str) -> RecognizerBackend:
+        """Create the backend of one region."""
+        if STT_BACKEND == "mock":
+            options = {}
+            setup_ms = parse_region_map(MOCK_STT_REGION_SETUP_MS).get(location)
+            latency_ms = parse_region_map(MOCK_STT_REGION_LATENCY_MS).get(location)
+            if setup_ms:
+                options["setup_ms"] = int(setup_ms)
+            if latency_ms:
+                options["latency_ms"] = int(latency_ms)
+            if "=" in MOCK_STT_ADDRESS:
+                address = parse_region_map(MOCK_STT_ADDRESS).get(location, "")
+            else:
+                address = MOCK_STT_ADDRESS
+            return MockBackend(address, location, **options)
+        return GoogleBackend(PROJECT_ID, location, CREDENTIALS_PATH, _api_endpoint(location))
+
+    @classmethod
+    async def _probe_region(cls, region: Region) -> None:
+        """
+        Open a config-only streaming_recognize call in a region and wait for it to end.
+
+        Uses the client of the configured engine, so probes also keep that
+        client's channel connected.
+        """
+        config_request = cls._create_config_request(LINEAR16, region.recognizer)
+        if STT_ENGINE == "aio":
+
+            async def requests():
+                yield config_request
+
+            call = await region.async_client().streaming_recognize(
+                requests=requests(), timeout=STT_REGION_PROBE_TIMEOUT
+            )
+            async for _ in call:
+                pass
+            return
+
+        def probe():
+            responses = region.client().streaming_recognize(
+                requests=iter([config_request]), timeout=STT_REGION_PROBE_TIMEOUT
+            )
+            for _ in responses:
+                pass
+
+        await asyncio.to_thread(probe)
+
+    def __init__(
+        self,
+        log: Optional[ContextLogger] = None,
+        audio_format: AudioFormat = LINEAR16,
+        region: Optional[Region] = None,
+    ):
+        """
+        Initialize the STT service with Google Cloud credentials.
+
+        Args:
+            log: Logger carrying the session's context (module logger if omitted)
+            audio_format: Encoding of the audio on the session's bridge
+            region: Region of the service's streams (the router's choice if omitted)
+        """
+        self.log = log or logger
+        self.audio_format = audio_format
+        self.bytes_per_ms = audio_format.bytes_per_ms
+        # Every stream of this service (rollovers included) stays in one region
+        self.region = region or self.select_region()
 
         # Session tracking
-        self.start_time = get_current_time()
+        self.session_start_time = get_current_time()
+        self.start_time = self.session_start_time
         self.restart_counter = 0
         self.last_transcript_was_final = False
         self.new_stream = True
 
-        print(f"\n{'#'*80}", flush=True)
-        print(f"🎙️  STT Service initialized:")
-        print(f"   - Model: {MODEL}")
-        print(f"   - Location: {LOCATION}")
-        print(f"   - Language: {', '.join(LANGUAGE_CODES)}")
-        print(f"   - Audio: LINEAR16, 16kHz, Mono")
-        print(f"   - Interim results: Enabled (real-time)")
-        print(f"   - Voice activity events: Enabled")
-        print(f"{'#'*80}\n", flush=True)
+        self.log.debug("🎙️  STT Service initialized", model=MODEL, engine=STT_ENGINE, region=self.region.name)
 
-    def _create_config_request(self) -> cloud_speech_types.StreamingRecognizeRequest:
+    @classmethod
+    def open_stream(
+        cls, audio_format: AudioFormat = LINEAR16, region: Optional[Region] = None
+    ) -> Union[StreamHandle, AsyncStreamHandle]:
+        """
+        Open a new streaming_recognize call with the config request already sent.
+
+        Uses the engine selected by STT_ENGINE. The asyncio engine must be
+        called from the event loop.
+
+        Args:
+            audio_format: Encoding of the audio that will be sent
+            region: Region to open the call in (the router's choice if omitted)
+
+        Returns:
+            StreamHandle or AsyncStreamHandle waiting for audio
+        """
+        region = region or cls.select_region()
+        config_request = cls._create_config_request(audio_format, region.recognizer)
+        if STT_ENGINE == "aio":
+            return AsyncStreamHandle(region.async_client(), config_request, region)
+        return StreamHandle(region.client(), config_request, region)
+
+    @classmethod
+    def _create_config_request(
+        cls, audio_format: AudioFormat, recognizer: str
+    ) -> cloud_speech_types.StreamingRecognizeRequest:
         """
         Create the initial configuration request for streaming recognition.
 
+        Args:
+            audio_format: Encoding of the audio that will be sent
+            recognizer: Recognizer resource name of the stream's region
+
         Returns:
             StreamingRecognizeRequest with configuration
         """
-        # Use explicit decoding for LINEAR16 PCM audio
+        # Use explicit decoding for raw audio (LINEAR16 PCM, or μ-law/A-law passthrough)
         recognition_config = cloud_speech_types.RecognitionConfig(
             explicit_decoding_config=cloud_speech_types.ExplicitDecodingConfig(
-                encoding=cloud_speech_types.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=INPUT_SAMPLE_RATE,
+                encoding=cloud_speech_types.ExplicitDecodingConfig.AudioEncoding[audio_format.encoding],
+                sample_rate_hertz=audio_format.sample_rate,
                 audio_channel_count=1,
             ),
             language_codes=LANGUAGE_CODES,
@@ -124,7 +611,7 @@ class STTStreamingService:
         )
 
         config_request = cloud_speech_types.StreamingRecognizeRequest(
-            recognizer=self.recognizer,
+            recognizer=recognizer,
             streaming_config=streaming_config,
         )
 
@@ -132,78 +619,207 @@ class STTStreamingService:
 
     def _requests_generator(
         self,
-        config_request: cloud_speech_types.StreamingRecognizeRequest,
-        audio_queue: queue.Queue,
+        audio_bridge: AudioBridge,
+        epoch: int,
         stop_event: Optional[asyncio.Event] = None,
+        replay: bytes = b"",
     ):
         """
-        Generator that yields config first, then audio requests.
+        Generator that yields audio requests (the stream handle sends the config).
+
+        Blocks on the audio bridge instead of polling, so the request thread
+        only wakes up when audio, end of stream or an interrupt arrives.
 
         Args:
-            config_request: Initial configuration request
-            audio_queue: Queue containing audio chunks
+            audio_bridge: Bridge delivering audio chunks from the WebSocket
+            epoch: Bridge epoch captured when the stream was started
             stop_event: Event to signal generator to stop
+            replay: Audio replayed from the previous stream before live audio
 
         Yields:
             StreamingRecognizeRequest objects
         """
         try:
-            # First, send the configuration
-            print("📤 Sending config to Google Cloud")
-            yield config_request
+            for offset in range(0, len(replay), MAX_REQUEST_BYTES):
+                piece = replay[offset:offset + MAX_REQUEST_BYTES]
+                UPSTREAM_REQUESTS.inc()
+                UPSTREAM_BYTES.inc(len(piece))
+                yield cloud_speech_types.StreamingRecognizeRequest(audio=piece)
 
-            # Then, send audio chunks
             chunk_count = 0
-            empty_count = 0
-            while True:
+            for audio_chunk in audio_bridge.reader(epoch, MAX_COALESCE_FRAMES):
                 # Check stop event
                 if stop_event and stop_event.is_set():
-                    print(f"🛑 Stop signal received (sent {chunk_count} chunks)")
                     break
-                    
-                try:
-                    # Get audio chunk from queue (reduced timeout for lower latency)
-                    audio_chunk = audio_queue.get(timeout=0.01)
-
-                    if audio_chunk is None:
-                        # None signals end of stream
-                        print(f"🛑 End of audio stream (sent {chunk_count} chunks)")
-                        break
-
-                    chunk_count += 1
-                    empty_count = 0  # Reset when audio received
-                    # Log every 20 chunks for visibility
-                    if chunk_count % 20 == 0:
-                        print(
-                            f"📤 Sent {chunk_count} audio chunks to Google Cloud",
-                            flush=True,
-                        )
 
-                    yield cloud_speech_types.StreamingRecognizeRequest(
-                        audio=audio_chunk
-                    )
+                chunk_count += 1
+                # Sampled: this runs for every upstream request
+                if self.log.sample("upstream_audio", every=LOG_SAMPLE_EVERY):
+                    self.log.debug("📤 Sent audio chunks to Google Cloud", chunks=chunk_count)
 
-                except queue.Empty:
-                    # Continue waiting for more audio (less frequent logging)
-                    empty_count += 1
-                    if empty_count % 500 == 0:
-                        print(
-                            f"⏸️ Queue empty for {empty_count * 0.01:.1f}s, waiting for audio..."
-                        )
-                    continue
+                UPSTREAM_REQUESTS.inc()
+                UPSTREAM_BYTES.inc(len(audio_chunk))
+                yield cloud_speech_types.StreamingRecognizeRequest(audio=audio_chunk)
+
+            if audio_bridge.closed and audio_bridge.empty():
+                self.log.info("🛑 End of audio stream", chunks=chunk_count)
+            else:
+                self.log.info("🛑 Stop signal received", chunks=chunk_count)
 
         except Exception as e:
-            print(f"Error in requests generator: {e}")
+            self.log.error("Error in requests generator", error=e)
             raise
 
+    async def _async_requests_generator(
+        self,
+        audio_bridge: AudioBridge,
+        epoch: int,
+        stop_event: Optional[asyncio.Event] = None,
+        replay: bytes = b"",
+    ):
+        """
+        Async counterpart of ``_requests_generator`` for the asyncio engine.
+
+        Args:
+            audio_bridge: Bridge delivering audio chunks from the WebSocket
+            epoch: Bridge epoch captured when the stream was started
+            stop_event: Event to signal generator to stop
+            replay: Audio replayed from the previous stream before live audio
+
+        Yields:
+            StreamingRecognizeRequest objects
+        """
+        for offset in range(0, len(replay), MAX_REQUEST_BYTES):
+            piece = replay[offset:offset + MAX_REQUEST_BYTES]
+            UPSTREAM_REQUESTS.inc()
+            UPSTREAM_BYTES.inc(len(piece))
+            yield cloud_speech_types.StreamingRecognizeRequest(audio=piece)
+
+        chunk_count = 0
+        async for audio_chunk in audio_bridge.areader(epoch, MAX_COALESCE_FRAMES):
+            if stop_event and stop_event.is_set():
+                break
+
+            chunk_count += 1
+            if self.log.sample("upstream_audio", every=LOG_SAMPLE_EVERY):
+                self.log.debug("📤 Sent audio chunks to Google Cloud", chunks=chunk_count)
+
+            UPSTREAM_REQUESTS.inc()
+            UPSTREAM_BYTES.inc(len(audio_chunk))
+            yield cloud_speech_types.StreamingRecognizeRequest(audio=audio_chunk)
+
+        if audio_bridge.closed and audio_bridge.empty():
+            self.log.info("🛑 End of audio stream", chunks=chunk_count)
+        else:
+            self.log.info("🛑 Stop signal received", chunks=chunk_count)
+
+    def _start_upstream(
+        self,
+        stream_factory: Callable,
+        audio_bridge: AudioBridge,
+        stop_event: Optional[asyncio.Event],
+        response_queue: asyncio.Queue,
+        replay_from_ms: Optional[int] = None,
+    ) -> "_Upstream":
+        """
+        Move the bridge's live audio onto a new Google stream.
+
+        The previous stream (if any) is detached from the bridge and keeps
+        running until Google has flushed its last results.
+
+        Args:
+            stream_factory: Callable returning a pre-opened stream handle in a given region
+            audio_bridge: Bridge delivering audio chunks
+            stop_event: Event to signal the request generator to stop
+            response_queue: Queue receiving (upstream, response) pairs
+            replay_from_ms: Session audio position (ms) to replay from into the
+                new stream, as far back as the bridge's history reaches (None
+                replays nothing)
+
+        Returns:
+            The started upstream
+        """
+        stream = stream_factory(self.region)
+        if not stream.alive:
+            stream = self.open_stream(self.audio_format, self.region)
+
+        epoch, origin, replay = audio_bridge.handover(
+            None if replay_from_ms is None else replay_from_ms * self.bytes_per_ms
+        )
+        if stream.asynchronous:
+            requests_generator = self._async_requests_generator
+        else:
+            requests_generator = self._requests_generator
+        stream.attach(requests_generator(audio_bridge, epoch, stop_event, replay))
+
+        upstream = _Upstream(stream, origin // self.bytes_per_ms, len(replay) // self.bytes_per_ms)
+        upstream.task = asyncio.create_task(self._pump(upstream, response_queue))
+        # Hard deadline: roll over even if no final result shows up in the window
+        upstream.timer = asyncio.get_running_loop().call_later(
+            STREAMING_LIMIT / 1000, response_queue.put_nowait, (upstream, _ROLLOVER)
+        )
+        return upstream
+
+    def _roll_over(
+        self,
+        current: "_Upstream",
+        stream_factory: Callable,
+        audio_bridge: AudioBridge,
+        stop_event: Optional[asyncio.Event],
+        response_queue: asyncio.Queue,
+        reason: str,
+        final_end_ms: int,
+    ) -> "_Upstream":
+        """Replace the current stream with a new one that replays the audio since the last final."""
+        STREAM_RESTARTS.inc(reason=reason)
+        current.timer.cancel()
+        upstream = self._start_upstream(
+            stream_factory,
+            audio_bridge,
+            stop_event,
+            response_queue,
+            replay_from_ms=final_end_ms,
+        )
+        self.log.info(
+            "🔁 Rolling over STT stream",
+            reason=reason,
+            age_s=current.age // 1000,
+            replay_ms=upstream.replay_ms,
+        )
+        self.start_time = get_current_time()
+        self.restart_counter += 1
+        return upstream
+
+    @staticmethod
+    async def _pump(upstream: "_Upstream", response_queue: asyncio.Queue) -> None:
+        """Forward one stream's responses into the session's response queue."""
+        try:
+            async for response in upstream.stream.responses():
+                response_queue.put_nowait((upstream, response))
+        finally:
+            response_queue.put_nowait((upstream, None))
+
     async def stream_recognize(
-        self, audio_queue: queue.Queue, stop_event: Optional[asyncio.Event] = None
+        self,
+        audio_bridge: AudioBridge,
+        stop_event: Optional[asyncio.Event] = None,
+        stream_factory: Optional[Callable] = None,
     ) -> AsyncGenerator[dict, None]:
         """
         Stream audio to Google STT API and yield transcription results.
 
+        Google streams are rolled over before STREAMING_LIMIT without ending
+        the generator: the replacement stream is attached while the old one is
+        still flushing, replays the audio sent since the last final (at most
+        ROLLOVER_REPLAY_MS), and results ending at or before the last final's
+        end are dropped.
+
         Args:
-            audio_queue: Queue containing audio chunks as bytes
+            audio_bridge: Bridge delivering audio chunks as bytes
+            stop_event: Event to signal the request generator to stop
+            stream_factory: Callable taking the service's region and returning a
+                pre-opened stream in it for the session's audio format (defaults
+                to open_stream)
 
         Yields:
             dict: Transcription results with format:
@@ -211,67 +827,61 @@ class STTStreamingService:
                     'transcript': str,
                     'is_final': bool,
                     'timestamp': int,  # milliseconds
-                    'confidence': float  # only for final results
+                    'confidence': float,  # only for final results
+                    'audio_end_ms': int,  # bridge audio position of the result's end
+                    'trace': dict  # only if the bridge carries a LatencyTrace
                 }
         """
-        # Create configuration request
-        config_request = self._create_config_request()
-
-        # Create requests generator
-        requests = self._requests_generator(config_request, audio_queue, stop_event)
+        stream_factory = stream_factory or (lambda region: self.open_stream(self.audio_format, region))
+        response_queue = asyncio.Queue()
+        upstreams = []
 
         try:
-            # Start streaming recognition (blocking call, run in executor)
-            loop = asyncio.get_event_loop()
-
-            # Use a queue to get responses in real-time
-            response_queue = asyncio.Queue()
-
-            def process_responses():
-                """Process Google Cloud responses in a separate thread."""
-                try:
-                    responses = self.client.streaming_recognize(requests)
-                    for response in responses:
-                        # Put response in async queue immediately
-                        asyncio.run_coroutine_threadsafe(
-                            response_queue.put(response), loop
-                        )
-                    # Stream ended normally
-                    print("✅ Google Cloud stream ended normally")
-                except Exception as e:
-                    error_msg = str(e)
-                    # Check if it's a normal termination error
-                    if "OutOfRange" in error_msg or "stream ended" in error_msg.lower():
-                        print("🔚 Stream ended by client")
-                    elif (
-                        "encoding" in error_msg.lower()
-                        or "audio data" in error_msg.lower()
-                    ):
-                        print(
-                            f"⚠️ Audio encoding issue (likely due to early termination): {error_msg[:100]}"
-                        )
-                    else:
-                        print(f"❌ Error in process_responses: {e}")
-                finally:
-                    # Always signal completion
-                    asyncio.run_coroutine_threadsafe(response_queue.put(None), loop)
-
-            # Start processing in background thread (reuse class executor)
-            self._executor.submit(process_responses)
+            current = self._start_upstream(
+                stream_factory, audio_bridge, stop_event, response_queue
+            )
+            upstreams.append(current)
 
             # Track last interim for disconnect handling
             last_interim_transcript = None
             last_interim_time = 0
 
+            # Audio position (ms) covered by emitted finals, for de-duplication
+            final_end_ms = 0
+            last_final_transcript = ""
+            # Monotonic time of the current utterance's first interim
+            utterance_started = None
+
             # Process responses as they arrive
             while True:
-                response = await response_queue.get()
+                upstream, response = await response_queue.get()
+
+                if response is _ROLLOVER:
+                    # Hard deadline reached without a final result in the window
+                    if upstream is current:
+                        current = self._roll_over(
+                            current,
+                            stream_factory,
+                            audio_bridge,
+                            stop_event,
+                            response_queue,
+                            reason="rollover_deadline",
+                            final_end_ms=final_end_ms,
+                        )
+                        upstreams.append(current)
+                        last_interim_transcript = None
+                    continue
 
                 if response is None:
+                    if upstream is not current:
+                        # Previous stream finished flushing after a rollover
+                        upstream.close()
+                        upstreams.remove(upstream)
+                        continue
                     # Stream ended - check if we have pending interim to return
                     if last_interim_transcript:
-                        timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                        print(f"[{timestamp}] 📝 Stream ended - 마지막 interim 반환: {last_interim_transcript}", flush=True)
+                        RESULTS.inc(kind="forced_final")
+                        self.log.info("📝 Stream ended - 마지막 interim 반환", transcript=last_interim_transcript)
                         yield {
                             "transcript": last_interim_transcript,
                             "is_final": True,
@@ -279,11 +889,6 @@ class STTStreamingService:
                             "forced_final": True,  # Mark as forced due to disconnect
                         }
                     break
-                # Check if we need to restart the stream (4-minute limit)
-                if get_current_time() - self.start_time > STREAMING_LIMIT:
-                    self.start_time = get_current_time()
-                    self.restart_counter += 1
-                    break
 
                 if not response.results:
                     continue
@@ -295,15 +900,22 @@ class STTStreamingService:
 
                 transcript = result.alternatives[0].transcript
 
-                # Calculate timestamp (v2 API doesn't provide result_end_time)
-                # Use elapsed time since session start
-                current_time = get_current_time()
-                elapsed_time = current_time - self.start_time
-
-                corrected_time = elapsed_time + (STREAMING_LIMIT * self.restart_counter)
+                # Drop results for audio that is already finalized, and results of
+                # a replaced stream for audio its replacement recognizes again
+                end_offset = _offset_ms(result.result_end_offset)
+                end_ms = upstream.origin_ms + end_offset
+                if end_offset and (
+                    end_ms <= final_end_ms
+                    or (upstream is not current and end_ms > current.origin_ms)
+                ):
+                    continue
+                if upstream.trim_pending:
+                    transcript = _trim_overlap(last_final_transcript, transcript)
+                    if not transcript:
+                        continue
 
-                # Show all results in real-time without final distinction
-                timestamp = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
+                # Timestamp is wall-clock time since the session started
+                corrected_time = get_current_time() - self.session_start_time
 
                 # Return actual is_final status from Google
                 result_data = {
@@ -316,28 +928,80 @@ class STTStreamingService:
                 if result.alternatives[0].confidence:
                     result_data["confidence"] = result.alternatives[0].confidence
 
-                # Print all results as they come
-                marker = "✅" if result.is_final else "💬"
-                print(f"[{timestamp}] {marker} 실시간 텍스트: {transcript}", flush=True)
+                if end_offset:
+                    result_data["audio_end_ms"] = end_ms
+
+                now = time.monotonic()
+                if audio_bridge.trace is not None and end_offset:
+                    breakdown = audio_bridge.trace.breakdown(end_ms * self.bytes_per_ms, now)
+                    if breakdown is not None:
+                        result_data["trace"] = {"audio_position_ms": end_ms, **breakdown}
+
+                if not upstream.first_result_seen:
+                    upstream.first_result_seen = True
+                    # Replacement streams start with replayed audio; only fresh streams count
+                    if not upstream.replayed:
+                        TIME_TO_FIRST_INTERIM.observe(upstream.age / 1000)
+                        self.region.record_first_result(upstream.age / 1000)
+                RESULTS.inc(kind="final" if result.is_final else "interim")
+                if result.is_final:
+                    if utterance_started is not None:
+                        INTERIM_TO_FINAL.observe(now - utterance_started)
+                    utterance_started = None
+                elif utterance_started is None:
+                    utterance_started = now
+
+                # Finals are always logged, interims are sampled
+                if result.is_final:
+                    self.log.info("✅ 실시간 텍스트", transcript=transcript)
+                elif self.log.sample("interim", every=LOG_SAMPLE_EVERY):
+                    self.log.debug("💬 실시간 텍스트", transcript=transcript)
 
-                self.last_transcript_was_final = result.is_final
-                
-                # Track interim for disconnect handling
                 if result.is_final:
-                    last_interim_transcript = None  # Clear on final
-                else:
-                    last_interim_transcript = transcript
-                    last_interim_time = corrected_time
+                    upstream.trim_pending = False
+                    final_end_ms = max(final_end_ms, end_ms)
+                    last_final_transcript = transcript
+
+                if upstream is current:
+                    self.last_transcript_was_final = result.is_final
+
+                    # Track interim for disconnect handling
+                    if result.is_final:
+                        last_interim_transcript = None  # Clear on final
+                    else:
+                        last_interim_transcript = transcript
+                        last_interim_time = corrected_time
 
                 # Yield immediately for real-time processing
                 yield result_data
 
+                # Near the limit, switch streams right after a final (between utterances)
+                if (
+                    result.is_final
+                    and upstream is current
+                    and current.age > STREAMING_LIMIT - ROLLOVER_WINDOW_MS
+                ):
+                    current = self._roll_over(
+                        current,
+                        stream_factory,
+                        audio_bridge,
+                        stop_event,
+                        response_queue,
+                        reason="rollover_final",
+                        final_end_ms=final_end_ms,
+                    )
+                    upstreams.append(current)
+
         except Exception as e:
-            print(f"Error in stream_recognize: {e}")
+            ERRORS.inc(category="recognize")
+            self.log.error("Error in stream_recognize", error=e)
             yield {
                 "error": str(e),
                 "timestamp": get_current_time(),
             }
+        finally:
+            for upstream in upstreams:
+                upstream.close()
 
     def reset_session(self):
         """Reset session tracking variables."""
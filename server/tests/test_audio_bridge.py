@@ -0,0 +1,124 @@
+"""Tests for the audio bridge's rollover replay and overflow policies."""
+
+import asyncio
+import audio_bridge
+from audio_bridge import MAX_REQUEST_BYTES, AudioBridge, replay_span
+
+
+def _consume(bridge: AudioBridge, chunks) -> None:
+    for chunk in chunks:
+        bridge.put(chunk)
+        assert bridge.get() == chunk
+
+
+def test_replay_span_covers_audio_since_replay_from():
+    assert replay_span(position=9600, replay_from=6400, available=96000) == 3200
+
+
+def test_replay_span_is_capped_by_history():
+    assert replay_span(position=200000, replay_from=0, available=96000) == 96000
+
+
+def test_replay_span_is_empty_without_pending_audio():
+    assert replay_span(position=6400, replay_from=6400, available=96000) == 0
+    # A final can end after the audio a reader has taken so far
+    assert replay_span(position=6400, replay_from=8000, available=96000) == 0
+
+
+def test_handover_replays_from_position():
+    bridge = AudioBridge(history_bytes=100)
+    _consume(bridge, [b"a" * 40, b"b" * 40, b"c" * 40])
+
+    epoch, origin, replay = bridge.handover(replay_from=70)
+
+    assert epoch == 1
+    assert origin == 70
+    assert replay == b"b" * 10 + b"c" * 40
+
+
+def test_handover_replay_is_limited_to_history():
+    bridge = AudioBridge(history_bytes=50)
+    _consume(bridge, [b"a" * 40, b"b" * 40, b"c" * 40])
+
+    _, origin, replay = bridge.handover(replay_from=0)
+
+    assert origin == 70
+    assert replay == b"b" * 10 + b"c" * 40
+
+
+def test_handover_without_replay():
+    bridge = AudioBridge(history_bytes=100)
+    _consume(bridge, [b"a" * 40])
+
+    assert bridge.handover() == (1, 40, b"")
+    assert bridge.handover(replay_from=40) == (2, 40, b"")
+
+
+def test_pause_policy_keeps_audio_over_budget():
+    bridge = AudioBridge(max_bytes=100, policy="pause")
+    for chunk in (b"a" * 40, b"b" * 40, b"c" * 40):
+        bridge.put(chunk)
+
+    assert bridge.throttled
+    assert bridge.dropped_bytes == 0
+    assert bridge.buffered_bytes == 120
+    assert [bridge.get() for _ in range(3)] == [b"a" * 40, b"b" * 40, b"c" * 40]
+
+
+def test_drop_oldest_policy_stays_within_budget():
+    bridge = AudioBridge(max_bytes=100, policy="drop_oldest")
+    for chunk in (b"a" * 40, b"b" * 40, b"c" * 40):
+        bridge.put(chunk)
+
+    assert bridge.dropped_bytes == 40
+    assert bridge.dropped_chunks == 1
+    assert bridge.buffered_bytes == 80
+    assert bridge.get() == b"b" * 40
+
+
+def test_pace_holds_the_receiver_while_the_queue_is_full(monkeypatch):
+    monkeypatch.setattr(audio_bridge, "PAUSE_RECHECK_S", 0.01)
+
+    async def scenario():
+        bridge = AudioBridge(max_bytes=100, policy="pause")
+        for _ in range(3):
+            bridge.put(b"x" * 40)
+        pacing = asyncio.create_task(bridge.pace())
+        await asyncio.sleep(0.05)
+        # Still over the budget: the receiver must not read more audio
+        assert not pacing.done()
+
+        bridge.get()
+        bridge.get()
+        # Room again, though still above the low watermark
+        assert bridge.throttled
+        await asyncio.wait_for(pacing, 1.0)
+
+    asyncio.run(scenario())
+
+
+def test_merged_requests_stay_within_the_request_limit():
+    frame = b"m" * 1600  # 50 ms of 16 kHz LINEAR16
+    bridge = AudioBridge(max_bytes=64 * len(frame), policy="merge")
+    for _ in range(60):
+        bridge.put(frame)
+    assert bridge.throttled
+
+    requests = []
+    while not bridge.empty():
+        requests.append(bridge.get(max_batch=4))
+
+    assert max(len(request) for request in requests) <= MAX_REQUEST_BYTES
+    assert all(len(request) % len(frame) == 0 for request in requests)
+    # Merging did happen beyond max_batch while catching up
+    assert max(len(request) for request in requests) > 4 * len(frame)
+    assert sum(len(request) for request in requests) == 60 * len(frame)
+
+
+def test_coalesced_requests_stay_within_the_request_limit():
+    frame = b"c" * 6000
+    bridge = AudioBridge()
+    for _ in range(4):
+        bridge.put(frame)
+
+    assert [len(bridge.get(max_batch=4)) for _ in range(2)] == [12000, 12000]
@@ -0,0 +1,49 @@
+"""Tests for the audio reframer."""
+
+from audio_reframer import AudioReframer
+
+
+def test_exact_frames_pass_through():
+    reframer = AudioReframer(4)
+
+    assert reframer.push(b"abcdefgh") == [b"abcd", b"efgh"]
+    assert reframer.pending == 0
+
+
+def test_partial_frame_is_completed_by_the_next_chunk():
+    reframer = AudioReframer(4)
+
+    assert reframer.push(b"abcdef") == [b"abcd"]
+    assert reframer.pending == 2
+    assert reframer.push(b"gh") == [b"efgh"]
+    assert reframer.pending == 0
+
+
+def test_small_chunks_accumulate_across_pushes():
+    reframer = AudioReframer(4)
+
+    assert reframer.push(b"a") == []
+    assert reframer.push(b"b") == []
+    assert reframer.push(b"cdefghij") == [b"abcd", b"efgh"]
+    assert reframer.pending == 2
+    assert (reframer.chunks_in, reframer.frames_out) == (3, 2)
+
+
+def test_frames_preserve_the_stream_for_any_chunking():
+    stream = bytes(range(97))
+    for size in (1, 3, 4, 5, 11, 97):
+        reframer = AudioReframer(8)
+        frames = []
+        for i in range(0, len(stream), size):
+            frames.extend(reframer.push(stream[i:i + size]))
+        assert all(len(frame) == 8 for frame in frames)
+        assert b"".join(frames) + reframer.flush() == stream
+
+
+def test_flush_returns_the_trailing_partial_frame():
+    reframer = AudioReframer(4)
+    reframer.push(b"abcdef")
+
+    assert reframer.flush() == b"ef"
+    assert reframer.flush() == b""
+    assert reframer.push(b"wxyz") == [b"wxyz"]
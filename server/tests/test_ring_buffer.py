@@ -0,0 +1,54 @@
+"""Tests for the audio ring buffer."""
+
+from ring_buffer import AudioRingBuffer
+
+
+def test_tail_before_the_buffer_fills():
+    buffer = AudioRingBuffer(10)
+    buffer.write(b"abc")
+    buffer.write(b"de")
+
+    assert len(buffer) == 5
+    assert buffer.tail(3) == b"cde"
+    assert buffer.tail(100) == b"abcde"
+    assert buffer.tail(0) == b""
+
+
+def test_tail_across_wraparound():
+    buffer = AudioRingBuffer(8)
+    buffer.write(b"012345")
+    buffer.write(b"6789")
+
+    assert len(buffer) == 8
+    assert buffer.total_written == 10
+    assert buffer.tail(8) == b"23456789"
+    assert buffer.tail(5) == b"56789"
+
+
+def test_write_larger_than_capacity_keeps_the_newest_bytes():
+    buffer = AudioRingBuffer(4)
+    buffer.write(b"ab")
+    buffer.write(b"0123456789")
+
+    assert buffer.tail(4) == b"6789"
+    buffer.write(b"x")
+    assert buffer.tail(4) == b"789x"
+
+
+def test_many_small_writes_match_the_stream_suffix():
+    buffer = AudioRingBuffer(7)
+    stream = bytes(range(50))
+    for i in range(0, len(stream), 3):
+        buffer.write(stream[i:i + 3])
+        written = stream[:i + 3]
+        for size in range(8):
+            assert buffer.tail(size) == written[len(written) - min(size, len(written)):]
+
+
+def test_zero_capacity_keeps_nothing():
+    buffer = AudioRingBuffer(0)
+    buffer.write(b"abc")
+
+    assert len(buffer) == 0
+    assert buffer.total_written == 3
+    assert buffer.tail(3) == b""
@@ -0,0 +1,85 @@
+"""Tests for session admission."""
+
+import asyncio
+import pytest
+from session_scheduler import ServerBusyError, SessionScheduler
+
+
+async def _queue(scheduler: SessionScheduler, endpoint: str):
+    """Start an admission and let it reach the queue."""
+    task = asyncio.create_task(scheduler.admit(endpoint))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    async def scenario():
+        scheduler = SessionScheduler(max_sessions=1, max_queue=10, max_wait=5)
+        slot = await scheduler.admit("first")
+        waiters = [await _queue(scheduler, f"w{i}") for i in range(3)]
+        assert scheduler.queued == 3
+
+        for i, waiter in enumerate(waiters):
+            slot.release()
+            slot = await asyncio.wait_for(waiter, 1)
+            assert slot.endpoint == f"w{i}"
+            # A freed slot wakes exactly one waiter
+            assert not any(task.done() for task in waiters[i + 1:])
+
+    asyncio.run(scenario())
+
+
+def test_new_session_does_not_jump_the_queue():
+    async def scenario():
+        scheduler = SessionScheduler(max_sessions=1, max_queue=10, max_wait=5)
+        holder = await scheduler.admit("first")
+        waiter = await _queue(scheduler, "queued")
+        holder.release()
+        # The freed slot is reserved for the waiter, not the newcomer
+        late = await _queue(scheduler, "late")
+        slot = await waiter
+        assert slot.endpoint == "queued"
+        assert not late.done()
+        late.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        scheduler = SessionScheduler(max_sessions=1, max_queue=1, max_wait=5)
+        await scheduler.admit("first")
+        waiter = await _queue(scheduler, "queued")
+        with pytest.raises(ServerBusyError):
+            await scheduler.admit("rejected")
+        assert scheduler.rejected == 1
+        waiter.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_wait_timeout_rejects():
+    async def scenario():
+        scheduler = SessionScheduler(max_sessions=1, max_queue=5, max_wait=0.01)
+        await scheduler.admit("first")
+        with pytest.raises(ServerBusyError):
+            await scheduler.admit("late")
+        assert scheduler.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    async def scenario():
+        scheduler = SessionScheduler(max_sessions=1, max_queue=5, max_wait=5)
+        holder = await scheduler.admit("first")
+        gone = await _queue(scheduler, "gone")
+        next_in_line = await _queue(scheduler, "next")
+        gone.cancel()
+        await asyncio.sleep(0)
+        holder.release()
+        slot = await asyncio.wait_for(next_in_line, 1)
+        assert slot.endpoint == "next"
+        assert scheduler.active == 1
+
+    asyncio.run(scenario())
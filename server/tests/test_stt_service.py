@@ -0,0 +1,145 @@
+"""Tests for transcript de-duplication across stream rollovers."""
+
+import asyncio
+import datetime
+import types
+from google.cloud.speech_v2.types import cloud_speech as cloud_speech_types
+import stt_service
+from audio_bridge import MAX_REQUEST_BYTES, AudioBridge
+from stt_service import BYTES_PER_MS, STTStreamingService, _trim_overlap
+
+# Audio per scripted word, and words per scripted utterance
+WORD_MS = 50
+UTTERANCE_WORDS = 4
+
+
+def test_trim_overlap_strips_repeated_prefix():
+    assert _trim_overlap("오늘 회의를 시작하겠습니다", "시작하겠습니다 지난주 진행") == "지난주 진행"
+
+
+def test_trim_overlap_keeps_unrelated_text():
+    assert _trim_overlap("안녕하세요", "오늘 회의를") == "오늘 회의를"
+
+
+def test_trim_overlap_ignores_short_matches():
+    # Fewer than min_chars matching characters are treated as a coincidence
+    assert _trim_overlap("하나 둘", "둘 셋") == "둘 셋"
+
+
+def test_trim_overlap_drops_fully_repeated_text():
+    assert _trim_overlap("지난주 진행 상황", "진행 상황") == ""
+
+
+class _ScriptedStream:
+    """
+    Stream handle that "recognizes" words spelled out in the audio bytes.
+
+    Every WORD_MS of audio carries one word. Utterances are counted from the
+    start of the stream: every word gets an interim result, and every
+    UTTERANCE_WORDS words a final result closes the utterance. Every other
+    stream spells words in upper case, the way a new stream may word
+    re-recognized audio differently, so repeats can't be caught by matching
+    text.
+    """
+
+    asynchronous = True
+    alive = True
+    opened = 0
+
+    def __init__(self, region=None):
+        self.region = region
+        _ScriptedStream.opened += 1
+        self._upper = _ScriptedStream.opened % 2 == 0
+        self._responses = asyncio.Queue()
+        self._task = None
+
+    def attach(self, requests) -> None:
+        self._task = asyncio.create_task(self._recognize(requests))
+
+    async def responses(self):
+        while True:
+            response = await self._responses.get()
+            if response is None:
+                return
+            yield response
+
+    async def _recognize(self, requests) -> None:
+        frame = WORD_MS * BYTES_PER_MS
+        audio = b""
+        words = []
+        async for request in requests:
+            audio += request.audio
+            while len(audio) >= frame * (len(words) + 1):
+                start = frame * len(words)
+                words.append(audio[start:start + frame].decode().strip())
+                is_final = len(words) % UTTERANCE_WORDS == 0
+                utterance = " ".join(words[(len(words) - 1) // UTTERANCE_WORDS * UTTERANCE_WORDS:])
+                self._responses.put_nowait(
+                    cloud_speech_types.StreamingRecognizeResponse(
+                        results=[
+                            cloud_speech_types.StreamingRecognitionResult(
+                                alternatives=[
+                                    cloud_speech_types.SpeechRecognitionAlternative(
+                                        transcript=utterance.upper() if self._upper else utterance
+                                    )
+                                ],
+                                is_final=is_final,
+                                result_end_offset=datetime.timedelta(milliseconds=len(words) * WORD_MS),
+                            )
+                        ]
+                    )
+                )
+        self._responses.put_nowait(None)
+
+
+def test_rollover_does_not_repeat_finalized_audio(monkeypatch):
+    # Roll over after the first final once a stream is 300 ms old
+    monkeypatch.setattr(stt_service, "STREAMING_LIMIT", 2000)
+    monkeypatch.setattr(stt_service, "ROLLOVER_WINDOW_MS", 1700)
+    words = [f"w{index}" for index in range(40)]
+
+    async def run():
+        region = types.SimpleNamespace(name="test", record_first_result=lambda seconds: None)
+        service = STTStreamingService(region=region)
+        # History reaches further back than the last final
+        bridge = AudioBridge(history_bytes=500 * BYTES_PER_MS)
+
+        async def feed():
+            for word in words:
+                bridge.put(word.ljust(WORD_MS * BYTES_PER_MS).encode())
+                await asyncio.sleep(WORD_MS / 1000)
+            bridge.close()
+
+        feeder = asyncio.create_task(feed())
+        results = [
+            result
+            async for result in service.stream_recognize(bridge, stream_factory=_ScriptedStream)
+        ]
+        await feeder
+        return service, results
+
+    service, results = asyncio.run(run())
+
+    finals = [result["transcript"] for result in results if result["is_final"]]
+    assert service.restart_counter >= 2
+    assert " ".join(finals).lower().split() == words
+
+
+def test_replayed_requests_stay_within_the_request_limit():
+    region = types.SimpleNamespace(name="test", record_first_result=lambda seconds: None)
+    service = STTStreamingService(region=region)
+    # A full 3 s rollover replay
+    replay = bytes(3000 * BYTES_PER_MS)
+
+    bridge = AudioBridge()
+    bridge.close()
+    requests = list(service._requests_generator(bridge, bridge.epoch, replay=replay))
+
+    async def collect_async():
+        bridge = AudioBridge()
+        bridge.close()
+        return [request async for request in service._async_requests_generator(bridge, bridge.epoch, replay=replay)]
+
+    for sent in (requests, asyncio.run(collect_async())):
+        assert max(len(request.audio) for request in sent) <= MAX_REQUEST_BYTES
+        assert b"".join(request.audio for request in sent) == replay
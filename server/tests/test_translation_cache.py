@@ -0,0 +1,196 @@
+"""Tests for the translation cache."""
+
+import asyncio
+import types
+import translation_cache
+from translation_cache import TranslationCache, normalize_text
+
+
+def test_normalize_text_folds_case_punctuation_and_spacing():
+    assert normalize_text(" 안녕하세요. ") == "안녕하세요"
+    assert normalize_text("Hello,   World!") == "hello world"
+    # NFKC: full-width letters fold to ASCII
+    assert normalize_text("ＡＢＣ") == "abc"
+
+
+def test_lookups_share_an_entry_across_spellings():
+    cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=60)
+    cache.put("안녕하세요.", "en", "Hello")
+
+    assert cache.get(" 안녕하세요 ", "en") == "Hello"
+    assert cache.get("안녕하세요", "ja") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TranslationCache(max_entries=2, max_bytes=10000, ttl=60)
+    cache.put("하나", "en", "one")
+    cache.put("둘", "en", "two")
+    cache.get("하나", "en")
+    cache.put("셋", "en", "three")
+
+    assert cache.get("둘", "en") is None
+    assert cache.get("하나", "en") == "one"
+    assert cache.get("셋", "en") == "three"
+    assert cache.evictions == 1
+
+
+def test_memory_cap_evicts_entries():
+    cache = TranslationCache(max_entries=100, max_bytes=500, ttl=60)
+    cache.put("하나", "en", "one")
+    cache.put("둘", "en", "two")
+    cache.put("셋", "en", "three")
+
+    assert cache.size_bytes <= 500
+    assert len(cache) < 3
+    assert cache.get("셋", "en") == "three"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(translation_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=5)
+    cache.put("안녕", "en", "Hi")
+
+    now[0] += 4.9
+    assert cache.get("안녕", "en") == "Hi"
+    now[0] += 0.2
+    assert cache.get("안녕", "en") is None
+    assert cache.expirations == 1
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_concurrent_misses_share_one_translation():
+    calls = []
+
+    async def translate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "Hello"
+
+    async def scenario():
+        cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=60)
+        results = await asyncio.gather(
+            cache.get_or_translate("안녕하세요", "en", translate),
+            cache.get_or_translate("안녕하세요.", "en", translate),
+            cache.get_or_translate(" 안녕하세요 ", "en", translate),
+        )
+        assert results == ["Hello"] * 3
+        assert cache.shared_inflight == 2
+        assert cache.get("안녕하세요", "en") == "Hello"
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_cancelled_caller_does_not_cancel_shared_translation():
+    async def translate():
+        await asyncio.sleep(0.02)
+        return "Hello"
+
+    async def scenario():
+        cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=60)
+        first = asyncio.create_task(cache.get_or_translate("안녕하세요", "en", translate))
+        second = asyncio.create_task(cache.get_or_translate("안녕하세요", "en", translate))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "Hello"
+
+    asyncio.run(scenario())
+
+
+async def _collect(parts) -> list:
+    return [part async for part in parts]
+
+
+def test_concurrent_streams_share_one_translation():
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def stream():
+            calls.append(1)
+            yield "Hello"
+            await release.wait()
+            yield ", world"
+
+        cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=60)
+        first = asyncio.create_task(_collect(cache.stream_or_translate("안녕 세상", "en", stream)))
+        await asyncio.sleep(0.01)
+        # Attaches after the first part was produced and still receives it
+        late = asyncio.create_task(_collect(cache.stream_or_translate("안녕, 세상!", "en", stream)))
+        await asyncio.sleep(0.01)
+        release.set()
+
+        assert await first == ["Hello", ", world"]
+        assert await late == ["Hello", ", world"]
+        assert cache.shared_inflight == 1
+        assert await _collect(cache.stream_or_translate("안녕 세상", "en", stream)) == ["Hello, world"]
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
+
+
+def test_whole_lookup_joins_a_streamed_translation():
+    async def stream():
+        yield "Good "
+        await asyncio.sleep(0.01)
+        yield "morning "
+
+    async def translate():
+        raise AssertionError("should share the in-flight stream")
+
+    async def scenario():
+        cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=60)
+        streaming = asyncio.create_task(_collect(cache.stream_or_translate("좋은 아침", "en", stream)))
+        await asyncio.sleep(0)
+        assert await cache.get_or_translate("좋은 아침", "en", translate) == "Good morning"
+        assert await streaming == ["Good ", "morning "]
+
+    asyncio.run(scenario())
+
+
+def test_failed_stream_raises_for_every_follower_and_is_not_cached():
+    async def stream():
+        yield "Hel"
+        await asyncio.sleep(0.01)
+        raise TimeoutError
+
+    async def scenario():
+        cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=60)
+        received = []
+
+        async def follow():
+            try:
+                async for part in cache.stream_or_translate("안녕", "en", stream):
+                    received.append(part)
+            except TimeoutError:
+                return "failed"
+
+        assert await asyncio.gather(follow(), follow()) == ["failed", "failed"]
+        assert received == ["Hel", "Hel"]
+        assert cache.get("안녕", "en") is None
+
+    asyncio.run(scenario())
+
+
+def test_failure_without_callers_is_logged(monkeypatch):
+    errors = []
+    monkeypatch.setattr(
+        translation_cache, "logger", types.SimpleNamespace(error=lambda message, **fields: errors.append(fields))
+    )
+
+    async def translate():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("quota exceeded")
+
+    async def scenario():
+        cache = TranslationCache(max_entries=10, max_bytes=10000, ttl=60)
+        caller = asyncio.create_task(cache.get_or_translate("안녕", "en", translate))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert [str(fields["error"]) for fields in errors] == ["quota exceeded"]
@@ -0,0 +1,93 @@
+"""Tests for the voice activity gate."""
+
+import numpy as np
+from voice_activity import VoiceActivityGate, frame_levels
+
+SAMPLE_RATE = 16000
+# 20 ms of 16 kHz LINEAR16
+FRAME_SAMPLES = 320
+FRAME_BYTES = FRAME_SAMPLES * 2
+
+
+def _silence() -> bytes:
+    return np.zeros(FRAME_SAMPLES, dtype="<i2").tobytes()
+
+
+def _tone(amplitude: float = 8000.0, hz: float = 200.0) -> bytes:
+    t = np.arange(FRAME_SAMPLES) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * hz * t)).astype("<i2").tobytes()
+
+
+def _hiss(amplitude: int = 8000) -> bytes:
+    rng = np.random.default_rng(0)
+    return rng.integers(-amplitude, amplitude, FRAME_SAMPLES).astype("<i2").tobytes()
+
+
+def _gate(**overrides) -> VoiceActivityGate:
+    settings = dict(
+        enabled=True,
+        threshold_db=-40.0,
+        noise_margin_db=10.0,
+        zcr_max=0.25,
+        hangover_ms=60,
+        preroll_ms=40,
+    )
+    settings.update(overrides)
+    return VoiceActivityGate(SAMPLE_RATE, 2, **settings)
+
+
+def test_frame_levels():
+    level_db, zcr = frame_levels(_silence())
+    assert level_db < -100 and zcr == 0.0
+
+    level_db, zcr = frame_levels(_tone())
+    # RMS of a sine is amplitude / sqrt(2): 8000 / 32768 / 1.414 ≈ -15 dBFS
+    assert -16 < level_db < -14
+    assert zcr < 0.05
+
+
+def test_silence_is_suppressed():
+    gate = _gate()
+    for _ in range(10):
+        assert gate.process(_silence()) == []
+
+    assert not gate.active
+    assert gate.sent_bytes == 0
+    # Only the pre-roll is still held back
+    assert gate.suppressed_bytes == 10 * FRAME_BYTES - 40 * 32
+
+
+def test_speech_onset_flushes_the_preroll():
+    gate = _gate()
+    silent = [_silence() for _ in range(5)]
+    for chunk in silent:
+        gate.process(chunk)
+    onset = _tone()
+
+    assert gate.process(onset) == silent[-2:] + [onset]
+    assert gate.active
+    assert gate.speech_segments == 1
+
+
+def test_gate_stays_open_for_the_hangover():
+    gate = _gate()
+    gate.process(_tone())
+    # 60 ms of hangover: three 20 ms frames pass, then the gate closes
+    passed = [gate.process(_silence()) for _ in range(5)]
+
+    assert [len(chunks) for chunks in passed] == [1, 1, 1, 0, 0]
+    assert not gate.active
+
+
+def test_hiss_does_not_open_the_gate():
+    gate = _gate()
+    assert gate.process(_hiss()) == []
+    assert gate.speech_segments == 0
+
+
+def test_disabled_gate_passes_everything():
+    gate = _gate(enabled=False)
+    chunk = _silence()
+
+    assert gate.process(chunk) == [chunk]
+    assert gate.stats()["sent_ms"] == 20
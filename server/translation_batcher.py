@@ -0,0 +1,156 @@
+"""
+Translation Batcher
+Gathers final segments from many sessions into one Gemini request
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Tuple
+from config import (
+    TRANSLATION_BATCH_WINDOW_MS,
+    TRANSLATION_BATCH_MAX_SIZE,
+    TRANSLATION_BATCH_DEADLINE,
+)
+from translation_cache import get_translation_cache
+from translation_service import TARGET_LANGUAGE, TranslationService, get_translation_service
+
+
+class BatchingTranslator:
+    """
+    Micro-batching front end for ``TranslationService``.
+
+    Segments submitted by any session are held for up to ``window_ms`` (or
+    until ``max_batch`` of them are waiting) and then translated with one
+    structured request; each caller gets back its own part of the response.
+    Requests that miss the deadline or come back malformed fall back to one
+    request per segment. Lookups still go through the translation cache, so
+    repeated segments never reach a batch.
+    """
+
+    def __init__(
+        self,
+        translation_service: TranslationService,
+        window_ms: int = TRANSLATION_BATCH_WINDOW_MS,
+        max_batch: int = TRANSLATION_BATCH_MAX_SIZE,
+        deadline: float = TRANSLATION_BATCH_DEADLINE,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            translation_service: Service that performs the requests
+            window_ms: Maximum time a segment waits for others to join (ms)
+            max_batch: Segments that trigger an immediate flush
+            deadline: Seconds a batched request may take
+        """
+        self.translation_service = translation_service
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.deadline = deadline
+
+        # (text, future, enqueued_at)
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        # Counters for monitoring
+        self.batches = 0
+        self.segments = 0
+        self.fallbacks = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    async def translate(self, text: str) -> Optional[str]:
+        """
+        Translate one segment as part of the next batch.
+
+        Args:
+            text: Korean text to translate
+
+        Returns:
+            Translated English text or None if failed
+        """
+        return await get_translation_cache().get_or_translate(
+            text, TARGET_LANGUAGE, lambda: self._enqueue(text)
+        )
+
+    def stats(self) -> dict:
+        """Return batch fill and queueing delay counters."""
+        return {
+            "batches": self.batches,
+            "segments": self.segments,
+            "pending": len(self._pending),
+            "avg_batch_size": round(self.segments / self.batches, 2) if self.batches else 0.0,
+            "avg_fill": round(self.segments / (self.batches * self.max_batch), 3) if self.batches else 0.0,
+            "avg_queue_delay_ms": round(self.total_queue_delay * 1000 / self.segments, 2) if self.segments else 0.0,
+            "max_queue_delay_ms": round(self.max_queue_delay * 1000, 2),
+            "fallbacks": self.fallbacks,
+        }
+
+    async def _enqueue(self, text: str) -> Optional[str]:
+        """Add a segment to the open batch and wait for its translation."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Close the open batch and send it."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        """Translate one batch and resolve every caller's future."""
+        flushed_at = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            delay = flushed_at - enqueued_at
+            self.total_queue_delay += delay
+            self.max_queue_delay = max(self.max_queue_delay, delay)
+        self.batches += 1
+        self.segments += len(batch)
+
+        texts = [text for text, _, _ in batch]
+        try:
+            if len(batch) == 1:
+                translations = [await self.translation_service.translate_uncached(texts[0], self.deadline)]
+            else:
+                translations = await self.translation_service.translate_batch(texts, self.deadline)
+                if translations is None:
+                    # Fall back to one request per segment
+                    self.fallbacks += 1
+                    translations = await asyncio.gather(
+                        *(self.translation_service.translate_uncached(text, self.deadline) for text in texts)
+                    )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), translation in zip(batch, translations):
+            if not future.done():
+                future.set_result(translation or None)
+
+
+# Singleton instance for reuse
+_translation_batcher: Optional[BatchingTranslator] = None
+
+
+async def get_translation_batcher() -> BatchingTranslator:
+    """Get or create the batching translator singleton."""
+    global _translation_batcher
+    if _translation_batcher is None:
+        _translation_batcher = BatchingTranslator(await get_translation_service())
+    return _translation_batcher
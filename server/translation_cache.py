@@ -0,0 +1,329 @@
+"""
+Translation Cache
+Process-wide LRU + TTL cache of translations with in-flight de-duplication
+"""
+
+import asyncio
+import collections
+import time
+import unicodedata
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import (
+    TRANSLATION_CACHE_MAX_ENTRIES,
+    TRANSLATION_CACHE_MAX_BYTES,
+    TRANSLATION_CACHE_TTL,
+)
+from logger import get_logger, log_task_error
+
+logger = get_logger("translation_cache")
+
+# Rough per-entry bookkeeping overhead (tuple, strings, OrderedDict node)
+_ENTRY_OVERHEAD = 200
+
+
+def normalize_text(text: str) -> str:
+    """
+    Fold a transcript into its cache key form.
+
+    Applies NFKC, case folding, drops punctuation and collapses whitespace,
+    so "안녕하세요." and " 안녕하세요 " share one entry.
+
+    Args:
+        text: Source text
+
+    Returns:
+        Normalized text
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch for ch in text
+    )
+    return " ".join(text.split())
+
+
+class _Inflight:
+    """
+    A translation in progress, shared by every caller waiting for its key.
+
+    Streamed parts are kept as they arrive, so a caller that attaches late
+    first gets what was already produced, then follows the rest.
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.task: Optional[asyncio.Task] = None
+        # Replaced (after being set) whenever a part arrives or the task ends
+        self._changed = asyncio.Event()
+
+    def add(self, part: str) -> None:
+        """Publish a part to every follower."""
+        self.parts.append(part)
+        self.wake()
+
+    def wake(self) -> None:
+        event, self._changed = self._changed, asyncio.Event()
+        event.set()
+
+    async def follow(self) -> AsyncIterator[str]:
+        """
+        Yield every part, from the first, until the translation ends.
+
+        Raises:
+            Exception: Whatever the translation failed with
+        """
+        sent = 0
+        while True:
+            changed = self._changed
+            while sent < len(self.parts):
+                yield self.parts[sent]
+                sent += 1
+            if self.task.done():
+                self.task.result()
+                return
+            await changed.wait()
+
+
+class TranslationCache:
+    """
+    Bounded translation cache shared by all sessions.
+
+    Entries expire after ``ttl`` seconds and the least recently used ones are
+    evicted once the entry count or the approximate memory use exceeds its
+    cap. Concurrent lookups of a missing key share a single in-flight
+    translation instead of issuing duplicate API calls, whether the callers
+    want the whole text (``get_or_translate``) or its streamed parts
+    (``stream_or_translate``).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = TRANSLATION_CACHE_MAX_ENTRIES,
+        max_bytes: int = TRANSLATION_CACHE_MAX_BYTES,
+        ttl: float = TRANSLATION_CACHE_TTL,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached translations
+            max_bytes: Approximate memory cap in bytes
+            ttl: Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # key -> (translation, expires_at, size)
+        self._entries: "collections.OrderedDict[Tuple[str, str], Tuple[str, float, int]]" = (
+            collections.OrderedDict()
+        )
+        self._inflight: Dict[Tuple[str, str], _Inflight] = {}
+        self.size_bytes = 0
+
+        # Counters for monitoring
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_inflight = 0
+
+    def __len__(self) -> int:
+        """Number of cached translations."""
+        return len(self._entries)
+
+    def get(self, text: str, target_language: str) -> Optional[str]:
+        """
+        Look up a cached translation.
+
+        Args:
+            text: Source text (normalized internally)
+            target_language: Target language code
+
+        Returns:
+            Cached translation, or None on a miss
+        """
+        return self._lookup((normalize_text(text), target_language))
+
+    def put(self, text: str, target_language: str, translation: str) -> None:
+        """
+        Store a translation.
+
+        Args:
+            text: Source text (normalized internally)
+            target_language: Target language code
+            translation: Translated text
+        """
+        self._store((normalize_text(text), target_language), translation)
+
+    async def get_or_translate(
+        self,
+        text: str,
+        target_language: str,
+        translate: Callable[[], Awaitable[Optional[str]]],
+    ) -> Optional[str]:
+        """
+        Return a cached translation or compute it once for all concurrent callers.
+
+        The translation runs as its own task, so a caller being cancelled
+        (e.g. a superseded interim) does not cancel it for the others.
+
+        Args:
+            text: Source text
+            target_language: Target language code
+            translate: Coroutine function producing the translation on a miss
+
+        Returns:
+            Translated text, or None if translation failed
+        """
+        key = (normalize_text(text), target_language)
+        if not key[0]:
+            return None
+
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._attach(key, lambda inflight: _whole(inflight, translate))
+        return await asyncio.shield(inflight.task)
+
+    async def stream_or_translate(
+        self,
+        text: str,
+        target_language: str,
+        stream: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """
+        Stream a translation, sharing one in-flight translation between concurrent callers.
+
+        A cached translation is yielded as a single part. Otherwise every
+        caller gets the parts of the same translation (including those
+        produced before it attached) and the complete text is cached once
+        the stream ends. A caller closing its iterator early does not stop
+        the translation for the others.
+
+        Args:
+            text: Source text
+            target_language: Target language code
+            stream: Async generator function producing translation parts on a miss
+
+        Yields:
+            Translation parts as they arrive
+
+        Raises:
+            Exception: Whatever the shared translation failed with
+        """
+        key = (normalize_text(text), target_language)
+        if not key[0]:
+            return
+
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+        inflight = self._attach(key, lambda inflight: _streamed(inflight, stream))
+        async for part in inflight.follow():
+            yield part
+
+    def stats(self) -> dict:
+        """Return cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "shared_inflight": self.shared_inflight,
+            "inflight": len(self._inflight),
+        }
+
+    def _attach(
+        self, key: Tuple[str, str], produce: Callable[[_Inflight], Awaitable[Optional[str]]]
+    ) -> _Inflight:
+        """Join the key's in-flight translation, starting it if there is none."""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.shared_inflight += 1
+            return inflight
+        inflight = _Inflight()
+        inflight.task = asyncio.create_task(self._fill(key, inflight, produce))
+        # Its callers may all be gone by the time it fails
+        inflight.task.add_done_callback(log_task_error(logger, "❌ Shared translation failed"))
+        self._inflight[key] = inflight
+        return inflight
+
+    async def _fill(
+        self, key: Tuple[str, str], inflight: _Inflight, produce: Callable[[_Inflight], Awaitable[Optional[str]]]
+    ) -> Optional[str]:
+        """Run one translation and cache its result."""
+        try:
+            translation = await produce(inflight)
+            if translation:
+                self._store(key, translation)
+            return translation
+        finally:
+            self._inflight.pop(key, None)
+            inflight.wake()
+
+    def _lookup(self, key: Tuple[str, str]) -> Optional[str]:
+        """Return a live entry and mark it recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        translation, expires_at, size = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.size_bytes -= size
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return translation
+
+    def _store(self, key: Tuple[str, str], translation: str) -> None:
+        """Insert an entry and evict down to the caps."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size_bytes -= old[2]
+        size = len(key[0].encode()) + len(translation.encode()) + _ENTRY_OVERHEAD
+        self._entries[key] = (translation, time.monotonic() + self.ttl, size)
+        self.size_bytes += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes
+        ):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+
+
+async def _whole(inflight: _Inflight, translate: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+    """Produce a translation in one piece."""
+    translation = await translate()
+    if translation:
+        inflight.add(translation)
+    return translation
+
+
+async def _streamed(inflight: _Inflight, stream: Callable[[], AsyncIterator[str]]) -> Optional[str]:
+    """Produce a translation part by part."""
+    async for part in stream():
+        inflight.add(part)
+    return "".join(inflight.parts).strip() or None
+
+
+# Singleton instance for reuse
+_translation_cache: Optional[TranslationCache] = None
+
+
+def get_translation_cache() -> TranslationCache:
+    """Get or create the translation cache singleton."""
+    global _translation_cache
+    if _translation_cache is None:
+        _translation_cache = TranslationCache()
+    return _translation_cache
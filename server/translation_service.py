@@ -4,10 +4,14 @@ Real-time Korean to English translation using generate_content_stream
 """
 
 import asyncio
+import json
 import os
-from typing import AsyncGenerator, Optional
-from google import genai
+from typing import AsyncGenerator, List, Optional
 from dotenv import load_dotenv
+from gemini_client_pool import GeminiClientPool
+from logger import get_logger
+from metrics import GEMINI_IN_FLIGHT, GEMINI_UTILIZATION
+from translation_cache import get_translation_cache
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +19,10 @@ load_dotenv()
 # Gemini API settings
 GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 MODEL_ID = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+logger = get_logger("translation_service")
+
+# Target language of SYSTEM_PROMPT (part of the translation cache key)
+TARGET_LANGUAGE = "en"
 
 # System prompt for translation
 SYSTEM_PROMPT = """You are a real-time simultaneous interpreter.
@@ -24,44 +32,62 @@ Keep the translation natural and fluent.
 If the input is already in English, return it as is.
 Do not add any prefixes like "Translation:" or quotation marks."""
 
+# Instructions for translating several segments in one request
+BATCH_PROMPT = """The input is a JSON array of independent text segments.
+Translate each segment separately following the rules above.
+Respond with ONLY a JSON array of strings: the translations in the same
+order, exactly one per input segment."""
+
 
 class TranslationService:
     """
     Google Gemini API based real-time translation service.
     Translates Korean text to English using generate_content_stream.
+
+    Requests go through a GeminiClientPool using the SDK's async interface,
+    so no executor threads are used and HTTP connections are reused.
     """
 
-    def __init__(self):
-        """Initialize the translation service."""
-        self.client = None
+    def __init__(self, client_pool: Optional[GeminiClientPool] = None):
+        """
+        Initialize the translation service.
+
+        Args:
+            client_pool: Shared client pool (a private one is created if omitted)
+        """
+        self.client_pool = client_pool or GeminiClientPool(GEMINI_API_KEY)
         self._initialized = False
         
-        print(f"\n{'#'*80}", flush=True)
-        print(f"🌐 Translation Service initialized:")
-        print(f"   - Model: {MODEL_ID}")
-        print(f"   - Direction: Korean → English")
-        print(f"{'#'*80}\n", flush=True)
+        logger.info(
+            "🌐 Translation Service initialized",
+            model=MODEL_ID,
+            direction="ko→en",
+            clients=self.client_pool.size,
+            max_concurrency=self.client_pool.max_concurrency,
+        )
 
     async def connect(self) -> bool:
         """
-        Initialize the Gemini client.
+        Initialize the Gemini client pool.
         
         Returns:
             bool: True if initialization successful
         """
         try:
-            self.client = genai.Client(api_key=GEMINI_API_KEY)
+            self.client_pool.start()
             self._initialized = True
-            print("✅ Gemini API client initialized for translation")
             return True
         except Exception as e:
-            print(f"❌ Failed to initialize Gemini API client: {e}")
+            logger.error("❌ Failed to initialize Gemini API client", error=e)
             self._initialized = False
             return False
 
     async def translate(self, text: str, timeout: float = 10.0) -> Optional[str]:
         """
         Translate Korean text to English.
+
+        Served from the process-wide translation cache when possible;
+        concurrent requests for the same text share one API call.
         
         Args:
             text: Korean text to translate
@@ -70,73 +96,147 @@ class TranslationService:
         Returns:
             Translated English text or None if failed
         """
-        if not self._initialized or not self.client:
-            print("⚠️ Gemini client not initialized, attempting to connect...")
+        return await get_translation_cache().get_or_translate(
+            text, TARGET_LANGUAGE, lambda: self.translate_uncached(text, timeout)
+        )
+
+    async def translate_uncached(self, text: str, timeout: float) -> Optional[str]:
+        """Call Gemini for one translation, bypassing the cache (see ``translate``)."""
+        if not self._initialized:
+            logger.warning("⚠️ Gemini client not initialized, attempting to connect...")
             if not await self.connect():
                 return None
         
-        try:
-            # Run blocking API call in executor to avoid blocking event loop
-            loop = asyncio.get_event_loop()
-            
-            def _translate_sync():
-                result_text = []
-                response = self.client.models.generate_content_stream(
+        async def _translate_async():
+            result_text = []
+            async with self.client_pool.client() as client:
+                response = await client.models.generate_content_stream(
                     model=MODEL_ID,
                     contents=[f"{SYSTEM_PROMPT}\n\nTranslate this: {text}"]
                 )
-                for chunk in response:
+                async for chunk in response:
                     if chunk.text:
                         result_text.append(chunk.text)
-                return "".join(result_text)
-            
+            return "".join(result_text)
+
+        try:
             # Execute with timeout
-            translated = await asyncio.wait_for(
-                loop.run_in_executor(None, _translate_sync),
-                timeout=timeout
-            )
+            translated = await asyncio.wait_for(_translate_async(), timeout=timeout)
             return translated.strip() if translated else None
             
         except asyncio.TimeoutError:
-            print(f"⚠️ Translation timeout for: {text[:50]}...")
+            logger.warning("⚠️ Translation timeout", text=text[:50])
             return None
         except Exception as e:
-            print(f"❌ Translation error: {e}")
+            logger.error("❌ Translation error", error=e)
             return None
 
-    async def translate_stream(self, text: str) -> AsyncGenerator[str, None]:
+    async def translate_stream(self, text: str, timeout: float = 10.0) -> AsyncGenerator[str, None]:
         """
         Translate text and stream the response.
+
+        A cached translation is yielded as a single chunk. Otherwise chunks
+        are yielded as Gemini produces them and the complete translation is
+        cached once the stream finishes; concurrent requests for the same
+        text share one API call and all receive its chunks. Errors and
+        timeouts end the stream early (they are logged, not yielded).
         
         Args:
             text: Korean text to translate
+            timeout: Maximum time for the whole stream (seconds)
             
         Yields:
             Translation text chunks as they arrive
         """
-        if not self._initialized or not self.client:
+        try:
+            async for chunk in get_translation_cache().stream_or_translate(
+                text, TARGET_LANGUAGE, lambda: self.translate_stream_uncached(text, timeout)
+            ):
+                yield chunk
+        except TimeoutError:
+            logger.warning("⚠️ Translation stream timeout", text=text[:50])
+        except Exception as e:
+            logger.error("❌ Translation stream error", error=e)
+
+    async def translate_stream_uncached(self, text: str, timeout: float) -> AsyncGenerator[str, None]:
+        """
+        Stream one translation from Gemini, bypassing the cache (see ``translate_stream``).
+
+        Raises:
+            TimeoutError: If the stream takes longer than ``timeout`` seconds
+        """
+        if not self._initialized:
             if not await self.connect():
-                yield "[Translation Error: Not connected]"
                 return
-        
+
+        async with asyncio.timeout(timeout):
+            async with self.client_pool.client() as client:
+                response = await client.models.generate_content_stream(
+                    model=MODEL_ID,
+                    contents=[f"{SYSTEM_PROMPT}\n\nTranslate this: {text}"]
+                )
+                async for chunk in response:
+                    if chunk.text:
+                        yield chunk.text
+
+    async def translate_batch(self, texts: List[str], timeout: float = 10.0) -> Optional[List[str]]:
+        """
+        Translate several independent segments with a single request.
+
+        Bypasses the translation cache (callers are expected to check it).
+
+        Args:
+            texts: Korean text segments
+            timeout: Maximum time to wait for the response (seconds)
+
+        Returns:
+            Translations in input order, or None if the request failed or the
+            response could not be split back into one item per segment
+        """
+        if not self._initialized:
+            if not await self.connect():
+                return None
+
+        async def _translate_async():
+            async with self.client_pool.client() as client:
+                response = await client.models.generate_content(
+                    model=MODEL_ID,
+                    contents=[
+                        f"{SYSTEM_PROMPT}\n\n{BATCH_PROMPT}\n\n"
+                        f"{json.dumps(texts, ensure_ascii=False)}"
+                    ],
+                    config={"response_mime_type": "application/json"},
+                )
+            return response.text
+
         try:
-            response = self.client.models.generate_content_stream(
-                model=MODEL_ID,
-                contents=[f"{SYSTEM_PROMPT}\n\nTranslate this: {text}"]
-            )
-            for chunk in response:
-                if chunk.text:
-                    yield chunk.text
-                    
+            raw = await asyncio.wait_for(_translate_async(), timeout=timeout)
+            translations = json.loads(raw or "")
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Batch translation timeout", segments=len(texts))
+            return None
         except Exception as e:
-            print(f"❌ Translation stream error: {e}")
-            yield f"[Translation Error: {str(e)}]"
+            logger.error("❌ Batch translation error", error=e)
+            return None
+
+        if (
+            not isinstance(translations, list)
+            or len(translations) != len(texts)
+            or not all(isinstance(t, str) for t in translations)
+        ):
+            logger.warning("⚠️ Batch translation returned a malformed response", segments=len(texts))
+            return None
+        return [t.strip() for t in translations]
 
     async def disconnect(self):
-        """Clean up resources."""
+        """Release the service; pooled clients stay open for other sessions."""
+        self._initialized = False
+
+    async def close(self):
+        """Close the pooled clients (at process shutdown)."""
         self._initialized = False
-        self.client = None
-        print("👋 Gemini API client disconnected")
+        await self.client_pool.close()
+        logger.info("👋 Gemini API clients closed")
 
     @property
     def is_connected(self) -> bool:
@@ -149,8 +249,12 @@ _translation_service: Optional[TranslationService] = None
 
 
 async def get_translation_service() -> TranslationService:
-    """Get or create the translation service singleton."""
+    """Get or create the translation service singleton (shared by all sessions)."""
     global _translation_service
     if _translation_service is None:
         _translation_service = TranslationService()
+        await _translation_service.connect()
+        pool = _translation_service.client_pool
+        GEMINI_IN_FLIGHT.set_callback(lambda: {(): pool.in_flight})
+        GEMINI_UTILIZATION.set_callback(lambda: {(): pool.in_flight / pool.max_concurrency})
     return _translation_service
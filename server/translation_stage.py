@@ -0,0 +1,161 @@
+"""
+Translation Stage
+Runs translations next to the STT result stream instead of inline
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional, Set
+from logger import ContextLogger, get_logger, log_task_error
+from metrics import ERRORS, TRANSLATION_FIRST_TOKEN, TRANSLATION_LATENCY
+from translation_batcher import BatchingTranslator
+from translation_service import TranslationService
+
+logger = get_logger("translation_stage")
+
+
+class TranslationStage:
+    """
+    Per-session translation stage with latest-wins handling of interims.
+
+    Transcripts are sent to the client as soon as STT produces them; this
+    stage translates them concurrently and streams each translation back as
+    ``translation_delta`` messages while Gemini generates it, closed by a
+    ``translation_final`` message, all tied to the transcript's segment ID.
+    A newer interim cancels the in-flight translation of the previous
+    interim. Finals are always translated and are never cancelled by later
+    results. With a batcher, finals are instead translated in cross-session
+    batches and arrive as a single delta.
+    """
+
+    def __init__(
+        self,
+        translation_service: TranslationService,
+        send: Callable[[dict], Awaitable[None]],
+        batcher: Optional[BatchingTranslator] = None,
+        log: Optional[ContextLogger] = None,
+    ):
+        """
+        Initialize the stage.
+
+        Args:
+            translation_service: Service used to translate text
+            send: Coroutine function that delivers a message to the client
+            batcher: Optional batching translator used for final segments
+            log: Logger carrying the session's context (module logger if omitted)
+        """
+        self.translation_service = translation_service
+        self._send = send
+        self.batcher = batcher
+        self.log = log or logger
+        self._interim_task: Optional[asyncio.Task] = None
+        self._final_tasks: Set[asyncio.Task] = set()
+
+        # Counters for monitoring
+        self.interims_cancelled = 0
+        self.translated = 0
+
+    def submit(self, segment_id: int, text: str, is_final: bool) -> None:
+        """
+        Schedule translation of a transcript without waiting for it.
+
+        Args:
+            segment_id: Segment the transcript belongs to
+            text: Transcript text
+            is_final: Whether the transcript is a final result
+        """
+        # Anything newer supersedes the pending interim translation
+        if self._interim_task is not None and not self._interim_task.done():
+            self._interim_task.cancel()
+            self.interims_cancelled += 1
+        self._interim_task = None
+
+        if not text.strip():
+            return
+
+        task = asyncio.create_task(self._translate(segment_id, text, is_final))
+        task.add_done_callback(log_task_error(self.log, "❌ Translation task failed"))
+        if is_final:
+            self._final_tasks.add(task)
+            task.add_done_callback(self._final_tasks.discard)
+        else:
+            self._interim_task = task
+
+    async def flush(self) -> None:
+        """Wait for the translations of finals in progress; drop the pending interim."""
+        if self._interim_task is not None:
+            self._interim_task.cancel()
+            self._interim_task = None
+        await asyncio.gather(*self._final_tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Cancel every pending translation."""
+        tasks = list(self._final_tasks)
+        if self._interim_task is not None:
+            tasks.append(self._interim_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _translate(self, segment_id: int, text: str, is_final: bool) -> None:
+        """Stream one transcript's translation as deltas, then send the final message."""
+        started = time.perf_counter()
+        first_token_ms = None
+        parts = []
+
+        async for delta in self._deltas(text, is_final):
+            if first_token_ms is None:
+                first_token_ms = int((time.perf_counter() - started) * 1000)
+            parts.append(delta)
+            await self._send(
+                {
+                    "type": "translation_delta",
+                    "segment_id": segment_id,
+                    "is_final": is_final,
+                    "sequence": len(parts) - 1,
+                    "delta": delta,
+                }
+            )
+
+        translation = "".join(parts).strip()
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        self.translated += 1
+
+        kind = "final" if is_final else "interim"
+        if first_token_ms is not None:
+            TRANSLATION_FIRST_TOKEN.observe(first_token_ms / 1000, kind=kind)
+        if not translation:
+            ERRORS.inc(category="translation")
+        else:
+            TRANSLATION_LATENCY.observe(latency_ms / 1000, kind=kind)
+            self.log.info(
+                "🌐 번역",
+                segment_id=segment_id,
+                first_token_ms=first_token_ms,
+                latency_ms=latency_ms,
+                transcript=text[:30],
+                translation=translation[:50],
+            )
+
+        await self._send(
+            {
+                "type": "translation_final",
+                "segment_id": segment_id,
+                "is_final": is_final,
+                "sequence": len(parts),
+                "transcript": text,
+                "translation": translation or "[Translation failed]",
+                "first_token_ms": first_token_ms,
+                "latency_ms": latency_ms,
+            }
+        )
+
+    async def _deltas(self, text: str, is_final: bool):
+        """Yield translation chunks, from the batcher for finals when enabled."""
+        if is_final and self.batcher is not None:
+            translation = await self.batcher.translate(text)
+            if translation:
+                yield translation
+            return
+        async for delta in self.translation_service.translate_stream(text):
+            yield delta
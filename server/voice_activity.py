@@ -0,0 +1,168 @@
+"""
+Voice Activity Gate
+Energy / zero-crossing VAD that keeps silence from being sent upstream
+"""
+
+import collections
+import math
+from typing import Callable, List, Optional
+import numpy as np
+from config import (
+    VAD_ENABLED,
+    VAD_THRESHOLD_DB,
+    VAD_NOISE_MARGIN_DB,
+    VAD_ZCR_MAX,
+    VAD_HANGOVER_MS,
+    VAD_PREROLL_MS,
+)
+
+
+def frame_levels(chunk: bytes):
+    """
+    Measure a LINEAR16 chunk.
+
+    Args:
+        chunk: Little-endian 16-bit mono PCM
+
+    Returns:
+        Tuple of (level in dBFS, zero-crossing rate per sample)
+    """
+    samples = np.frombuffer(chunk, dtype="<i2", count=len(chunk) // 2)
+    if samples.size < 2:
+        return -120.0, 0.0
+    floats = samples.astype(np.float32)
+    rms = math.sqrt(float(np.dot(floats, floats)) / samples.size)
+    level_db = 20.0 * math.log10(rms / 32768.0 + 1e-9)
+    signs = np.signbit(samples)
+    zcr = np.count_nonzero(signs[1:] != signs[:-1]) / (samples.size - 1)
+    return level_db, zcr
+
+
+class VoiceActivityGate:
+    """
+    Per-session gate between the WebSocket receiver and the audio bridge.
+
+    A chunk opens the gate when its level clears both the absolute threshold
+    and the tracked noise floor plus a margin, and its zero-crossing rate is
+    low enough to rule out broadband hiss. The gate stays open for the
+    hangover period after the last speech chunk, and the pre-roll (audio
+    just before the onset) is flushed when the gate opens so word onsets
+    are not clipped.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        sample_width: int = 2,
+        decode: Optional[Callable[[bytes], bytes]] = None,
+        enabled: bool = VAD_ENABLED,
+        threshold_db: float = VAD_THRESHOLD_DB,
+        noise_margin_db: float = VAD_NOISE_MARGIN_DB,
+        zcr_max: float = VAD_ZCR_MAX,
+        hangover_ms: int = VAD_HANGOVER_MS,
+        preroll_ms: int = VAD_PREROLL_MS,
+    ):
+        """
+        Initialize the gate.
+
+        Args:
+            sample_rate: Sample rate of the input
+            sample_width: Bytes per input sample
+            decode: Converts input chunks to LINEAR16 for measuring (for
+                μ-law/A-law input; chunks are still forwarded as received)
+            enabled: When False every chunk passes through (counters still run)
+            threshold_db: Absolute speech level threshold in dBFS
+            noise_margin_db: Required level above the tracked noise floor
+            zcr_max: Maximum zero-crossing rate for a speech onset
+            hangover_ms: Audio kept after the last speech chunk
+            preroll_ms: Audio kept before a speech onset
+        """
+        self.enabled = enabled
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.zcr_max = zcr_max
+        self.decode = decode
+        self.bytes_per_ms = sample_rate * sample_width // 1000
+        self.hangover_bytes = hangover_ms * self.bytes_per_ms
+        self.preroll_bytes = preroll_ms * self.bytes_per_ms
+
+        self._noise_floor_db = threshold_db - noise_margin_db
+        self._hangover_left = 0
+        self._preroll = collections.deque()
+        self._preroll_size = 0
+
+        # Per-session counters
+        self.sent_bytes = 0
+        self.suppressed_bytes = 0
+        self.speech_segments = 0
+
+    @property
+    def active(self) -> bool:
+        """Check if the gate is currently open."""
+        return self._hangover_left > 0
+
+    def process(self, chunk: bytes) -> List[bytes]:
+        """
+        Gate one chunk.
+
+        Args:
+            chunk: Audio from the client
+
+        Returns:
+            Chunks to forward upstream (empty while silent)
+        """
+        if not self.enabled:
+            self.sent_bytes += len(chunk)
+            return [chunk]
+
+        level_db, zcr = frame_levels(self.decode(chunk) if self.decode else chunk)
+        threshold = max(self.threshold_db, self._noise_floor_db + self.noise_margin_db)
+        loud = level_db >= threshold
+
+        if loud and (self.active or zcr <= self.zcr_max):
+            if not self.active:
+                self.speech_segments += 1
+            self._hangover_left = self.hangover_bytes
+            return self._flush_preroll(chunk)
+
+        if not loud:
+            # Track the noise floor on non-speech audio only
+            self._noise_floor_db += 0.05 * (level_db - self._noise_floor_db)
+
+        if self.active:
+            self._hangover_left -= len(chunk)
+            self.sent_bytes += len(chunk)
+            return [chunk]
+
+        self._hold_preroll(chunk)
+        return []
+
+    def stats(self) -> dict:
+        """Return the session's suppressed vs. sent audio counters."""
+        total = self.sent_bytes + self.suppressed_bytes
+        return {
+            "enabled": self.enabled,
+            "sent_ms": self.sent_bytes // self.bytes_per_ms,
+            "suppressed_ms": self.suppressed_bytes // self.bytes_per_ms,
+            "suppressed_ratio": round(self.suppressed_bytes / total, 3) if total else 0.0,
+            "speech_segments": self.speech_segments,
+            "noise_floor_db": round(self._noise_floor_db, 1),
+        }
+
+    def _hold_preroll(self, chunk: bytes) -> None:
+        """Keep a silent chunk as potential pre-roll, suppressing what falls out."""
+        self._preroll.append(chunk)
+        self._preroll_size += len(chunk)
+        while self._preroll and self._preroll_size - len(self._preroll[0]) >= self.preroll_bytes:
+            dropped = self._preroll.popleft()
+            self._preroll_size -= len(dropped)
+            self.suppressed_bytes += len(dropped)
+
+    def _flush_preroll(self, chunk: bytes) -> List[bytes]:
+        """Return the held pre-roll followed by the onset chunk."""
+        chunks = list(self._preroll)
+        chunks.append(chunk)
+        self.sent_bytes += self._preroll_size + len(chunk)
+        self._preroll.clear()
+        self._preroll_size = 0
+        return chunks